@@ -1,93 +1,122 @@
+import time
+
+# Measure worker cold start from the first import
+_import_started = time.perf_counter()
+
 from flask import Flask
 from flask_cors import CORS
 import sys
 import os
-import json
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.settings import SECRET_KEY, DEBUG, CORS_ORIGINS
-from backend.models import init_db, get_db, Product
+from config.settings import (
+    SECRET_KEY,
+    DEBUG,
+    CORS_ORIGINS,
+    AUTO_BOOTSTRAP,
+    COLD_START_TARGET_SECONDS,
+    RECOMMENDATION_CACHE_WARMUP
+)
+from backend.models import close_request_db, pool_status
 from backend.routes.chatbot_routes import chatbot_bp
+from backend.routes.product_routes import product_bp
+from backend.routes.recommendation_routes import recommendation_bp
+from backend.services.interaction_ingest import ingest_stats
+from backend.services.popularity_counter import popularity_stats
+from backend.services.recommendation_cache import start_warm_up
+from backend.services.session_store import session_store_stats
+from backend.utils.bootstrap import bootstrap
+from backend.utils.http_cache import http_cache_stats
+
+
+def create_app(run_bootstrap=AUTO_BOOTSTRAP):
+    """
+    Application factory
+
+    Args:
+        run_bootstrap: create/seed the database on startup (off under
+            gunicorn, whose master bootstraps before forking workers).
+            Processes take turns under the bootstrap file lock, so only the
+            first one seeds.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = SECRET_KEY
+    app.config['DEBUG'] = DEBUG
+
+    # Enable CORS
+    CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
+
+    # Register blueprints
+    app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
+    app.register_blueprint(product_bp, url_prefix='/api/products')
+    app.register_blueprint(recommendation_bp, url_prefix='/api/recommendations')
+
+    # Request-scoped database session is returned to the pool after each request
+    app.teardown_appcontext(close_request_db)
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = SECRET_KEY
-app.config['DEBUG'] = DEBUG
-
-# Enable CORS
-CORS(app, resources={r"/api/*": {"origins": CORS_ORIGINS}})
-
-# Register blueprints
-app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
-
-# Initialize database and load sample products
-with app.app_context():
-    init_db()
-    print("✅ Database initialized successfully!")
-    
-    # Load sample products
-    db = get_db()
-    
-    # Check if products already exist
-    existing_count = db.query(Product).count()
-    
-    if existing_count == 0:
-        print("📦 Loading sample products...")
-        
-        # Load sample products from JSON
-        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        products_file = os.path.join(base_path, 'data', 'sample_products.json')
-        
-        try:
-            with open(products_file, 'r') as f:
-                products_data = json.load(f)
-            
-            for product_data in products_data:
-                product = Product(
-                    name=product_data.get('name'),
-                    category=product_data.get('category'),
-                    metal_type=product_data.get('metal_type'),
-                    price=product_data.get('price'),
-                    occasion=product_data.get('occasion'),
-                    style=product_data.get('style'),
-                    image_url=product_data.get('image_url'),
-                    description=product_data.get('description'),
-                    popularity=product_data.get('popularity', 0)
-                )
-                db.add(product)
-            
-            db.commit()
-            print(f"✅ Loaded {len(products_data)} sample products!")
-        except Exception as e:
-            print(f"⚠️  Could not load sample products: {e}")
-        finally:
-            db.close()
-    else:
-        print(f"📦 Database has {existing_count} products already!")
-
-
-@app.route('/')
-def index():
-    """Health check endpoint"""
-    return {
-        'status': 'running',
-        'message': 'Jewelry Recommendation Chatbot API',
-        'version': '1.0.0',
-        'endpoints': {
-            'chatbot_start': '/api/chatbot/start',
-            'chatbot_message': '/api/chatbot/message',
-            'chatbot_history': '/api/chatbot/history/<session_id>',
-            'track_interaction': '/api/chatbot/track',
-            'trending_products': '/api/chatbot/trending'
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Create the database schema and seed sample products."""
+        bootstrap()
+
+    @app.route('/')
+    def index():
+        """Health check endpoint"""
+        return {
+            'status': 'running',
+            'message': 'Jewelry Recommendation Chatbot API',
+            'version': '1.0.0',
+            'endpoints': {
+                'chatbot_start': '/api/chatbot/start',
+                'chatbot_message': '/api/chatbot/message',
+                'chatbot_history': '/api/chatbot/history/<session_id>',
+                'track_interaction': '/api/chatbot/track',
+                'trending_products': '/api/chatbot/trending',
+                'similar_products': '/api/chatbot/similar/<product_id>',
+                'product_search': '/api/products/search?q=<text>',
+                'batch_recommendations': '/api/recommendations/batch'
+            }
         }
-    }
+
+    @app.route('/health')
+    def health():
+        """Health check"""
+        return {
+            'status': 'healthy',
+            'cold_start_ms': round(app.config['COLD_START_SECONDS'] * 1000, 1)
+        }, 200
+
+    @app.route('/metrics')
+    def metrics():
+        """Runtime metrics"""
+        return {
+            'db_pool': pool_status(),
+            'interaction_ingest': ingest_stats(),
+            'popularity_counter': popularity_stats(),
+            'session_store': session_store_stats(),
+            'http_cache': http_cache_stats()
+        }, 200
+
+    # Lock-protected and idempotent, so concurrent workers don't race to seed
+    if run_bootstrap:
+        bootstrap()
+
+    # Precompute recommendations for every preference combination
+    if RECOMMENDATION_CACHE_WARMUP:
+        start_warm_up()
+        print("🔥 Warming up recommendation cache in the background...")
+
+    cold_start = time.perf_counter() - _import_started
+    app.config['COLD_START_SECONDS'] = cold_start
+    if cold_start > COLD_START_TARGET_SECONDS:
+        print(f"⚠️  Cold start took {cold_start * 1000:.0f}ms "
+              f"(target {COLD_START_TARGET_SECONDS * 1000:.0f}ms)")
+
+    return app
 
 
-@app.route('/health')
-def health():
-    """Health check"""
-    return {'status': 'healthy'}, 200
+app = create_app()
 
 
 if __name__ == '__main__':
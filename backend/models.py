@@ -1,20 +1,38 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from flask import g
+from sqlalchemy import create_engine, event, inspect, text, Column, Index, Integer, String, Float, DateTime, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 import sys
 import os
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.settings import SQLALCHEMY_DATABASE_URI
+from config.settings import (
+    SQLALCHEMY_DATABASE_URI,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_PRAGMAS
+)
 
 Base = declarative_base()
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('idx_products_category', 'category'),
+        Index('idx_products_metal_type', 'metal_type'),
+        Index('idx_products_price', 'price'),
+        Index('idx_products_popularity', 'popularity'),  # Trending (ORDER BY popularity)
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
+    sku = Column(String, unique=True, index=True)  # Supplier SKU, used for upserts
     name = Column(String, nullable=False)
     category = Column(String)
     metal_type = Column(String)
@@ -32,6 +50,7 @@ class Product(Base):
     def to_dict(self):
         return {
             'id': self.id,
+            'sku': self.sku,
             'name': self.name,
             'category': self.category,
             'metal_type': self.metal_type,
@@ -78,6 +97,10 @@ class UserSession(Base):
 
 class ConversationHistory(Base):
     __tablename__ = 'conversation_history'
+    __table_args__ = (
+        # History for a session in insertion order (keyset pagination on id)
+        Index('idx_history_session_id', 'session_id', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String, ForeignKey('user_sessions.session_id'), nullable=False)
@@ -90,6 +113,7 @@ class ConversationHistory(Base):
     
     def to_dict(self):
         return {
+            'id': self.id,
             'message': self.message,
             'sender': self.sender,
             'timestamp': self.timestamp.isoformat()
@@ -98,12 +122,20 @@ class ConversationHistory(Base):
 
 class Interaction(Base):
     __tablename__ = 'interactions'
+    __table_args__ = (
+        # Composites also serve plain session_id / product_id lookups
+        Index('idx_interactions_session_timestamp', 'session_id', 'timestamp'),
+        Index('idx_interactions_product_timestamp', 'product_id', 'timestamp'),
+        # Replayed ingestion logs never insert an event twice
+        Index('idx_interactions_event_id', 'event_id', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String, ForeignKey('user_sessions.session_id'))
     product_id = Column(Integer, ForeignKey('products.id'))
     action_type = Column(String)  # 'view', 'click', 'like', 'add_to_cart'
     timestamp = Column(DateTime, default=datetime.utcnow)
+    event_id = Column(String)  # Assigned at ingestion (NULL for older rows)
     
     # Relationships
     session = relationship('UserSession', back_populates='interactions')
@@ -119,14 +151,177 @@ class Interaction(Base):
 
 
 # Database engine and session
-engine = create_engine(SQLALCHEMY_DATABASE_URI, echo=False)
-SessionLocal = sessionmaker(bind=engine)
+def _engine_options():
+    """Connection pool configuration for the database engine"""
+    options = {
+        'echo': False,
+        'poolclass': QueuePool,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # Pooled connections are handed to whichever thread serves the request
+        options['connect_args'] = {
+            'check_same_thread': False,
+            'timeout': SQLITE_BUSY_TIMEOUT
+        }
+    return options
+
+engine = create_engine(SQLALCHEMY_DATABASE_URI, **_engine_options())
+# Objects stay usable after commit without a refresh SELECT
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+# Activity counters (current pool state comes from the pool itself)
+_pool_counters = {'connects': 0, 'checkouts': 0, 'commits': 0}
+
+@event.listens_for(engine, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    _pool_counters['connects'] += 1
+    if engine.dialect.name == 'sqlite':
+        # Apply the configured performance profile (WAL, synchronous, mmap, ...)
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+@event.listens_for(engine, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _pool_counters['checkouts'] += 1
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _on_commit(session):
+    _pool_counters['commits'] += 1
+
+def pool_status():
+    """Connection pool metrics"""
+    pool = engine.pool
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'connects': _pool_counters['connects'],
+        'checkouts': _pool_counters['checkouts'],
+        'commits': _pool_counters['commits']
+    }
+
+# Created by earlier versions of database/schema.sql
+SUPERSEDED_INDEXES = (
+    'idx_sessions_session_id',
+    'idx_interactions_session_id',
+    'idx_interactions_product_id',
+    'idx_history_session_timestamp'
+)
+
+# Full-text search over products (SQLite FTS5, external content table)
+# The triggers keep it in sync with every write to products, ORM or Core.
+SEARCH_TABLE = 'products_fts'
+SEARCH_COLUMNS = ('name', 'description', 'category', 'metal_type', 'style')  # Index column order
+SEARCH_INDEX_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category, metal_type, style,
+        content='products', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category, metal_type, style)
+        VALUES (new.id, new.name, new.description, new.category, new.metal_type, new.style);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, metal_type, style)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.metal_type, old.style);
+    END""",
+    # Only text changes touch the index (not popularity merges or price edits)
+    """CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, category, metal_type, style ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, metal_type, style)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.metal_type, old.style);
+        INSERT INTO products_fts(rowid, name, description, category, metal_type, style)
+        VALUES (new.id, new.name, new.description, new.category, new.metal_type, new.style);
+    END"""
+)
+
+# Version of the products table shared by every worker (SQLite), bumped by
+# triggers on every write, ORM or Core, so HTTP caches can version responses
+VERSION_TABLE = 'data_versions'
+VERSION_DDL = (
+    """CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )""",
+    "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('products', 0)",
+    """CREATE TRIGGER IF NOT EXISTS products_version_insert AFTER INSERT ON products BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_version_delete AFTER DELETE ON products BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_version_update AFTER UPDATE ON products BEGIN
+        UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+    END"""
+)
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(engine)
+    migrate_db()
     print("Database initialized successfully!")
 
+def migrate_db():
+    """
+    Bring databases created by older versions up to date
+    create_all() only creates missing tables, not missing columns
+    """
+    product_columns = {column['name'] for column in inspect(engine).get_columns('products')}
+    interaction_columns = {column['name'] for column in inspect(engine).get_columns('interactions')}
+    
+    with engine.begin() as conn:
+        if 'sku' not in product_columns:
+            conn.execute(text("ALTER TABLE products ADD COLUMN sku VARCHAR"))
+        if 'event_id' not in interaction_columns:
+            conn.execute(text("ALTER TABLE interactions ADD COLUMN event_id VARCHAR"))
+        
+        # create_all() only creates indexes together with new tables
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        
+        # Indexes from older schemas covered by the unique / composite ones
+        for index_name in SUPERSEDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        
+        if engine.dialect.name == 'sqlite':
+            _create_search_index(conn)
+            for statement in VERSION_DDL:
+                conn.execute(text(statement))
+
+def _create_search_index(conn):
+    """Create the product search index, filling it from existing products"""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}
+    ).first()
+    
+    for statement in SEARCH_INDEX_DDL:
+        conn.execute(text(statement))
+    
+    if not exists:
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+def get_data_version(db, name='products'):
+    """
+    Shared version of a table's contents, the same in every worker
+    Returns None when the database keeps no versions (not SQLite)
+    """
+    if engine.dialect.name != 'sqlite':
+        return None
+    return db.execute(
+        text(f"SELECT version FROM {VERSION_TABLE} WHERE name = :name"), {'name': name}
+    ).scalar()
+
 def get_db():
     """Get database session"""
     db = SessionLocal()
@@ -134,3 +329,20 @@ def get_db():
         return db
     finally:
         pass  # Session will be closed by caller
+
+def get_request_db():
+    """
+    Get the database session for the current request
+    Shared by every service handling the request and closed on teardown
+    """
+    if 'db' not in g:
+        g.db = SessionLocal()
+    return g.db
+
+def close_request_db(exception=None):
+    """Close the request session (registered as an app teardown handler)"""
+    db = g.pop('db', None)
+    if db is not None:
+        if exception is not None:
+            db.rollback()
+        db.close()
@@ -1,15 +1,59 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import sys
 import os
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.models import get_data_version, get_request_db
 from backend.services.chatbot_service import ChatbotService
 from backend.services.recommendation_engine import HybridRecommendationEngine
+from backend.services.interaction_ingest import get_ingestor, IngestQueueFull
+from backend.services.product_index import get_catalog_version, get_popularity_version
+from backend.services.trending import get_trending_tracker
+from backend.utils.http_cache import cached_response, PROCESS_TAG
+from config.settings import (
+    TRENDING_CACHE_MAX_AGE,
+    TRENDING_TOP_K,
+    HISTORY_PAGE_SIZE,
+    HISTORY_MAX_PAGE_SIZE,
+    CONTENT_NEIGHBOURS,
+    MODEL_RELOAD_CHECK_SECONDS
+)
 
 chatbot_bp = Blueprint('chatbot', __name__)
 
 
+def _history_version(session_id):
+    """History changes only when a message is added (polls write nothing)"""
+    return ChatbotService(get_request_db()).get_history_version(session_id)
+
+
+def _catalog_version():
+    """
+    Version of the products (details and popularity), the same in every
+    worker; this worker's counters where the database keeps none
+    """
+    version = get_data_version(get_request_db())
+    if version is None:
+        return f'{PROCESS_TAG}:{get_catalog_version()}:{get_popularity_version()}'
+    return f'products:{version}'
+
+
+def _trending_version():
+    """Trending depends on the interactions read so far and on the products"""
+    tracker = get_trending_tracker(get_request_db())
+    return f'{_catalog_version()}:{tracker.last_id}'
+
+
+def _similar_version(product_id):
+    """Neighbours change with the published model, product details with the products"""
+    # Imported lazily so workers only load scipy once similar products are requested
+    from backend.services.content_similarity import get_content_model
+    model = get_content_model()
+    return f'{_catalog_version()}:{model.version if model else None}'
+
+
 @chatbot_bp.route('/start', methods=['POST'])
 def start_chatbot():
     """
@@ -23,9 +67,8 @@ def start_chatbot():
         }
     """
     try:
-        chatbot = ChatbotService()
+        chatbot = ChatbotService(get_request_db())
         response = chatbot.start_session()
-        chatbot.close()
         
         return jsonify({
             'success': True,
@@ -69,8 +112,9 @@ def process_message():
                 'error': 'session_id and message are required'
             }), 400
         
-        # Process message
-        chatbot = ChatbotService()
+        # Process message (services share the request session)
+        db = get_request_db()
+        chatbot = ChatbotService(db)
         response = chatbot.process_message(session_id, user_message)
         
         # If ready for recommendations, get them
@@ -78,16 +122,13 @@ def process_message():
             preferences = chatbot.get_session_preferences(session_id)
             
             # Get recommendations from hybrid engine
-            rec_engine = HybridRecommendationEngine()
+            rec_engine = HybridRecommendationEngine(db)
             products = rec_engine.get_recommendations(preferences, use_ml=False)
-            rec_engine.close()
             
             # Add products to response
             response['products'] = [p.to_dict() for p in products]
             response['message'] = f"Here are {len(products)} perfect matches for you! 💎✨"
         
-        chatbot.close()
-        
         return jsonify({
             'success': True,
             'data': response
@@ -101,26 +142,39 @@ def process_message():
 
 
 @chatbot_bp.route('/history/<session_id>', methods=['GET'])
+@cached_response(_history_version, 'private, no-cache')
 def get_history(session_id):
     """
-    Get conversation history for a session
+    Get conversation history for a session, one page at a time
+    
+    Query params:
+        after_id: return messages after this ID (next_after_id of the previous page)
+        limit: page size (default HISTORY_PAGE_SIZE, max HISTORY_MAX_PAGE_SIZE)
+        format: 'stream' to export the whole history as a streamed JSON document
     
     Returns:
         {
             "history": [
-                {"message": "...", "sender": "user/bot", "timestamp": "..."},
+                {"id": 1, "message": "...", "sender": "user/bot", "timestamp": "..."},
                 ...
-            ]
+            ],
+            "next_after_id": 50 (null on the last page)
         }
     """
     try:
-        chatbot = ChatbotService()
-        history = chatbot.get_conversation_history(session_id)
-        chatbot.close()
+        if request.args.get('format') == 'stream':
+            return _stream_history(session_id)
+        
+        after_id = request.args.get('after_id', type=int)
+        limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+        
+        chatbot = ChatbotService(get_request_db())
+        page = chatbot.get_conversation_history(session_id, after_id, limit)
         
         return jsonify({
             'success': True,
-            'data': {'history': history}
+            'data': page
         }), 200
     
     except Exception as e:
@@ -130,10 +184,28 @@ def get_history(session_id):
         }), 500
 
 
+def _stream_history(session_id):
+    """Full history export, written out as rows are fetched"""
+    
+    def generate():
+        # Own session: the export may outlive the request's teardown
+        chatbot = ChatbotService()
+        try:
+            yield '{"success": true, "data": {"history": ['
+            for i, message in enumerate(chatbot.iter_conversation_history(session_id)):
+                yield (',' if i else '') + json.dumps(message)
+            yield ']}}'
+        finally:
+            chatbot.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
 @chatbot_bp.route('/track', methods=['POST'])
 def track_interaction():
     """
     Track user interaction with products
+    Events are queued and written in batches by a background writer
     
     Request body:
         {
@@ -154,15 +226,29 @@ def track_interaction():
                 'error': 'session_id and product_id are required'
             }), 400
         
-        # Track interaction
-        rec_engine = HybridRecommendationEngine()
-        rec_engine.track_interaction(session_id, product_id, action_type)
-        rec_engine.close()
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'product_id must be an integer'
+            }), 400
+        
+        # Queue interaction
+        get_ingestor().submit(session_id, product_id, action_type)
         
         return jsonify({
             'success': True,
             'message': 'Interaction tracked successfully'
-        }), 200
+        }), 202
+    
+    except IngestQueueFull as e:
+        response = jsonify({
+            'success': False,
+            'error': str(e)
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
     
     except Exception as e:
         return jsonify({
@@ -172,10 +258,15 @@ def track_interaction():
 
 
 @chatbot_bp.route('/trending', methods=['GET'])
+@cached_response(_trending_version, f'public, max-age={TRENDING_CACHE_MAX_AGE}')
 def get_trending():
     """
     Get trending products
     
+    Query params:
+        limit: max products (default 10, 1 to TRENDING_TOP_K)
+        category / metal_type: optional filters, combined when both are given
+    
     Returns:
         {
             "products": [...]
@@ -183,10 +274,17 @@ def get_trending():
     """
     try:
         limit = request.args.get('limit', 10, type=int)
+        category = request.args.get('category')
+        metal_type = request.args.get('metal_type')
         
-        rec_engine = HybridRecommendationEngine()
-        products = rec_engine.get_trending_products(limit)
-        rec_engine.close()
+        if not 1 <= limit <= TRENDING_TOP_K:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be between 1 and {TRENDING_TOP_K}'
+            }), 400
+        
+        rec_engine = HybridRecommendationEngine(get_request_db())
+        products = rec_engine.get_trending_products(limit, category, metal_type)
         
         return jsonify({
             'success': True,
@@ -200,3 +298,44 @@ def get_trending():
             'success': False,
             'error': str(e)
         }), 500
+
+
+@chatbot_bp.route('/similar/<int:product_id>', methods=['GET'])
+@cached_response(_similar_version, f'public, max-age={MODEL_RELOAD_CHECK_SECONDS}')
+def get_similar(product_id):
+    """
+    Get products similar to a product (name, description and attributes)
+    Served from the precomputed content similarity model
+    
+    Query params:
+        limit: max products (default 10, max CONTENT_NEIGHBOURS)
+    
+    Returns:
+        {
+            "products": [{..., "similarity": 0.42}, ...]
+        }
+    """
+    from backend.services.content_similarity import similar_products
+    
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, CONTENT_NEIGHBOURS))
+        
+        products = similar_products(get_request_db(), product_id, limit)
+        
+        if products is None:
+            return jsonify({
+                'success': False,
+                'error': 'Product not found in the similarity model'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {'products': products}
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,68 @@
+from flask import Blueprint, request, jsonify
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.models import get_request_db
+from backend.services.product_search import search_products, InvalidCursor, FILTER_FIELDS
+from config.settings import SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+
+product_bp = Blueprint('products', __name__)
+
+
+@product_bp.route('/search', methods=['GET'])
+def search():
+    """
+    Full-text product search
+    
+    Query params:
+        q: search text (every word must match; the last letters may be missing)
+        category, metal_type, style, occasion: exact filters (optional)
+        min_price, max_price: price range (optional)
+        limit: max products (default SEARCH_PAGE_SIZE, max SEARCH_MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+    
+    Returns:
+        {
+            "products": [{..., "relevance": 12.3}, ...],
+            "next_cursor": "..." or null
+        }
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({
+                'success': False,
+                'error': 'Missing search text (q)'
+            }), 400
+        
+        limit = request.args.get('limit', SEARCH_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+        
+        results = search_products(
+            get_request_db(),
+            query,
+            filters={field: request.args.get(field) for field in FILTER_FIELDS},
+            min_price=request.args.get('min_price', type=float),
+            max_price=request.args.get('max_price', type=float),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': results
+        }), 200
+    
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.models import get_request_db
+from backend.services.recommendation_engine import HybridRecommendationEngine
+from config.settings import MAX_RECOMMENDATIONS, RECOMMENDATION_BATCH_MAX_SIZE
+
+recommendation_bp = Blueprint('recommendations', __name__)
+
+PREFERENCE_FIELDS = ('budget_min', 'budget_max', 'metal_type', 'occasion', 'style', 'category')
+
+
+def _invalid_preferences(preferences):
+    """Error message for a malformed preference set, or None"""
+    if not isinstance(preferences, dict):
+        return 'each request must be an object of preferences'
+    for field in ('budget_min', 'budget_max'):
+        value = preferences.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f'{field} must be a number'
+    for field in ('metal_type', 'occasion', 'style', 'category'):
+        value = preferences.get(field)
+        if value is not None and not isinstance(value, str):
+            return f'{field} must be a string'
+    return None
+
+
+@recommendation_bp.route('/batch', methods=['POST'])
+def batch_recommendations():
+    """
+    Get recommendations for many preference sets in one call
+    (e.g. homepage carousels, marketing jobs)
+    
+    Request body:
+        {
+            "requests": [
+                {"budget_min": 0, "budget_max": 50000, "metal_type": "Gold", ...},
+                ...
+            ],
+            "limit": 10 (optional, max MAX_RECOMMENDATIONS)
+        }
+    
+    Returns:
+        {
+            "results": [{"products": [...]}, ...] (in request order)
+        }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        preferences_list = data.get('requests')
+        
+        if not isinstance(preferences_list, list) or not preferences_list:
+            return jsonify({
+                'success': False,
+                'error': 'requests must be a non-empty list'
+            }), 400
+        
+        if len(preferences_list) > RECOMMENDATION_BATCH_MAX_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'At most {RECOMMENDATION_BATCH_MAX_SIZE} requests per batch'
+            }), 400
+        
+        for position, preferences in enumerate(preferences_list):
+            error = _invalid_preferences(preferences)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': f'requests[{position}]: {error}'
+                }), 400
+        
+        limit = data.get('limit', MAX_RECOMMENDATIONS)
+        if isinstance(limit, bool) or not isinstance(limit, int):
+            return jsonify({
+                'success': False,
+                'error': 'limit must be an integer'
+            }), 400
+        
+        rec_engine = HybridRecommendationEngine(get_request_db())
+        batches = rec_engine.get_recommendations_batch(
+            [{field: preferences.get(field) for field in PREFERENCE_FIELDS} for preferences in preferences_list],
+            limit
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': [
+                    {'products': [product.to_dict() for product in products]}
+                    for products in batches
+                ]
+            }
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -0,0 +1,145 @@
+import re
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.settings import BUDGET_RANGES, BUDGET_OPTIONS
+
+UNIT_MULTIPLIERS = {
+    'k': 1_000,
+    'thousand': 1_000,
+    'l': 100_000,
+    'lac': 100_000,
+    'lacs': 100_000,
+    'lakh': 100_000,
+    'lakhs': 100_000,
+    'cr': 10_000_000,
+    'crore': 10_000_000,
+    'crores': 10_000_000
+}
+
+# Bare numbers below this (no currency sign or unit) are not amounts: "2 rings".
+# Answering the budget question with nothing but such numbers ("50", "10 to 25")
+# means thousands, like the budget options.
+MIN_BARE_AMOUNT = 100
+BARE_AMOUNT_UNIT = 1_000
+
+# Buckets by lower bound, for single amounts ("around 30000")
+BUDGET_BUCKETS = sorted(BUDGET_RANGES.values())
+# Upper bound used for "above X"
+OPEN_BUDGET_MAX = BUDGET_BUCKETS[-1][1]
+
+# One pass over the message: amounts (with optional currency and unit) and
+# the words that make a single amount an upper or lower bound. A currency may
+# be attached to the number ("Rs.5000", "INR5000", "5000rs"); without one, a
+# number must not continue a word or another number ("iphone12", "1.5.2").
+TOKEN_PATTERN = re.compile(r'''
+    (?P<amount>
+        (?:(?P<currency>₹|(?<![a-z0-9])(?:rs|inr)\.?)\s*|(?<![\w.]))
+        (?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)
+        \s*(?P<unit>k|thousand|lakhs?|lacs?|l|crores?|cr)?
+        (?P<currency_after>\s*(?:rs|inr|rupees?)\b\.?)?(?![a-z0-9])
+    )
+  | (?P<below>\b(?:under|below|less\s+than|up\s*to|within|max(?:imum)?|at\s*most
+                  |(?:no|not)\s+(?:more|higher)\s+than|not\s+(?:over|above|exceeding))\b)
+  | (?P<above>\b(?:above|over|more\s+than|plus|at\s*least|min(?:imum)?|starting)\b|\+)
+''', re.VERBOSE)
+
+
+# What may stand between the two ends of a range whose first end borrows
+# the second one's unit ("10-25k", "10 to 25k")
+RANGE_SEPARATOR = re.compile(r'\s*(?:-|–|to|and)\s*')
+
+
+def _bucket(amount):
+    """The BUDGET_RANGES bucket an amount falls into (stretched to fit one above them all)"""
+    for low, high in BUDGET_BUCKETS:
+        if amount < high:
+            return (low, high)
+    low, high = BUDGET_BUCKETS[-1]
+    return (low, _normalize(max(high, amount)))
+
+
+def _normalize(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def parse_budget(user_input, asked=True):
+    """
+    Parse a budget from a message
+
+    Understands ₹/Rs/INR amounts, comma grouping (15,000 and 1,50,000),
+    k / lakh / crore suffixes (1.5 lakh), ranges ("10k-25k", "between 20000
+    and 40000", where "10-25k" shares the unit) and bounds ("under 10k",
+    "50k+"). A single plain amount picks its BUDGET_RANGES bucket (the top
+    one reaching up to the amount when it is larger).
+
+    Args:
+        user_input: message text
+        asked: the message answers the budget question, so small bare
+            numbers on their own are thousands ("50", "under 10"). Otherwise
+            only amounts with a currency, a unit or a bound word count
+            ("916 gold chain" mentions no budget)
+
+    Returns: (budget_min, budget_max) or None
+    """
+    preset = PRESET_BUDGETS.get(user_input.strip().lower())
+    if preset is not None:
+        return preset
+
+    return _parse(user_input, asked)
+
+
+def _parse(user_input, asked=True):
+    text = user_input.lower()
+    amounts = []   # [value, unit, has_currency, start, end]
+    direction = None
+
+    for token in TOKEN_PATTERN.finditer(text):
+        kind = token.lastgroup
+        if kind == 'below' or kind == 'above':
+            direction = direction or kind
+            continue
+
+        value = float(token.group('number').replace(',', ''))
+        unit = token.group('unit')
+        if unit:
+            value *= UNIT_MULTIPLIERS[unit]
+        currency = bool(token.group('currency') or token.group('currency_after'))
+        amounts.append([value, unit, currency, token.start('amount'), token.end('amount')])
+
+    # "10-25k": a number right before a range separator and an amount with a
+    # unit takes that unit ("2 rings and 30k" is no range, so 2 stays bare)
+    for first, second in zip(amounts, amounts[1:]):
+        if first[1] or not second[1] or not RANGE_SEPARATOR.fullmatch(text, first[4], second[3]):
+            continue
+        scaled = first[0] * UNIT_MULTIPLIERS[second[1]]
+        if scaled < second[0]:
+            first[0], first[1] = scaled, second[1]
+
+    values = [
+        value for value, unit, currency, _, _ in amounts
+        if unit or currency or (value >= MIN_BARE_AMOUNT and (asked or direction))
+    ]
+
+    if not values and asked:
+        values = [value * BARE_AMOUNT_UNIT for value, _, _, _, _ in amounts]
+
+    if not values:
+        # "above" / "plus" on its own: the top bucket
+        return BUDGET_BUCKETS[-1] if direction == 'above' and asked else None
+
+    if len(values) >= 2:
+        return (_normalize(min(values)), _normalize(max(values)))
+
+    amount = values[0]
+    if direction == 'below':
+        return (0, _normalize(amount))
+    if direction == 'above':
+        return (_normalize(amount), _normalize(max(OPEN_BUDGET_MAX, amount)))
+    return _bucket(amount)
+
+
+# Budget buttons offered in the chat, parsed once
+PRESET_BUDGETS = {option.lower(): _parse(option) for option in BUDGET_OPTIONS}
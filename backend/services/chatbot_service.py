@@ -1,31 +1,40 @@
-import re
 import uuid
 from datetime import datetime
+from sqlalchemy import func, select
 import sys
 import os
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from backend.models import UserSession, ConversationHistory, get_db
-from config.settings import BUDGET_RANGES, METAL_TYPES, OCCASIONS, STYLES, CATEGORIES
+from backend.models import ConversationHistory, get_db
+from backend.services.session_store import SessionState, get_session_store
+from backend.services.conversation_flow import CONVERSATION_FLOW, FIRST_STEP, FINAL_RESPONSE, FINAL_STATE
+from backend.services.slot_extractor import SLOT_EXTRACTOR, first_unanswered, describe_answer
+from backend.services.facet_index import FACET_FIELDS, BUDGET_FIELDS, get_facet_index
+from backend.services.budget_parser import PRESET_BUDGETS
+from config.settings import HISTORY_PAGE_SIZE, HISTORY_EXPORT_FETCH_SIZE
 
 
 class ChatbotService:
     """
     Chatbot conversation flow manager
     Handles question sequencing, user input parsing, and state management
+    
+    Session state lives in the session store during the conversation; the
+    database is only written when the store writes it through.
     """
     
-    def __init__(self):
-        self.db = get_db()
-        self.conversation_flow = [
-            'asking_metal',
-            'asking_budget',
-            'asking_occasion',
-            'asking_style',
-            'asking_category',
-            'showing_recommendations'
-        ]
+    def __init__(self, db=None, store=None):
+        """
+        Args:
+            db: optional shared session (e.g. the request session); a private
+                session is opened and owned when omitted
+            store: session store (the process-wide one by default)
+        """
+        self.owns_db = db is None
+        self.db = db if db is not None else get_db()
+        self.store = store if store is not None else get_session_store()
+        self.current_session = None
     
     def start_session(self):
         """
@@ -35,25 +44,23 @@ class ChatbotService:
         session_id = str(uuid.uuid4())
         
         # Create new session
-        session = UserSession(
-            session_id=session_id,
-            conversation_state='started'
-        )
-        self.db.add(session)
-        self.db.commit()
+        session = SessionState(session_id, conversation_state='started')
+        self.current_session = session
         
         # Add welcome message to history
         welcome_message = "Hi! 👋 I'm your jewelry shopping assistant. I'll help you find the perfect piece! To get started, what metal type do you prefer?"
-        self._add_to_history(session_id, welcome_message, 'bot')
+        self._add_to_history(session, welcome_message, 'bot')
         
         # Update state
-        self._update_session_state(session_id, 'asking_metal')
+        self._update_session_state(session, FIRST_STEP.state)
         
-        return {
+        self.store.save(session)
+        
+        return self._offer_options({
             'session_id': session_id,
             'message': welcome_message,
-            'options': METAL_TYPES
-        }
+            'options': FIRST_STEP.retry_response['options']
+        }, FIRST_STEP, session)
     
     def process_message(self, session_id, user_message):
         """
@@ -65,261 +72,171 @@ class ChatbotService:
         
         Returns:
             dict with bot_message, options, and conversation_state
+        
+        History and session updates are kept in the session store, which
+        writes them to the database together once the conversation completes.
         """
         # Get session
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        session = self.store.get(session_id)
         
         if not session:
             return self.start_session()
         
+        self.current_session = session
+        
         # Check for global restart commands
         if user_message.lower().strip() in ['start', 'restart', 'reset']:
             # Force start a new session
             return self.start_session()
         
         # Add user message to history
-        self._add_to_history(session_id, user_message, 'user')
-        
-        # Process based on current state
-        current_state = session.conversation_state
+        self._add_to_history(session, user_message, 'user')
         
-        if current_state == 'started' or current_state == 'asking_metal':
-            return self._handle_metal(session, user_message)
-        
-        elif current_state == 'asking_budget':
-            return self._handle_budget(session, user_message)
-        
-        elif current_state == 'asking_occasion':
-            return self._handle_occasion(session, user_message)
-        
-        elif current_state == 'asking_style':
-            return self._handle_style(session, user_message)
-        
-        elif current_state == 'asking_category':
-            return self._handle_category(session, user_message)
+        # O(1) dispatch on the current state
+        step = CONVERSATION_FLOW.get(session.conversation_state)
         
+        if step is not None:
+            response = self._handle_step(session, step, user_message)
+            next_step = CONVERSATION_FLOW.get(response['conversation_state'])
+            if next_step is not None:
+                response = self._offer_options(response, next_step, session)
         else:
             # Default response
-            return {
+            response = {
                 'message': "I'm not sure I understand. Let's start over!",
                 'options': [],
-                'conversation_state': current_state
-            }
-    
-    def _handle_budget(self, session, user_message):
-        """Handle budget input"""
-        budget_min, budget_max = self._parse_budget(user_message)
-        
-        if budget_min is None:
-            return {
-                'message': "I didn't quite catch that. Please select your budget range:",
-                'options': [
-                    'Under ₹10,000',
-                    '₹10,000 - ₹25,000',
-                    '₹25,000 - ₹50,000',
-                    '₹50,000+'
-                ],
-                'conversation_state': 'asking_budget'
+                'conversation_state': session.conversation_state
             }
         
-        # Update session
-        session.budget_min = budget_min
-        session.budget_max = budget_max
-        self._update_session_state(session.session_id, 'asking_occasion')
-        
-        message = f"Great! Budget set to ₹{int(budget_min):,} - ₹{int(budget_max):,}. What's the occasion?"
-        self._add_to_history(session.session_id, message, 'bot')
-        
-        return {
-            'message': message,
-            'options': OCCASIONS,
-            'conversation_state': 'asking_occasion'
-        }
-    
-    def _handle_metal(self, session, user_message):
-        """Handle metal type input"""
-        metal = self._parse_option(user_message, METAL_TYPES)
-        
-        if not metal:
-            return {
-                'message': "Please select a metal type:",
-                'options': METAL_TYPES,
-                'conversation_state': 'asking_metal'
-            }
-        
-        session.metal_type = metal
-        self._update_session_state(session.session_id, 'asking_budget')
-        
-        message = f"Perfect! {metal} is a great choice. What's your budget range?"
-        self._add_to_history(session.session_id, message, 'bot')
-        
-        return {
-            'message': message,
-            'options': [
-                'Under ₹10,000',
-                '₹10,000 - ₹25,000',
-                '₹25,000 - ₹50,000',
-                '₹50,000+'
-            ],
-            'conversation_state': 'asking_budget'
-        }
-    
-    def _handle_occasion(self, session, user_message):
-        """Handle occasion input"""
-        occasion = self._parse_option(user_message, OCCASIONS)
-        
-        if not occasion:
-            return {
-                'message': "Please select an occasion:",
-                'options': OCCASIONS,
-                'conversation_state': 'asking_occasion'
-            }
-        
-        session.occasion = occasion
-        self._update_session_state(session.session_id, 'asking_style')
-        
-        message = f"Lovely! {occasion} is special. What style do you prefer?"
-        self._add_to_history(session.session_id, message, 'bot')
-        
-        return {
-            'message': message,
-            'options': STYLES,
-            'conversation_state': 'asking_style'
-        }
-    
-    def _handle_style(self, session, user_message):
-        """Handle style input"""
-        style = self._parse_option(user_message, STYLES)
-        
-        if not style:
-            return {
-                'message': "Please select a style:",
-                'options': STYLES,
-                'conversation_state': 'asking_style'
-            }
-        
-        session.style = style
-        self._update_session_state(session.session_id, 'asking_category')
-        
-        message = f"Excellent! {style} style it is. What category are you looking for?"
-        self._add_to_history(session.session_id, message, 'bot')
-        
-        return {
-            'message': message,
-            'options': CATEGORIES,
-            'conversation_state': 'asking_category'
-        }
+        self.store.save(session)
+        return response
     
-    def _handle_category(self, session, user_message):
-        """Handle category input and trigger recommendations"""
-        category = self._parse_option(user_message, CATEGORIES)
-        
-        if not category:
-            return {
-                'message': "Please select a category:",
-                'options': CATEGORIES,
-                'conversation_state': 'asking_category'
-            }
-        
-        session.category = category
-        self._update_session_state(session.session_id, 'showing_recommendations')
+    def _handle_step(self, session, step, user_message):
+        """
+        Answer the current question, and any others the message answers too
+        Moves on to the first unanswered question (or the recommendations),
+        or asks again if nothing was understood or nothing would match
+        """
+        answers, unmatched = self._matching_answers(session, SLOT_EXTRACTOR.extract(session, step, user_message))
+        
+        if not answers:
+            response = step.retry_response.copy()
+            if unmatched:
+                summary = ', '.join(describe_answer(answered_step, value) for answered_step, value in unmatched)
+                response['message'] = f"Sorry, nothing matches {summary} with your other choices. {response['message']}"
+            return response
+        
+        for answered_step, value in answers:
+            self._fill_slots(session, answered_step, value)
+        
+        next_step = first_unanswered(session)
+        next_state = next_step.state if next_step is not None else FINAL_STATE
+        
+        if len(answers) == 1 and answers[0][0] is step and next_state == step.next_state:
+            # Just the question asked: the usual confirmation
+            value = answers[0][1]
+            message = step.confirm(*value) if len(step.slots) > 1 else step.confirm(value)
+            response = step.next_response.copy()
+        else:
+            summary = ', '.join(describe_answer(answered_step, value) for answered_step, value in answers)
+            if next_step is None:
+                message = f"Got it: {summary}. Let me find the best matches for you... 💎"
+                response = FINAL_RESPONSE.copy()
+            else:
+                message = f"Got it: {summary}. {next_step.question}"
+                response = next_step.retry_response.copy()
         
-        message = f"Perfect! Let me find the best {category.lower()} for you... 💎"
-        self._add_to_history(session.session_id, message, 'bot')
+        self._update_session_state(session, next_state)
+        self._add_to_history(session, message, 'bot')
         
-        return {
-            'message': message,
-            'options': [],
-            'conversation_state': 'showing_recommendations',
-            'ready_for_recommendations': True
-        }
+        response['message'] = message
+        return response
     
-    def _parse_budget(self, user_input):
+    def _matching_answers(self, session, answers):
         """
-        Parse budget from user input
-        Returns: (budget_min, budget_max) or (None, None)
+        Split answers into those that still leave products to recommend and
+        those that would leave none (typed answers are not limited to the
+        options offered). Answers are tried in flow order, each together with
+        the ones kept before it; all are kept if nothing matched already.
+
+        Returns:
+            (kept answers, unmatched answers)
         """
-        user_input = user_input.lower()
-        
-        # Check for predefined ranges
-        if 'under' in user_input or '10000' in user_input or '10k' in user_input:
-            if 'under' in user_input or ('10' in user_input and 'under' in user_input):
-                return BUDGET_RANGES['under_10k']
-        
-        if ('10' in user_input and '25' in user_input) or ('10k' in user_input and '25k' in user_input):
-            return BUDGET_RANGES['10k_25k']
-        
-        if ('25' in user_input and '50' in user_input) or ('25k' in user_input and '50k' in user_input):
-            return BUDGET_RANGES['25k_50k']
-        
-        if '50' in user_input or '50k' in user_input or 'above' in user_input or 'plus' in user_input:
-            return BUDGET_RANGES['50k_plus']
-        
-        # Try to extract numbers
-        numbers = re.findall(r'\d+', user_input)
-        if len(numbers) >= 2:
-            return (float(numbers[0]), float(numbers[1]))
-        elif len(numbers) == 1:
-            num = float(numbers[0])
-            if num < 10000:
-                return BUDGET_RANGES['under_10k']
-            elif num < 25000:
-                return BUDGET_RANGES['10k_25k']
-            elif num < 50000:
-                return BUDGET_RANGES['25k_50k']
+        if not answers:
+            return answers, []
+        
+        facets = get_facet_index(self.db)
+        preferences = self._preferences(session)
+        if not facets.count(preferences):
+            return answers, []
+        
+        kept, unmatched = [], []
+        for answered_step, value in answers:
+            values = value if len(answered_step.slots) > 1 else (value,)
+            candidate = {**preferences, **dict(zip(answered_step.slots, values))}
+            if facets.count(candidate):
+                kept.append((answered_step, value))
+                preferences = candidate
             else:
-                return BUDGET_RANGES['50k_plus']
-        
-        return (None, None)
+                unmatched.append((answered_step, value))
+        return kept, unmatched
+    
+    def _fill_slots(self, session, step, value):
+        """Store an answer in the step's session fields"""
+        if len(step.slots) == 1:
+            setattr(session, step.slots[0], value)
+        else:
+            for slot, slot_value in zip(step.slots, value):
+                setattr(session, slot, slot_value)
     
-    def _parse_option(self, user_input, valid_options):
+    def _offer_options(self, response, step, session):
         """
-        Parse user input against valid options
-        Returns: matched option or None
+        Narrow the options of the question being asked to those that still
+        match products (given the answers so far), with their product counts
+        Budget options are counted by their price range. No option is offered
+        when none matches (answers are checked the same way)
         """
-        user_input = user_input.lower().strip()
-        
-        for option in valid_options:
-            if option.lower() in user_input or user_input in option.lower():
-                return option
+        options = step.retry_response['options']
+        preferences = self._preferences(session)
+        
+        if step.slots[0] in FACET_FIELDS:
+            counts = get_facet_index(self.db).option_counts(step.slots[0], preferences, options)
+        elif step.slots == BUDGET_FIELDS:
+            ranges = {option: PRESET_BUDGETS[option.lower()] for option in options}
+            counts = get_facet_index(self.db).budget_counts(preferences, ranges)
+        else:
+            return response
         
-        return None
+        available = tuple(option for option in options if counts[option])
+        response['options'] = available
+        response['option_counts'] = {option: counts[option] for option in available}
+        return response
     
-    def _add_to_history(self, session_id, message, sender):
-        """Add message to conversation history"""
-        history = ConversationHistory(
-            session_id=session_id,
-            message=message,
-            sender=sender
-        )
-        self.db.add(history)
-        self.db.commit()
+    def _add_to_history(self, session, message, sender):
+        """Add message to conversation history (written with the session)"""
+        session.history.append((message, sender, datetime.utcnow()))
     
-    def _update_session_state(self, session_id, new_state):
+    def _update_session_state(self, session, new_state):
         """Update session conversation state"""
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
-        
-        if session:
-            session.conversation_state = new_state
-            session.updated_at = datetime.utcnow()
-            self.db.commit()
+        session.conversation_state = new_state
+        session.updated_at = datetime.utcnow()
     
     def get_session_preferences(self, session_id):
         """
         Get user preferences from session
         Returns: dict with all preferences
         """
-        session = self.db.query(UserSession).filter(
-            UserSession.session_id == session_id
-        ).first()
+        # Reuse the session handled by this service instead of re-querying it
+        session = self.current_session
+        if session is None or session.session_id != session_id:
+            session = self.store.get(session_id)
         
         if not session:
             return None
         
+        return self._preferences(session)
+    
+    def _preferences(self, session):
         return {
             'budget_min': session.budget_min,
             'budget_max': session.budget_max,
@@ -329,14 +246,89 @@ class ChatbotService:
             'category': session.category
         }
     
-    def get_conversation_history(self, session_id):
-        """Get full conversation history"""
-        history = self.db.query(ConversationHistory).filter(
+    def get_last_message_id(self, session_id):
+        """
+        ID of the latest message in a session (None if there are none)
+        Pending messages are written first, so they are counted
+        """
+        self.store.flush(session_id)
+        return self.db.query(func.max(ConversationHistory.id)).filter(
             ConversationHistory.session_id == session_id
-        ).order_by(ConversationHistory.timestamp).all()
+        ).scalar()
+    
+    def get_history_version(self, session_id):
+        """
+        Number of messages in a session, written or still pending in the
+        session store: it changes whenever the history does (messages are
+        never removed) and not when pending ones are written, so cached
+        responses are versioned without writing anything
+        """
+        written = self.db.query(func.count(ConversationHistory.id)).filter(
+            ConversationHistory.session_id == session_id
+        ).scalar()
+        session = self.store.get(session_id)
+        return written + (len(session.history) if session is not None else 0)
+    
+    def get_conversation_history(self, session_id, after_id=None, limit=HISTORY_PAGE_SIZE):
+        """
+        Get one page of conversation history, oldest first
+        
+        Keyset pagination on the message ID (served by the (session_id, id)
+        index), so every page costs the same however long the session is.
+        
+        Args:
+            session_id: str
+            after_id: return messages after this ID (None for the first page)
+            limit: page size
+        
+        Returns:
+            dict with history and next_after_id (None on the last page)
+        """
+        query = self.db.query(ConversationHistory).filter(
+            ConversationHistory.session_id == session_id
+        )
+        if after_id is not None:
+            query = query.filter(ConversationHistory.id > after_id)
+        
+        # One extra row tells whether another page follows
+        # Pending messages get their IDs when written
+        self.store.flush(session_id)
+        rows = query.order_by(ConversationHistory.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        history = [h.to_dict() for h in rows[:limit]]
         
-        return [h.to_dict() for h in history]
+        return {
+            'history': history,
+            'next_after_id': history[-1]['id'] if has_more else None
+        }
+    
+    def iter_conversation_history(self, session_id, fetch_size=HISTORY_EXPORT_FETCH_SIZE):
+        """
+        Stream a session's full history, oldest first
+        Rows are fetched in batches, so memory stays flat for any history size
+        """
+        self.store.flush(session_id)
+        history = ConversationHistory.__table__
+        query = select(
+            history.c.id,
+            history.c.message,
+            history.c.sender,
+            history.c.timestamp
+        ).where(history.c.session_id == session_id).order_by(history.c.id)
+        
+        result = self.db.execute(query.execution_options(yield_per=fetch_size))
+        try:
+            for row in result:
+                yield {
+                    'id': row.id,
+                    'message': row.message,
+                    'sender': row.sender,
+                    'timestamp': row.timestamp.isoformat()
+                }
+        finally:
+            result.close()
     
     def close(self):
-        """Close database session"""
-        self.db.close()
+        """Close database session (only if this service opened it)"""
+        if self.owns_db:
+            self.db.close()
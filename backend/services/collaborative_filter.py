@@ -0,0 +1,246 @@
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Interaction
+from config.settings import (
+    ACTION_WEIGHTS,
+    CF_NEIGHBOURS,
+    CF_BLOCK_SIZE,
+    CF_FETCH_SIZE,
+    CF_MIN_INTERACTIONS
+)
+
+
+def read_interactions(db, chunk_size=CF_FETCH_SIZE):
+    """
+    Stream (session_id, product_id, action_type) rows from the interactions table
+
+    Yields:
+        lists of row tuples, at most chunk_size long
+    """
+    query = select(
+        Interaction.session_id,
+        Interaction.product_id,
+        Interaction.action_type
+    ).where(Interaction.product_id.isnot(None))
+
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+def build_interaction_matrix(chunks, compact_every=CF_FETCH_SIZE * 20):
+    """
+    Build a weighted session x product CSR matrix from interaction chunks
+
+    Each interaction contributes ACTION_WEIGHTS[action_type]; repeated
+    interactions on the same (session, product) pair are summed and then
+    dampened with log1p. Pending entries are compacted into the CSR matrix
+    every compact_every rows, so memory grows with the number of distinct
+    pairs rather than raw events.
+
+    Returns:
+        (matrix, product_ids) or (None, None) when there are no interactions
+    """
+    session_index = {}
+    product_index = {}
+    matrix = None
+    pending = []
+    pending_count = 0
+
+    def compact(matrix, pending):
+        rows = np.concatenate([p[0] for p in pending])
+        cols = np.concatenate([p[1] for p in pending])
+        data = np.concatenate([p[2] for p in pending])
+        shape = (len(session_index), len(product_index))
+        block = sparse.csr_matrix((data, (rows, cols)), shape=shape, dtype=np.float32)
+        if matrix is None:
+            return block
+        matrix.resize(shape)
+        return matrix + block
+
+    for chunk in chunks:
+        rows = np.fromiter(
+            (session_index.setdefault(session_id, len(session_index)) for session_id, _, _ in chunk),
+            dtype=np.int32, count=len(chunk)
+        )
+        cols = np.fromiter(
+            (product_index.setdefault(product_id, len(product_index)) for _, product_id, _ in chunk),
+            dtype=np.int32, count=len(chunk)
+        )
+        data = np.fromiter(
+            (ACTION_WEIGHTS.get(action_type, 0.0) for _, _, action_type in chunk),
+            dtype=np.float32, count=len(chunk)
+        )
+        pending.append((rows, cols, data))
+        pending_count += len(chunk)
+
+        if pending_count >= compact_every:
+            matrix = compact(matrix, pending)
+            pending, pending_count = [], 0
+
+    if pending:
+        matrix = compact(matrix, pending)
+
+    if matrix is None:
+        return None, None
+
+    matrix.eliminate_zeros()
+    matrix.data = np.log1p(matrix.data)
+
+    product_ids = np.empty(len(product_index), dtype=np.int64)
+    product_ids[list(product_index.values())] = list(product_index.keys())
+    return matrix, product_ids
+
+
+def top_k_neighbours(matrix, k=CF_NEIGHBOURS, block_size=CF_BLOCK_SIZE):
+    """
+    Item-item cosine similarity, keeping only the top k neighbours per item
+
+    Similarities are computed block by block as sparse products of the
+    column-normalized matrix, so peak memory is bounded by block_size rows of
+    the (sparse) similarity matrix instead of a dense items x items array.
+
+    Returns:
+        (neighbour_idx, neighbour_sim): int32 / float32 arrays of shape
+        (n_items, k); missing neighbours are padded with -1 / 0
+    """
+    n_items = matrix.shape[1]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = sparse.csr_matrix(matrix.multiply(1.0 / norms).astype(np.float32))
+    items = normalized.T.tocsr()
+
+    neighbour_idx = np.full((n_items, k), -1, dtype=np.int32)
+    neighbour_sim = np.zeros((n_items, k), dtype=np.float32)
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        similarities = (items[start:stop] @ normalized).tocsr()
+
+        for offset in range(stop - start):
+            row_start, row_stop = similarities.indptr[offset], similarities.indptr[offset + 1]
+            data = similarities.data[row_start:row_stop]
+            indices = similarities.indices[row_start:row_stop]
+
+            # Drop self-similarity
+            others = (indices != start + offset) & (data > 0)
+            data, indices = data[others], indices[others]
+            if len(data) == 0:
+                continue
+            if len(data) > k:
+                best = np.argpartition(-data, k - 1)[:k]
+                data, indices = data[best], indices[best]
+            order = np.argsort(-data, kind='stable')
+            neighbour_idx[start + offset, :len(order)] = indices[order]
+            neighbour_sim[start + offset, :len(order)] = data[order]
+
+    return neighbour_idx, neighbour_sim
+
+
+class ItemNeighbourModel:
+    """
+    Item-item collaborative filtering model
+    Stores the top-k neighbours of every product seen in interactions, with
+    rows ordered by product ID. Arrays may be memory-mapped (see model_store).
+    """
+
+    def __init__(self, product_ids, neighbour_idx, neighbour_sim, popularity, version=None):
+        self.product_ids = product_ids
+        self.neighbour_idx = neighbour_idx
+        self.neighbour_sim = neighbour_sim
+        self.popularity = popularity
+        self.version = version
+
+    def positions(self, product_ids):
+        """Row positions of the given product IDs (unknown IDs are skipped)"""
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        positions = np.searchsorted(self.product_ids, product_ids)
+        positions = np.minimum(positions, len(self.product_ids) - 1)
+        return positions[self.product_ids[positions] == product_ids]
+
+    def neighbours(self, product_id, limit):
+        """
+        Stored neighbours of one product, best first: O(k) after the lookup
+
+        Returns:
+            list of (product_id, similarity), or None for an unknown product
+        """
+        positions = self.positions([product_id])
+        if not len(positions):
+            return None
+
+        row = int(positions[0])
+        neighbours = np.asarray(self.neighbour_idx[row][:limit])
+        similarities = np.asarray(self.neighbour_sim[row][:limit])
+        valid = neighbours >= 0
+        return list(zip(
+            self.product_ids[neighbours[valid]].tolist(),
+            similarities[valid].tolist()
+        ))
+
+    def similar_products(self, seed_product_ids, limit):
+        """
+        Score products by their summed similarity to the seed products
+        Ties are broken by interaction popularity
+
+        Args:
+            seed_product_ids: product IDs the user already likes / was shown
+            limit: max number of products to return
+
+        Returns:
+            list of product IDs, best first, excluding the seeds
+        """
+        if not len(seed_product_ids) or not len(self.product_ids):
+            return []
+
+        seeds = self.positions(seed_product_ids)
+        if not len(seeds):
+            return []
+
+        neighbours = np.asarray(self.neighbour_idx[seeds]).ravel()
+        weights = np.asarray(self.neighbour_sim[seeds], dtype=np.float64).ravel()
+        valid = neighbours >= 0
+
+        scores = np.bincount(neighbours[valid], weights=weights[valid], minlength=len(self.product_ids))
+        scores[seeds] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((-self.popularity[candidates], -scores[candidates]))]
+        return self.product_ids[candidates].tolist()
+
+
+def train_item_model(db, version=None):
+    """
+    Build an ItemNeighbourModel from the interactions table
+    Returns None if there are too few interactions
+    """
+    matrix, product_ids = build_interaction_matrix(read_interactions(db))
+    if matrix is None or matrix.nnz < CF_MIN_INTERACTIONS:
+        return None
+
+    neighbour_idx, neighbour_sim = top_k_neighbours(matrix)
+    popularity = np.asarray(matrix.sum(axis=0), dtype=np.float32).ravel()
+
+    # Order rows by product ID so lookups are a binary search on a shared array
+    order = np.argsort(product_ids, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+
+    neighbour_idx = neighbour_idx[order]
+    neighbour_idx = np.where(neighbour_idx >= 0, rank[neighbour_idx], -1).astype(np.int32)
+
+    return ItemNeighbourModel(
+        product_ids[order],
+        neighbour_idx,
+        neighbour_sim[order],
+        popularity[order],
+        version
+    )
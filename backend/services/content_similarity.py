@@ -0,0 +1,220 @@
+import functools
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Product
+from backend.services.collaborative_filter import ItemNeighbourModel
+from backend.services.model_store import ModelStore
+from config.settings import (
+    CONTENT_MODEL_ARTIFACTS_DIR,
+    CONTENT_NEIGHBOURS,
+    CONTENT_HASH_FEATURES,
+    CONTENT_ATTRIBUTE_WEIGHT,
+    CONTENT_BLOCK_SIZE,
+    CONTENT_FETCH_SIZE
+)
+
+ATTRIBUTE_FIELDS = ('category', 'metal_type', 'occasion', 'style')
+
+
+@functools.lru_cache(maxsize=None)
+def _vectorizers():
+    """
+    Text and attribute vectorizers
+    Stateless, so catalog chunks are vectorized independently as they stream in.
+    scikit-learn is only imported for training, keeping it out of worker start-up.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    text = HashingVectorizer(
+        n_features=CONTENT_HASH_FEATURES,
+        stop_words='english',
+        alternate_sign=False,
+        norm=None
+    )
+    attributes = HashingVectorizer(
+        n_features=CONTENT_HASH_FEATURES,
+        analyzer=lambda tokens: tokens,
+        alternate_sign=False,
+        norm=None
+    )
+    return text, attributes
+
+
+def read_product_documents(db, chunk_size=CONTENT_FETCH_SIZE):
+    """
+    Stream product text and attributes in ID order
+
+    Yields:
+        lists of (id, popularity, text, attribute tokens), at most chunk_size long
+    """
+    query = select(
+        Product.id,
+        Product.popularity,
+        Product.name,
+        Product.description,
+        *(getattr(Product, field) for field in ATTRIBUTE_FIELDS)
+    ).order_by(Product.id)
+
+    result = db.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [
+            (
+                row.id,
+                row.popularity or 0,
+                f"{row.name or ''} {row.description or ''}",
+                [f'{field}={getattr(row, field).lower()}' for field in ATTRIBUTE_FIELDS if getattr(row, field)]
+            )
+            for row in partition
+        ]
+
+
+def build_feature_matrix(chunks, attribute_weight=CONTENT_ATTRIBUTE_WEIGHT):
+    """
+    Build the products x features matrix from document chunks
+
+    Text (name + description) is hashed into term counts and TF-IDF weighted;
+    categorical attributes are hashed as field=value tokens. Both parts are
+    L2-normalized and mixed by attribute_weight, so the cosine of two rows is
+    a weighted blend of text and attribute similarity.
+
+    Returns:
+        (features, product_ids, popularity), or (None, None, None) without products
+    """
+    from sklearn.preprocessing import normalize
+
+    text_vectorizer, attribute_vectorizer = _vectorizers()
+    text_parts, attribute_parts, ids, popularity = [], [], [], []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        chunk_ids, chunk_popularity, texts, attributes = zip(*chunk)
+        ids.extend(chunk_ids)
+        popularity.extend(chunk_popularity)
+        text_parts.append(text_vectorizer.transform(texts).astype(np.float32))
+        attribute_parts.append(attribute_vectorizer.transform(attributes).astype(np.float32))
+
+    if not ids:
+        return None, None, None
+
+    text = sparse.vstack(text_parts, format='csr')
+    attributes = sparse.vstack(attribute_parts, format='csr')
+
+    # Smoothed IDF from document frequencies of the hashed terms
+    document_frequency = np.bincount(text.indices, minlength=text.shape[1])
+    idf = np.log((1 + text.shape[0]) / (1 + document_frequency)) + 1
+    text = text @ sparse.diags(idf.astype(np.float32))
+    text.data = np.log1p(text.data)
+
+    features = sparse.hstack([
+        normalize(text) * np.sqrt(1 - attribute_weight),
+        normalize(attributes) * np.sqrt(attribute_weight)
+    ], format='csr', dtype=np.float32)
+
+    return (
+        normalize(features),
+        np.asarray(ids, dtype=np.int64),
+        np.asarray(popularity, dtype=np.float32)
+    )
+
+
+def top_k_similar(features, k=CONTENT_NEIGHBOURS, block_size=CONTENT_BLOCK_SIZE):
+    """
+    Top k most similar products per product (cosine of L2-normalized rows)
+
+    Shared attributes make content similarity dense, so each block of rows is
+    scored against the whole catalog as a dense block_size x n_products array
+    and reduced to its top k before the next block: peak memory is bounded by
+    the block size.
+
+    Returns:
+        (neighbour_idx, neighbour_sim): int32 / float32 arrays of shape
+        (n_products, k); missing neighbours are padded with -1 / 0
+    """
+    n_products = features.shape[0]
+    k = min(k, max(n_products - 1, 0))
+    neighbour_idx = np.full((n_products, k), -1, dtype=np.int32)
+    neighbour_sim = np.zeros((n_products, k), dtype=np.float32)
+    if k == 0:
+        return neighbour_idx, neighbour_sim
+
+    transposed = features.T.tocsc()
+    for start in range(0, n_products, block_size):
+        stop = min(start + block_size, n_products)
+        rows = np.arange(stop - start)
+        similarities = (features[start:stop] @ transposed).toarray()
+        similarities[rows, rows + start] = -1.0  # Not your own neighbour
+
+        best = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        best_sim = np.take_along_axis(similarities, best, axis=1)
+        order = np.argsort(-best_sim, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_sim = np.take_along_axis(best_sim, order, axis=1)
+
+        similar = best_sim > 0
+        neighbour_idx[start:stop] = np.where(similar, best, -1)
+        neighbour_sim[start:stop] = np.where(similar, best_sim, 0)
+
+    return neighbour_idx, neighbour_sim
+
+
+def train_content_model(db, version=None):
+    """
+    Build the content-based neighbour model from the products table
+    Returns None if there are no products
+    """
+    features, product_ids, popularity = build_feature_matrix(read_product_documents(db))
+    if features is None:
+        return None
+
+    # Rows are already in product ID order (see read_product_documents)
+    neighbour_idx, neighbour_sim = top_k_similar(features)
+    return ItemNeighbourModel(product_ids, neighbour_idx, neighbour_sim, popularity, version)
+
+
+# Process-wide store for the published content model
+_store = ModelStore(CONTENT_MODEL_ARTIFACTS_DIR)
+
+
+def get_content_model():
+    """Get the active content-based model (or None)"""
+    return _store.get_item_model()
+
+
+def similar_products(db, product_id, limit=CONTENT_NEIGHBOURS):
+    """
+    Products most similar to a product, from the precomputed neighbour table
+    Reads only the neighbours' rows (Core select, no ORM objects)
+
+    Returns:
+        list of product dicts with a similarity score, or None if the product
+        is not in the model (or no model has been published)
+    """
+    model = get_content_model()
+    if model is None:
+        return None
+
+    neighbours = model.neighbours(product_id, limit)
+    if neighbours is None:
+        return None
+    if not neighbours:
+        return []
+
+    products = Product.__table__
+    columns = [
+        products.c[name] for name in (
+            'id', 'sku', 'name', 'category', 'metal_type', 'price', 'occasion',
+            'style', 'image_url', 'description', 'popularity'
+        )
+    ]
+    similarity = dict(neighbours)
+    rows = db.execute(select(*columns).where(products.c.id.in_(list(similarity)))).mappings()
+    by_id = {row['id']: {**row, 'similarity': round(similarity[row['id']], 4)} for row in rows}
+
+    # Neighbour order, skipping products deleted since training
+    return [by_id[neighbour_id] for neighbour_id, _ in neighbours if neighbour_id in by_id]
@@ -0,0 +1,118 @@
+from collections import namedtuple
+from types import MappingProxyType
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.services.budget_parser import parse_budget
+from backend.services.option_matcher import OptionMatcher
+from config.settings import BUDGET_OPTIONS, METAL_TYPES, OCCASIONS, STYLES, CATEGORIES
+
+# Conversation is over, recommendations are shown
+FINAL_STATE = 'showing_recommendations'
+
+
+# One question of the conversation
+#   slots: session fields filled by the parsed value (a tuple of values for several)
+#   parse: user message -> value, or None if it wasn't understood
+#   confirm: values -> bot reply once answered
+#   question: the question on its own, for when earlier steps are skipped
+#   retry_response / next_response: prebuilt replies, shared by every turn
+ConversationStep = namedtuple('ConversationStep', [
+    'state',
+    'slots',
+    'parse',
+    'confirm',
+    'question',
+    'next_state',
+    'retry_response',
+    'next_response'
+])
+
+# (state, slots, parse, options, retry prompt, confirmation, next state)
+STEPS = (
+    (
+        'asking_metal', ('metal_type',), OptionMatcher(METAL_TYPES), METAL_TYPES,
+        "Please select a metal type:",
+        lambda metal: f"Perfect! {metal} is a great choice. What's your budget range?",
+        'asking_budget'
+    ),
+    (
+        'asking_budget', ('budget_min', 'budget_max'), parse_budget, BUDGET_OPTIONS,
+        "I didn't quite catch that. Please select your budget range:",
+        lambda budget_min, budget_max: f"Great! Budget set to ₹{int(budget_min):,} - ₹{int(budget_max):,}. What's the occasion?",
+        'asking_occasion'
+    ),
+    (
+        'asking_occasion', ('occasion',), OptionMatcher(OCCASIONS), OCCASIONS,
+        "Please select an occasion:",
+        lambda occasion: f"Lovely! {occasion} is special. What style do you prefer?",
+        'asking_style'
+    ),
+    (
+        'asking_style', ('style',), OptionMatcher(STYLES), STYLES,
+        "Please select a style:",
+        lambda style: f"Excellent! {style} style it is. What category are you looking for?",
+        'asking_category'
+    ),
+    (
+        'asking_category', ('category',), OptionMatcher(CATEGORIES), CATEGORIES,
+        "Please select a category:",
+        lambda category: f"Perfect! Let me find the best {category.lower()} for you... 💎",
+        FINAL_STATE
+    ),
+)
+
+# Asked after several answers arrive in one message
+QUESTIONS = {
+    'asking_metal': "What metal type do you prefer?",
+    'asking_budget': "What's your budget range?",
+    'asking_occasion': "What's the occasion?",
+    'asking_style': "What style do you prefer?",
+    'asking_category': "What category are you looking for?"
+}
+
+
+def compile_flow(steps):
+    """
+    Build the state -> step table, with every reply payload prebuilt
+    Options become tuples and replies read-only mappings, so turns share them
+    """
+    options_by_state = {state: tuple(options) for state, _, _, options, _, _, _ in steps}
+    options_by_state[FINAL_STATE] = ()
+
+    flow = {}
+    for state, slots, parse, options, prompt, confirmation, next_state in steps:
+        next_response = {
+            'options': options_by_state[next_state],
+            'conversation_state': next_state
+        }
+        if next_state == FINAL_STATE:
+            next_response['ready_for_recommendations'] = True
+
+        flow[state] = ConversationStep(
+            state=state,
+            slots=slots,
+            parse=parse,
+            confirm=confirmation,
+            question=QUESTIONS[state],
+            next_state=next_state,
+            retry_response=MappingProxyType({
+                'message': prompt,
+                'options': options_by_state[state],
+                'conversation_state': state
+            }),
+            next_response=MappingProxyType(next_response)
+        )
+    return flow
+
+
+CONVERSATION_FLOW = compile_flow(STEPS)
+# Steps in the order they are asked
+FLOW_STEPS = tuple(CONVERSATION_FLOW[state] for state, *_ in STEPS)
+FIRST_STEP = FLOW_STEPS[0]
+# Reply once every question is answered
+FINAL_RESPONSE = FLOW_STEPS[-1].next_response
+# New sessions answer the first question
+CONVERSATION_FLOW['started'] = FIRST_STEP
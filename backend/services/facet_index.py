@@ -0,0 +1,249 @@
+import threading
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Product
+from backend.services.product_index import CATEGORICAL_FIELDS, get_product_index, on_rebuild
+
+# Fields offered as options during the conversation
+FACET_FIELDS = CATEGORICAL_FIELDS
+# The budget question fills both bounds with one option (a price range)
+BUDGET_FIELDS = ('budget_min', 'budget_max')
+
+
+class FacetIndex:
+    """
+    One bitset (NumPy bool array) per facet value over the catalog rows
+
+    Intersecting the bitsets of the answers so far (and the budget range)
+    gives the matching products; ANDing that with each option's bitset
+    counts the products every option would leave. Rows can be added or
+    changed in place, so ORM writes are applied without a rebuild.
+    """
+
+    def __init__(self, ids, prices, bitmaps, generation):
+        """
+        Args:
+            ids: product IDs, one per row
+            prices: float prices (NaN when unknown)
+            bitmaps: {field: {value: bool array over the rows}}
+            generation: ProductIndex generation the rows were taken from
+        """
+        self.generation = generation
+        self.size = len(ids)
+        self.capacity = max(self.size, 64)
+
+        self.ids = self._column(ids, np.int64, 0)
+        self.prices = self._column(prices, np.float64, np.nan)
+        self.alive = self._column(np.ones(self.size, dtype=bool), bool, False)
+        self.bitmaps = {
+            field: {value: self._column(bitmap, bool, False) for value, bitmap in bitmaps.get(field, {}).items()}
+            for field in FACET_FIELDS
+        }
+        self.positions = {int(product_id): row for row, product_id in enumerate(ids)}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_product_index(cls, index):
+        """Build the bitsets from the integer-coded columns of a ProductIndex"""
+        bitmaps = {
+            field: {
+                value: index.codes[field] == code
+                for value, code in index.vocab[field].items()
+                if value != ''
+            }
+            for field in FACET_FIELDS
+        }
+        return cls(index.ids, index.prices, bitmaps, index.generation)
+
+    def _column(self, values, dtype, fill):
+        column = np.full(self.capacity, fill, dtype=dtype)
+        column[:len(values)] = values
+        return column
+
+    def _grow(self):
+        """Double the row capacity"""
+        extra = self.capacity
+        self.capacity += extra
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype=np.int64)])
+        self.prices = np.concatenate([self.prices, np.full(extra, np.nan)])
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        for values in self.bitmaps.values():
+            for value, bitmap in values.items():
+                values[value] = np.concatenate([bitmap, np.zeros(extra, dtype=bool)])
+
+    def upsert(self, product_id, price, values):
+        """
+        Add a product or update its row
+
+        Args:
+            product_id: int
+            price: float or None
+            values: {field: value} for the facet fields
+        """
+        with self.lock:
+            row = self.positions.get(product_id)
+            if row is None:
+                if self.size == self.capacity:
+                    self._grow()
+                row = self.size
+                self.size += 1
+                self.positions[product_id] = row
+                self.ids[row] = product_id
+
+            self.prices[row] = np.nan if price is None else price
+            self.alive[row] = True
+            for field in FACET_FIELDS:
+                field_bitmaps = self.bitmaps[field]
+                for bitmap in field_bitmaps.values():
+                    bitmap[row] = False
+                value = values.get(field)
+                if value:
+                    bitmap = field_bitmaps.get(value)
+                    if bitmap is None:
+                        bitmap = field_bitmaps[value] = np.zeros(self.capacity, dtype=bool)
+                    bitmap[row] = True
+
+    def remove(self, product_id):
+        """Drop a product (its row stays, marked dead)"""
+        with self.lock:
+            row = self.positions.pop(product_id, None)
+            if row is not None:
+                self.alive[row] = False
+
+    def _mask(self, preferences, skip_field=None):
+        """Rows matching the budget and every answered facet (but skip_field)"""
+        rows = slice(0, self.size)
+        mask = self.alive[rows].copy()
+
+        if skip_field not in BUDGET_FIELDS:
+            mask &= self._price_mask(preferences.get('budget_min'), preferences.get('budget_max'))
+
+        for field in FACET_FIELDS:
+            value = preferences.get(field)
+            if not value or field == skip_field:
+                continue
+            bitmap = self.bitmaps[field].get(value)
+            if bitmap is None:
+                mask[:] = False
+                break
+            mask &= bitmap[rows]
+        return mask
+
+    def _price_mask(self, budget_min, budget_max):
+        """Rows priced within [budget_min, budget_max] (either bound may be None)"""
+        prices = self.prices[:self.size]
+        mask = np.ones(self.size, dtype=bool)
+        # NaN prices fail both comparisons: a budget excludes unpriced products
+        if budget_min is not None:
+            mask &= prices >= budget_min
+        if budget_max is not None:
+            mask &= prices <= budget_max
+        return mask
+
+    def count(self, preferences):
+        """Number of products matching the preferences"""
+        with self.lock:
+            return int(np.count_nonzero(self._mask(preferences)))
+
+    def option_counts(self, field, preferences, options):
+        """
+        Products each option of a facet would match, given the other answers
+
+        Returns:
+            {option: count} for every option
+        """
+        with self.lock:
+            mask = self._mask(preferences, skip_field=field)
+            counts = {}
+            for option in options:
+                bitmap = self.bitmaps[field].get(option)
+                counts[option] = 0 if bitmap is None else int(np.count_nonzero(mask & bitmap[:self.size]))
+            return counts
+
+    def budget_counts(self, preferences, ranges):
+        """
+        Products each budget range would match, given the other answers
+
+        Args:
+            ranges: {option: (budget_min, budget_max)}
+
+        Returns:
+            {option: count} for every option
+        """
+        with self.lock:
+            mask = self._mask(preferences, skip_field='budget_min')
+            return {
+                option: int(np.count_nonzero(mask & self._price_mask(budget_min, budget_max)))
+                for option, (budget_min, budget_max) in ranges.items()
+            }
+
+
+# Process-wide facet index, derived from the current product index
+_facets = None
+_facets_lock = threading.Lock()
+
+
+def get_facet_index(db):
+    """
+    Get the process-wide facet index
+    Rebuilt with the product index (see _rebuild_facets); ORM writes in
+    between are applied in place
+    """
+    global _facets
+
+    index = get_product_index(db)
+    facets = _facets
+    # Facets built for a snapshot that is about to be swapped in are newer
+    if facets is not None and facets.generation >= index.generation:
+        return facets
+
+    with _facets_lock:
+        if _facets is None or _facets.generation < index.generation:
+            _facets = FacetIndex.from_product_index(index)
+        return _facets
+
+
+@on_rebuild
+def _rebuild_facets(index):
+    """Build the facets of a new product snapshot in the rebuild thread"""
+    global _facets
+    facets = FacetIndex.from_product_index(index)
+    with _facets_lock:
+        _facets = facets
+
+
+# Apply ORM writes to products as they are committed
+@event.listens_for(Session, 'after_flush')
+def _collect_product_writes(session, flush_context):
+    updates = [
+        (obj.id, obj.price, {field: getattr(obj, field) for field in FACET_FIELDS})
+        for obj in (*session.new, *session.dirty)
+        if isinstance(obj, Product)
+    ]
+    updates.extend((obj.id, None, None) for obj in session.deleted if isinstance(obj, Product))
+    if updates:
+        session.info.setdefault('facet_updates', []).extend(updates)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_product_writes(session):
+    updates = session.info.pop('facet_updates', None)
+    facets = _facets
+    if not updates or facets is None:
+        return
+    for product_id, price, values in updates:
+        if values is None:
+            facets.remove(product_id)
+        else:
+            facets.upsert(product_id, price, values)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_product_writes(session):
+    session.info.pop('facet_updates', None)
@@ -0,0 +1,376 @@
+import atexit
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, select
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Interaction, engine
+from backend.services.popularity_counter import get_popularity_counter
+from config.settings import (
+    INTERACTION_QUEUE_SIZE,
+    INTERACTION_BATCH_SIZE,
+    INTERACTION_FLUSH_SECONDS,
+    INTERACTION_ENQUEUE_TIMEOUT,
+    INTERACTION_LOG_ENABLED,
+    INTERACTION_LOG_DIR,
+    INTERACTION_LOG_FSYNC,
+    INTERACTION_LOG_SEGMENT_EVENTS
+)
+
+
+class IngestQueueFull(Exception):
+    """Raised when the ingestion queue stays full (backpressure)"""
+
+
+class InteractionLog:
+    """
+    Append-only on-disk log of accepted interactions (NDJSON segments)
+
+    Each worker claims its own log slot with an exclusive lock and appends
+    events to the slot's current segment, moving to a new segment every
+    segment_size events. A segment is deleted once it has been closed and
+    every event in it is in the database, so the log stays small under
+    steady traffic. Segments left behind by a crashed worker are replayed
+    by the next worker that claims the slot (at-least-once delivery; events
+    carry an ID, so those already written are skipped).
+    """
+
+    def __init__(self, directory, fsync=False, segment_size=INTERACTION_LOG_SEGMENT_EVENTS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fsync = fsync
+        self.segment_size = segment_size
+        self.slot, self.lock_file = self._claim_slot(directory)
+        self.path = os.path.join(directory, f'interactions.{self.slot}.*.log')
+
+        # Segment number -> events appended but not yet written
+        self.unwritten = Counter()
+        self.segment = None
+        self.file = None
+        self.appended = 0
+
+    def _claim_slot(self, directory):
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): single-process development setup
+            return 0, None
+
+        slot = 0
+        while True:
+            f = open(os.path.join(directory, f'interactions.{slot}.lock'), 'a+')
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot, f
+            except OSError:
+                f.close()
+                slot += 1
+
+    def _segments(self):
+        """Segment numbers of this slot found on disk, oldest first"""
+        prefix = f'interactions.{self.slot}.'
+        segments = []
+        for name in os.listdir(self.directory):
+            number = name[len(prefix):-len('.log')]
+            if name.startswith(prefix) and name.endswith('.log') and number.isdigit():
+                segments.append(int(number))
+        return sorted(segments)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f'interactions.{self.slot}.{segment}.log')
+
+    def read_pending(self):
+        """Events left in the log by a previous owner of this slot"""
+        events = {}
+        for segment in self._segments():
+            with open(self._segment_path(segment), encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn final write
+                    if 'rejected' in record:
+                        events.pop(record['rejected'], None)
+                        continue
+                    events[record['event_id']] = (
+                        record['event_id'],
+                        record['session_id'],
+                        record['product_id'],
+                        record['action_type'],
+                        datetime.fromisoformat(record['timestamp'])
+                    )
+        return list(events.values())
+
+    def discard_pending(self):
+        """Delete the segments read by read_pending (once they are written)"""
+        for segment in self._segments():
+            os.remove(self._segment_path(segment))
+        self.segment = None
+
+    def append(self, event):
+        """
+        Log an event
+        Returns the segment it went to (report it to written() once stored)
+        """
+        if self.segment is None or self.appended >= self.segment_size:
+            self._next_segment()
+        event_id, session_id, product_id, action_type, timestamp = event
+        self._write_line({
+            'event_id': event_id,
+            'session_id': session_id,
+            'product_id': product_id,
+            'action_type': action_type,
+            'timestamp': timestamp.isoformat()
+        })
+        self.appended += 1
+        self.unwritten[self.segment] += 1
+        return self.segment
+
+    def reject(self, segment, event_id):
+        """Cancel a logged event that was not accepted after all"""
+        self._write_line({'rejected': event_id})
+        self.written({segment: 1})
+
+    def written(self, counts):
+        """
+        Record events stored in the database ({segment: count}) and delete
+        the closed segments that have nothing left to write
+        """
+        for segment, count in counts.items():
+            self.unwritten[segment] -= count
+            if self.unwritten[segment] <= 0 and segment != self.segment:
+                del self.unwritten[segment]
+                os.remove(self._segment_path(segment))
+
+    def _next_segment(self):
+        previous = self.segment
+        if self.file is not None:
+            self.file.close()
+        self.segment = (max(self._segments(), default=-1) if previous is None else previous) + 1
+        self.file = open(self._segment_path(self.segment), 'a', encoding='utf-8')
+        self.appended = 0
+        # The closed segment may already be fully written
+        if previous is not None and self.unwritten[previous] <= 0:
+            del self.unwritten[previous]
+            os.remove(self._segment_path(previous))
+
+    def _write_line(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+
+class InteractionIngestor:
+    """
+    Buffered interaction ingestion
+
+    submit() only enqueues the event; a background writer thread flushes
+    batches (every batch_size events or flush_interval seconds) as one bulk
+    INSERT and hands the aggregated per-product deltas to the popularity
+    counter.
+
+    Logged events survive a crash, but popularity deltas still held in the
+    counter (up to POPULARITY_MERGE_SECONDS) do not: the interactions are
+    stored, products.popularity just lags behind them.
+    """
+
+    def __init__(self, max_queue=INTERACTION_QUEUE_SIZE, batch_size=INTERACTION_BATCH_SIZE,
+                 flush_interval=INTERACTION_FLUSH_SECONDS, enqueue_timeout=INTERACTION_ENQUEUE_TIMEOUT,
+                 log_dir=INTERACTION_LOG_DIR if INTERACTION_LOG_ENABLED else None,
+                 log_fsync=INTERACTION_LOG_FSYNC):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.log = InteractionLog(log_dir, log_fsync) if log_dir else None
+        self.popularity = get_popularity_counter()
+
+        # Counters, and the log bookkeeping, are shared with the writer thread
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.written = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.batches = 0
+
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Replay any logged events, then start the writer thread"""
+        if self.log:
+            pending = self.log.read_pending()
+            if pending:
+                pending = self._not_yet_written(pending)
+                if pending:
+                    self._write(pending)
+                self.replayed = len(pending)
+                print(f"♻️  Replayed {len(pending)} logged interactions from {self.log.path}")
+            self.log.discard_pending()
+
+        self.thread = threading.Thread(target=self._run, name='interaction-writer', daemon=True)
+        self.thread.start()
+
+    def _not_yet_written(self, events):
+        """Drop the events a crashed worker already wrote before dying"""
+        stored = set()
+        event_ids = [event[0] for event in events]
+        with engine.connect() as conn:
+            for i in range(0, len(event_ids), 500):
+                stored.update(conn.execute(
+                    select(Interaction.event_id).where(Interaction.event_id.in_(event_ids[i:i + 500]))
+                ).scalars())
+        return [event for event in events if event[0] not in stored]
+
+    def submit(self, session_id, product_id, action_type):
+        """
+        Accept an interaction for asynchronous writing
+
+        Raises:
+            IngestQueueFull: the queue stayed full for enqueue_timeout seconds
+        """
+        event = (uuid.uuid4().hex, session_id, int(product_id), action_type, datetime.utcnow())
+
+        # Logged before it is queued, so its segment is never deleted while
+        # this event is still unwritten
+        with self.lock:
+            segment = self.log.append(event) if self.log else None
+            self.accepted += 1
+
+        # Waiting for room must not block other submitters or the writer
+        try:
+            self.queue.put((segment, event), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self.lock:
+                self.accepted -= 1
+                self.rejected += 1
+                if self.log:
+                    self.log.reject(segment, event[0])
+            raise IngestQueueFull("Interaction queue is full, retry later")
+
+    def _run(self):
+        while not self.stopping.is_set():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self):
+        """Wait for the first event, then gather a batch until size or time limit"""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        # Retry until written; meanwhile the queue fills up and submit() applies
+        # backpressure. Logged events are replayed on restart if we give up.
+        while True:
+            try:
+                self._write([event for _, event in batch])
+                break
+            except Exception as e:
+                print(f"⚠️  Could not write {len(batch)} interactions: {e}")
+                if self.stopping.is_set():
+                    return
+                time.sleep(self.flush_interval)
+
+        with self.lock:
+            self.written += len(batch)
+            self.batches += 1
+            if self.log:
+                self.log.written(Counter(segment for segment, _ in batch))
+
+    def _write(self, events):
+        """Write a batch of events in a single transaction"""
+        with engine.begin() as conn:
+            conn.execute(insert(Interaction.__table__), [
+                {
+                    'event_id': event_id,
+                    'session_id': session_id,
+                    'product_id': product_id,
+                    'action_type': action_type,
+                    'timestamp': timestamp
+                }
+                for event_id, session_id, product_id, action_type, timestamp in events
+            ])
+
+        # Popularity is merged into products separately by the counter
+        for product_id, delta in Counter(product_id for _, _, product_id, _, _ in events).items():
+            self.popularity.increment(product_id, delta)
+
+    def flush(self):
+        """Synchronously write everything currently queued"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._flush(batch)
+
+    def stop(self):
+        """Stop the writer thread and write remaining events"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    def stats(self):
+        """Ingestion counters"""
+        with self.lock:
+            return {
+                'queued': self.queue.qsize(),
+                'accepted': self.accepted,
+                'written': self.written,
+                'rejected': self.rejected,
+                'replayed': self.replayed,
+                'batches': self.batches
+            }
+
+
+# Process-wide ingestor, started on first use in each worker
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor():
+    """Get the process-wide interaction ingestor"""
+    global _ingestor
+
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                ingestor = InteractionIngestor()
+                ingestor.start()
+                atexit.register(ingestor.stop)
+                _ingestor = ingestor
+    return _ingestor
+
+
+def ingest_stats():
+    """Counters of this worker's ingestor (None if it hasn't started)"""
+    return _ingestor.stats() if _ingestor is not None else None
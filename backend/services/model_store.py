@@ -0,0 +1,97 @@
+import threading
+import time
+import numpy as np
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.services.collaborative_filter import ItemNeighbourModel
+from config.settings import MODEL_ARTIFACTS_DIR, MODEL_RELOAD_CHECK_SECONDS
+
+# Artifact layout: MODEL_ARTIFACTS_DIR/<version>/<name>.npy plus a CURRENT
+# file holding the active version name
+CURRENT_FILE = 'CURRENT'
+ITEM_MODEL_ARRAYS = ('product_ids', 'neighbour_idx', 'neighbour_sim', 'popularity')
+
+
+def read_current_version(artifacts_dir=MODEL_ARTIFACTS_DIR):
+    """
+    Get the active model version name
+    Returns None if no model has been trained yet
+    """
+    try:
+        with open(os.path.join(artifacts_dir, CURRENT_FILE), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_item_model(version, artifacts_dir=MODEL_ARTIFACTS_DIR):
+    """
+    Load an item-item model version with every array memory-mapped read-only,
+    so all worker processes share the same page cache
+    """
+    version_dir = os.path.join(artifacts_dir, version)
+    arrays = {
+        name: np.load(os.path.join(version_dir, f'{name}.npy'), mmap_mode='r')
+        for name in ITEM_MODEL_ARRAYS
+    }
+    return ItemNeighbourModel(version=version, **arrays)
+
+
+class ModelStore:
+    """
+    Holds the active item-item model and hot-swaps it when a new version lands
+    The swap is a single reference assignment, so requests always see either
+    the old or the new model, never a mix.
+    """
+
+    def __init__(self, artifacts_dir=MODEL_ARTIFACTS_DIR, check_interval=MODEL_RELOAD_CHECK_SECONDS):
+        self.artifacts_dir = artifacts_dir
+        self.check_interval = check_interval
+        self.model = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def get_item_model(self):
+        """
+        Get the active model, checking for a new version at most every
+        check_interval seconds
+        Returns None if no model is available
+        """
+        checked_at = self.checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.check_interval:
+            return self.model
+
+        with self.lock:
+            if self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval:
+                self.reload()
+            return self.model
+
+    def reload(self):
+        """Load the CURRENT version if it differs from the active one"""
+        self.checked_at = time.monotonic()
+
+        version = read_current_version(self.artifacts_dir)
+        if version is None:
+            self.model = None
+            return
+
+        if self.model is not None and self.model.version == version:
+            return
+
+        try:
+            self.model = load_item_model(version, self.artifacts_dir)
+        except (OSError, ValueError) as e:
+            # Keep serving the previous version if the new one is unreadable
+            print(f"⚠️  Could not load model {version}: {e}")
+
+
+# Process-wide store
+_store = ModelStore()
+
+
+def get_item_model():
+    """Get the active item-item model (or None)"""
+    return _store.get_item_model()
@@ -0,0 +1,103 @@
+import re
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.settings import OPTION_SYNONYMS
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Inputs shorter than this never match by prefix ("go" is not Gold)
+MIN_PREFIX_LENGTH = 3
+
+# Endings a phrase word may take and still name its option
+# ("rings", "golden", "silvery", "gifted", "gifting")
+INFLECTIONS = '(?:s|es|en|y|ed|ing)?'
+
+
+def _word_pattern(word):
+    """A phrase word, singular, plural or inflected ("ring" matches "rings" and back)"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+    return re.escape(word) + INFLECTIONS
+
+
+def _phrase_pattern(phrase):
+    return r'[^a-z0-9]+'.join(_word_pattern(word) for word in WORD_PATTERN.findall(phrase.lower()))
+
+
+class OptionMatcher:
+    """
+    Matches a message against a fixed set of options
+
+    Option names and their synonyms (OPTION_SYNONYMS) are compiled once into
+    a single regular expression of whole-word phrases, longest first, with a
+    group per phrase. The longest phrase in the message wins, so "rose gold"
+    is Rose Gold rather than Gold and "engagement ring" is Rings; among
+    equally long phrases the earliest wins. A message that is just the start
+    of an option word ("plat", "neck") still matches it.
+    """
+
+    def __init__(self, options, synonyms=OPTION_SYNONYMS):
+        self.options = tuple(options)
+
+        phrases = []
+        for option in self.options:
+            for phrase in (option, *synonyms.get(option, ())):
+                phrases.append((len(WORD_PATTERN.findall(phrase.lower())), phrase, option))
+        # Stable sort: longer phrases first, option order otherwise
+        phrases.sort(key=lambda item: -item[0])
+
+        # Whole-message lookups for the common case of a tapped option button
+        self.exact = {}
+        for _, phrase, option in phrases:
+            self.exact.setdefault(phrase.lower(), option)
+
+        # Group i + 1 is phrase i
+        self.group_options = (None,) + tuple(option for _, _, option in phrases)
+        self.group_lengths = (0,) + tuple(length for length, _, _ in phrases)
+        self.pattern = re.compile(
+            r'(?<![a-z0-9])(?:' +
+            '|'.join(f'({_phrase_pattern(phrase)})' for _, phrase, _ in phrases) +
+            r')(?![a-z0-9])'
+        )
+
+        # Option words for prefix matching, in option order
+        self.words = tuple(
+            (word, option) for option in self.options for word in WORD_PATTERN.findall(option.lower())
+        )
+
+    def match(self, user_input):
+        """Best matching option, or None"""
+        text = user_input.lower().strip()
+        option = self.exact.get(text)
+        if option is not None:
+            return option
+
+        best = self.find(text)
+        if best is not None:
+            return best
+        return self._match_prefix(text)
+
+    def find(self, text):
+        """
+        Option named anywhere in lowercased text, or None
+        Whole phrases only: no prefix matching, for longer free-text messages
+        """
+        best, best_length = None, 0
+        for found in self.pattern.finditer(text):
+            group = found.lastindex
+            if self.group_lengths[group] > best_length:
+                best, best_length = self.group_options[group], self.group_lengths[group]
+        return best
+
+    def _match_prefix(self, text):
+        if len(text) < MIN_PREFIX_LENGTH:
+            return None
+        for word, option in self.words:
+            if word.startswith(text):
+                return option
+        return None
+
+    __call__ = match
@@ -0,0 +1,157 @@
+import atexit
+import threading
+from collections import defaultdict
+from sqlalchemy import update, bindparam, func
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Product, engine
+from backend.services.product_index import apply_popularity, popularity_merge
+from config.settings import POPULARITY_COUNTER_SHARDS, POPULARITY_MERGE_SECONDS
+
+# Popularity is a saturating 0-100 score
+MAX_POPULARITY = 100
+
+
+def apply_popularity_deltas(conn, deltas):
+    """
+    Add popularity deltas in a single executemany UPDATE
+    The increment happens inside SQL, so concurrent writers never lose updates
+
+    Args:
+        conn: Core connection inside a transaction
+        deltas: dict of product_id -> increment
+    """
+    products = Product.__table__
+    conn.execute(
+        update(products)
+        .where(products.c.id == bindparam('product_id'))
+        .values(popularity=func.min(
+            MAX_POPULARITY,
+            func.coalesce(products.c.popularity, 0) + bindparam('delta')
+        )),
+        [{'product_id': product_id, 'delta': delta} for product_id, delta in deltas.items()]
+    )
+
+
+class _Shard:
+    __slots__ = ('lock', 'counts')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+
+
+class PopularityCounter:
+    """
+    Per-worker popularity counter
+
+    Increments land in in-memory shards (split by product ID so concurrent
+    request threads rarely share a lock) and are merged into the products
+    table every merge_interval seconds, one UPDATE per product. Product rows
+    are only written at merge time instead of once per event.
+    """
+
+    def __init__(self, shards=POPULARITY_COUNTER_SHARDS, merge_interval=POPULARITY_MERGE_SECONDS):
+        self.shards = [_Shard() for _ in range(shards)]
+        self.merge_interval = merge_interval
+        self.merge_lock = threading.Lock()
+        self.merges = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def increment(self, product_id, amount=1):
+        """Count popularity for a product (applied at the next merge)"""
+        shard = self.shards[product_id % len(self.shards)]
+        with shard.lock:
+            shard.counts[product_id] += amount
+
+    def pending(self):
+        """Number of products with unmerged increments"""
+        return sum(len(shard.counts) for shard in self.shards)
+
+    def _drain(self):
+        deltas = defaultdict(int)
+        for shard in self.shards:
+            with shard.lock:
+                counts, shard.counts = shard.counts, defaultdict(int)
+            for product_id, amount in counts.items():
+                deltas[product_id] += amount
+        return deltas
+
+    def merge(self):
+        """
+        Write pending increments to the database
+        Returns the number of products updated
+        """
+        with self.merge_lock:
+            deltas = self._drain()
+            if not deltas:
+                return 0
+
+            # No snapshot may read products between the write and the apply
+            with popularity_merge():
+                try:
+                    with engine.begin() as conn:
+                        apply_popularity_deltas(conn, deltas)
+                except Exception:
+                    # Put the increments back for the next merge
+                    for product_id, amount in deltas.items():
+                        self.increment(product_id, amount)
+                    raise
+
+                self.merges += 1
+                apply_popularity(deltas, MAX_POPULARITY)
+
+        return len(deltas)
+
+    def start(self):
+        """Merge periodically in a background thread"""
+        self.thread = threading.Thread(target=self._run, name='popularity-merge', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.merge_interval):
+            try:
+                self.merge()
+            except Exception as e:
+                print(f"⚠️  Could not merge popularity counters: {e}")
+
+    def stop(self):
+        """Stop the merge thread and merge what is left"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.merge_interval)
+        self.merge()
+
+    def stats(self):
+        return {
+            'pending_products': self.pending(),
+            'merges': self.merges
+        }
+
+
+# Process-wide counter, started on first use in each worker
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_popularity_counter():
+    """Get the process-wide popularity counter"""
+    global _counter
+
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                counter = PopularityCounter()
+                counter.start()
+                atexit.register(counter.stop)
+                _counter = counter
+    return _counter
+
+
+def popularity_stats():
+    """Counters of this worker's popularity counter (None if it hasn't started)"""
+    return _counter.stats() if _counter is not None else None
@@ -0,0 +1,545 @@
+import itertools
+import threading
+from contextlib import contextmanager
+import time
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Product, get_db
+from config.settings import (
+    MIN_SCORE_THRESHOLD,
+    RECOMMENDATION_BATCH_MAX_CELLS,
+    PRODUCT_INDEX_MIN_REBUILD_SECONDS,
+    PRODUCT_INDEX_MAX_AGE_SECONDS,
+    PRODUCT_INDEX_FETCH_SIZE
+)
+
+# Rule-based weights, in the same order as _calculate_rule_score applies them
+RULE_WEIGHTS = (
+    ('metal_type', 30.0),
+    ('occasion', 25.0),
+    ('style', 20.0),
+    ('category', 15.0)
+)
+
+CATEGORICAL_FIELDS = tuple(field for field, _ in RULE_WEIGHTS)
+
+# Unique number per snapshot build, used to validate derived caches
+_generations = itertools.count(1)
+
+
+def _encode(values):
+    """
+    Integer-code a column of strings (NULL is coded as '')
+    A dict lookup per value, instead of sorting an object array
+
+    Returns:
+        (vocab {value: code}, int32 codes)
+    """
+    vocab = {}
+    codes = np.fromiter(
+        (vocab.setdefault('' if value is None else value, len(vocab)) for value in values),
+        dtype=np.int32,
+        count=len(values)
+    )
+    return vocab, codes
+
+
+class ProductIndex:
+    """
+    Columnar in-memory snapshot of the products table
+    Holds only the fields needed for rule-based scoring as NumPy arrays
+    """
+
+    def __init__(self, rows, version):
+        """
+        Args:
+            rows: iterable of (id, price, metal_type, occasion, style, category, popularity)
+            version: catalog version this snapshot was built from
+        """
+        self.version = version
+        self.generation = next(_generations)
+        # Bumped whenever merged popularity changes the ranking
+        self.revision = 0
+        self.built_at = time.monotonic()
+
+        columns = list(zip(*rows)) if rows else [()] * 7
+
+        ids = np.asarray(columns[0], dtype=np.int64)
+        # NumPy stores NULL (None) prices as NaN
+        prices = np.array(columns[1], dtype=np.float64)
+
+        # Keep rows sorted by price (NULL prices last, ties by ID) so budget
+        # ranges are contiguous slices found by binary search
+        order = np.lexsort((ids, prices))
+        self.ids = ids[order]
+        self.prices = prices[order]
+        self.priced_count = int(np.count_nonzero(~np.isnan(self.prices)))
+
+        # Integer-code categorical columns: value -> code per field
+        self.vocab = {}
+        self.codes = {}
+        for field, values in zip(CATEGORICAL_FIELDS, columns[2:6]):
+            self.vocab[field], codes = _encode(values)
+            self.codes[field] = codes[order]
+
+        # Popularity bonus (normalized 0-10), NULL popularity counts as 0
+        self.popularity = np.nan_to_num(np.array(columns[6], dtype=np.float64))[order]
+        self.popularity_bonus = (self.popularity / 100) * 10
+        self._combos = None
+        self._id_order = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def cache_token(self):
+        """Identifies the ranking this snapshot produces right now (for result caches)"""
+        return self.generation, self.revision
+
+    def same_data(self, other):
+        """Whether other was built from the same scoring columns"""
+        return (
+            np.array_equal(self.ids, other.ids)
+            and np.array_equal(self.prices, other.prices, equal_nan=True)
+            and np.array_equal(self.popularity, other.popularity)
+            and self.vocab == other.vocab
+            and all(np.array_equal(self.codes[field], other.codes[field]) for field in CATEGORICAL_FIELDS)
+        )
+
+    def apply_popularity(self, deltas, max_popularity):
+        """
+        Add merged popularity increments to the snapshot
+        The arrays are replaced rather than written in place, so a request
+        scoring at the same time sees either the old or the new bonuses
+
+        Args:
+            deltas: dict of product_id -> increment
+            max_popularity: saturation value, as applied by the database
+        """
+        if not deltas or not len(self.ids):
+            return
+
+        ids = np.fromiter(deltas.keys(), dtype=np.int64, count=len(deltas))
+        amounts = np.fromiter(deltas.values(), dtype=np.float64, count=len(deltas))
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+        positions = np.searchsorted(self.ids, ids, sorter=self._id_order)
+        rows = self._id_order[np.minimum(positions, len(self.ids) - 1)]
+        # Products missing from the snapshot arrive with the next rebuild
+        found = self.ids[rows] == ids
+        rows = rows[found]
+
+        popularity = self.popularity.copy()
+        popularity[rows] = np.minimum(popularity[rows] + amounts[found], max_popularity)
+        bonus = self.popularity_bonus.copy()
+        bonus[rows] = (popularity[rows] / 100) * 10
+        self.popularity = popularity
+        self.popularity_bonus = bonus
+        self.revision += 1
+
+    def budget_slice(self, budget_min=None, budget_max=None):
+        """
+        Find the rows whose price lies within [budget_min, budget_max]
+        Either bound may be None (open); 0 is a real bound
+
+        Returns:
+            (start, stop) row range; the full table when both bounds are None
+        """
+        if budget_min is None and budget_max is None:
+            return 0, len(self.ids)
+
+        # Any price bound excludes products without a price
+        priced = self.prices[:self.priced_count]
+        start = 0 if budget_min is None else int(np.searchsorted(priced, budget_min, side='left'))
+        stop = self.priced_count if budget_max is None else int(np.searchsorted(priced, budget_max, side='right'))
+        return start, max(start, stop)
+
+    def score(self, preferences, start=0, stop=None):
+        """
+        Vectorized equivalent of HybridRecommendationEngine._calculate_rule_score
+        Returns: float array of scores in 0-1 range for rows start..stop
+        """
+        rows = slice(start, len(self.ids) if stop is None else stop)
+        score = np.zeros(rows.stop - rows.start, dtype=np.float64)
+
+        for field, weight in RULE_WEIGHTS:
+            value = preferences.get(field)
+            if not value:
+                continue
+            code = self.vocab[field].get(value)
+            if code is None:
+                continue
+            score += weight * (self.codes[field][rows] == code)
+
+        score += self.popularity_bonus[rows]
+        return score / 100.0
+
+    def top_n(self, preferences, n):
+        """
+        Get the IDs of the n best-scoring products for the given preferences
+        Only the budget slice is scored; ties are broken by product ID
+
+        Returns:
+            list of product IDs, best first
+        """
+        start, stop = self.budget_slice(
+            preferences.get('budget_min'),
+            preferences.get('budget_max')
+        )
+        scores = self.score(preferences, start, stop)
+
+        candidates = np.flatnonzero(scores >= MIN_SCORE_THRESHOLD)
+        return self._select_top(candidates + start, scores[candidates], n)
+
+    def top_n_batch(self, preferences_list, n, max_cells=RECOMMENDATION_BATCH_MAX_CELLS):
+        """
+        top_n for many preference sets at once
+
+        Only the combination of categorical values (metal, occasion, style,
+        category) a product has matters to its rule score, and a catalog has
+        few distinct combinations. All preference sets are scored against
+        the combinations as one (sets x combinations) matrix, in blocks of at
+        most max_cells; products are then only scored for the combinations
+        that can still reach a set's top n (see _top_from_combinations).
+        Scores are added in the same order as score(), so results equal top_n.
+
+        Returns:
+            list of product ID lists, in the order of preferences_list
+        """
+        combo_codes = self._combinations()[1]
+        n_combos = len(combo_codes['category'])
+        # One bonus array for the whole batch, even if popularity is merged meanwhile
+        bonus = self.popularity_bonus
+        block_size = max(1, max_cells // max(n_combos, 1))
+        budget_stats = {}
+        results = []
+
+        for block_start in range(0, len(preferences_list), block_size):
+            block = preferences_list[block_start:block_start + block_size]
+
+            combo_scores = np.zeros((len(block), n_combos), dtype=np.float64)
+            for field, weight in RULE_WEIGHTS:
+                # -1 never matches: unanswered or unknown values score nothing
+                wanted = np.array([
+                    self.vocab[field].get(preferences.get(field), -1) if preferences.get(field) else -1
+                    for preferences in block
+                ], dtype=np.int32)
+                combo_scores += weight * (combo_codes[field][None, :] == wanted[:, None])
+
+            for preferences, scores in zip(block, combo_scores):
+                budget = self.budget_slice(preferences.get('budget_min'), preferences.get('budget_max'))
+                results.append(self._top_from_combinations(scores, budget, n, budget_stats, bonus))
+
+        return results
+
+    def _top_from_combinations(self, combo_scores, budget, n, budget_stats, bonus):
+        """
+        Top n rows in a budget slice, given the rule score (x100, before the
+        popularity bonus) of every combination
+
+        At least n products in the slice score level + the smallest bonus,
+        where level is the n-th best combination score counting products, so
+        combinations that stay below that even with the largest bonus are
+        skipped without looking at their products.
+
+        Args:
+            budget_stats: per-slice (products per combination, min bonus, max
+                bonus), shared by the preference sets of a batch
+            bonus: popularity bonus per row
+        """
+        start, stop = budget
+        if n <= 0 or stop <= start:
+            return []
+
+        combos = self._combinations()[0][start:stop]
+        stats = budget_stats.get(budget)
+        if stats is None:
+            sliced = bonus[start:stop]
+            stats = budget_stats[budget] = (
+                np.bincount(combos, minlength=len(combo_scores)), sliced.min(), sliced.max()
+            )
+        counts, bonus_min, bonus_max = stats
+
+        order = np.argsort(-combo_scores, kind='stable')
+        covered = np.cumsum(counts[order])
+        level = combo_scores[order[min(int(np.searchsorted(covered, n)), len(order) - 1)]]
+        # Margin keeps float rounding from pruning a product that ties the cutoff
+        floor = max(level + bonus_min, MIN_SCORE_THRESHOLD * 100) - 1e-6
+        reachable = combo_scores + bonus_max >= floor
+
+        if counts[reachable].sum() * 2 > stop - start:
+            # Little to skip: score the whole slice
+            scores = (combo_scores[combos] + bonus[start:stop]) / 100.0
+            candidates = np.flatnonzero(scores >= MIN_SCORE_THRESHOLD)
+            return self._select_top(candidates + start, scores[candidates], n)
+
+        rows = np.flatnonzero(reachable[combos])
+        scores = (combo_scores[combos[rows]] + bonus[start + rows]) / 100.0
+        candidates = np.flatnonzero(scores >= MIN_SCORE_THRESHOLD)
+        return self._select_top(rows[candidates] + start, scores[candidates], n)
+
+    def _combinations(self):
+        """
+        Distinct (metal, occasion, style, category) combinations, built on first use
+
+        Returns:
+            (combination number per row, {field: code per combination})
+        """
+        if self._combos is None:
+            dims = tuple(max(len(self.vocab[field]), 1) for field in CATEGORICAL_FIELDS)
+            packed = np.ravel_multi_index(tuple(self.codes[field] for field in CATEGORICAL_FIELDS), dims)
+            uniques, inverse = np.unique(packed, return_inverse=True)
+            self._combos = (
+                inverse.astype(np.intp, copy=False),
+                dict(zip(CATEGORICAL_FIELDS, np.unravel_index(uniques, dims)))
+            )
+        return self._combos
+
+    def _select_top(self, rows, scores, n):
+        """Pick the top n rows by score (desc) then ID (asc)"""
+        if n <= 0 or len(rows) == 0:
+            return []
+
+        if len(rows) > n:
+            # Partition to find the n-th best score, then keep everything above it
+            # plus enough rows tied with it (lowest IDs first)
+            cutoff = scores[np.argpartition(-scores, n - 1)[n - 1]]
+            above = scores > cutoff
+            tied = np.flatnonzero(scores == cutoff)
+            tied = tied[np.argsort(self.ids[rows[tied]], kind='stable')][:n - int(above.sum())]
+            selected = np.concatenate([np.flatnonzero(above), tied])
+            rows, scores = rows[selected], scores[selected]
+
+        order = np.lexsort((self.ids[rows], -scores))
+        return self.ids[rows[order]].tolist()
+
+
+# Process-wide snapshot and catalog version
+_index = None
+_index_lock = threading.Lock()
+_version_lock = threading.Lock()
+_catalog_version = 0
+_popularity_version = 0
+
+# Background rebuild state
+_rebuild_lock = threading.Lock()
+_rebuilding = False
+_last_rebuild_started = float('-inf')
+# Called with each rebuilt snapshot before it is swapped in
+_rebuild_listeners = []
+
+# Local popularity merges are ordered against snapshot reads: a rebuild's rows
+# include every merge committed before them, and the merges applied between
+# its read and its swap are recorded here and replayed onto the new snapshot
+_popularity_lock = threading.RLock()
+_merged_since_read = None
+
+
+def get_catalog_version():
+    """Current catalog version (bumped whenever products change)"""
+    return _catalog_version
+
+
+def bump_catalog_version():
+    """
+    Mark the catalog as changed
+    Call this after writes that bypass the ORM (bulk inserts, Core updates)
+    """
+    global _catalog_version
+    with _version_lock:
+        _catalog_version += 1
+
+
+def get_popularity_version():
+    """Current popularity version (bumped whenever merged popularity is applied)"""
+    return _popularity_version
+
+
+@contextmanager
+def popularity_merge():
+    """
+    Hold while writing popularity increments to the database and applying
+    them with apply_popularity, so no snapshot is read in between
+    """
+    with _popularity_lock:
+        yield
+
+
+def apply_popularity(deltas, max_popularity):
+    """
+    Apply popularity increments merged into the database to the current snapshot
+
+    Popularity changes every few seconds, so it is patched into the snapshot
+    instead of bumping the catalog version, which would rebuild the product
+    and facet indexes. The snapshot's revision moves on, which invalidates
+    the cached recommendations ranked with the old popularity. Merges from
+    other workers arrive with the next rebuild (at most
+    PRODUCT_INDEX_MAX_AGE_SECONDS). A snapshot being rebuilt also gets the
+    merges applied after it read its rows.
+    """
+    global _popularity_version
+    with _popularity_lock:
+        index = _index
+        if index is not None:
+            index.apply_popularity(deltas, max_popularity)
+        if _merged_since_read is not None:
+            _merged_since_read.append((deltas, max_popularity))
+    with _version_lock:
+        _popularity_version += 1
+
+
+def get_product_index(db):
+    """
+    Get the process-wide product index
+
+    The snapshot is rebuilt when the catalog version changed (at most once every
+    PRODUCT_INDEX_MIN_REBUILD_SECONDS) or when it is older than
+    PRODUCT_INDEX_MAX_AGE_SECONDS, which picks up writes made by other workers.
+    Only the very first snapshot is built in the calling request; later ones
+    are built by a background thread while requests keep using the current one.
+    """
+    global _index
+
+    index = _index
+    if index is None:
+        with _index_lock, _popularity_lock:
+            if _index is None:
+                version = _catalog_version
+                _index = ProductIndex(_load_rows(db), version)
+            return _index
+
+    if _is_stale(index):
+        _start_rebuild()
+    return index
+
+
+def on_rebuild(listener):
+    """
+    Register listener(index), run in the rebuild thread with every new
+    snapshot before it replaces the current one, so structures derived from
+    the snapshot are ready when requests start using it
+    """
+    _rebuild_listeners.append(listener)
+    return listener
+
+
+def _start_rebuild():
+    """Start a background rebuild unless one is running or has just started"""
+    global _rebuilding, _last_rebuild_started
+    with _rebuild_lock:
+        now = time.monotonic()
+        if _rebuilding or now - _last_rebuild_started < PRODUCT_INDEX_MIN_REBUILD_SECONDS:
+            return
+        _rebuilding = True
+        _last_rebuild_started = now
+
+    thread = threading.Thread(target=_rebuild, name='product-index-rebuild', daemon=True)
+    thread.start()
+
+
+def _rebuild():
+    """
+    Build a new snapshot with a private session and swap it in
+
+    When nothing changed (the periodic refresh, or a write to columns that
+    are not scored) the current snapshot is kept, with its generation, so
+    caches derived from it stay warm.
+    """
+    global _index, _rebuilding, _merged_since_read
+    try:
+        db = get_db()
+        try:
+            version = _catalog_version
+            with _popularity_lock:
+                rows = _load_rows(db)
+                _merged_since_read = []
+        finally:
+            db.close()
+        index = ProductIndex(rows, version)
+
+        replayed = _replay_merges(index, 0)
+        current = _index
+        if current is not None and index.same_data(current):
+            current.version = index.version
+            current.built_at = index.built_at
+            return
+        for listener in _rebuild_listeners:
+            listener(index)
+        _replay_merges(index, replayed, swap=True)
+    except Exception as e:
+        print(f"⚠️  Product index rebuild failed: {e}")
+    finally:
+        with _popularity_lock:
+            _merged_since_read = None
+        with _rebuild_lock:
+            _rebuilding = False
+
+
+def _replay_merges(index, start, swap=False):
+    """
+    Apply the popularity merged since the rebuild read its rows (from the
+    start-th merge on) to the new snapshot, and swap it in if asked
+
+    Returns:
+        number of merges replayed so far
+    """
+    global _index
+    with _popularity_lock:
+        for deltas, max_popularity in _merged_since_read[start:]:
+            index.apply_popularity(deltas, max_popularity)
+        if swap:
+            _index = index
+        return len(_merged_since_read)
+
+
+def _is_stale(index):
+    age = time.monotonic() - index.built_at
+    if age >= PRODUCT_INDEX_MAX_AGE_SECONDS:
+        return True
+    return index.version != _catalog_version and age >= PRODUCT_INDEX_MIN_REBUILD_SECONDS
+
+
+def _load_rows(db):
+    """Read the scoring columns of every product without hydrating ORM objects"""
+    query = select(
+        Product.id,
+        Product.price,
+        Product.metal_type,
+        Product.occasion,
+        Product.style,
+        Product.category,
+        Product.popularity
+    ).order_by(Product.id)
+
+    # Core execution on the session's connection skips the ORM result layer
+    result = db.connection().execute(query.execution_options(yield_per=PRODUCT_INDEX_FETCH_SIZE))
+    rows = []
+    for partition in result.partitions():
+        rows.extend(partition)
+    return rows
+
+
+# Keep the snapshot in sync with ORM writes to products
+@event.listens_for(Session, 'after_flush')
+def _track_product_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Product):
+            session.info['catalog_changed'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    if session.info.pop('catalog_changed', False):
+        bump_catalog_version()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_on_rollback(session):
+    session.info.pop('catalog_changed', None)
@@ -0,0 +1,143 @@
+import base64
+import re
+from sqlalchemy import text
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import SEARCH_TABLE, SEARCH_COLUMNS
+from config.settings import SEARCH_PAGE_SIZE, SEARCH_MAX_TERMS, SEARCH_COLUMN_WEIGHTS
+
+TERM_PATTERN = re.compile(r'\w+')
+
+# Exact-match filters (query parameter = products column)
+FILTER_FIELDS = ('category', 'metal_type', 'style', 'occasion')
+
+RESULT_COLUMNS = (
+    'id', 'sku', 'name', 'category', 'metal_type', 'price', 'occasion',
+    'style', 'image_url', 'description', 'popularity'
+)
+
+# bm25() takes one weight per index column, in index order
+BM25_WEIGHTS = ', '.join(str(float(SEARCH_COLUMN_WEIGHTS.get(column, 1.0))) for column in SEARCH_COLUMNS)
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that was not produced by search_products"""
+
+
+def build_match_query(user_query):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (so results follow the user as they type)
+
+    Words are quoted, so FTS5 operators and punctuation in the input are
+    plain text ("18k gold ring-" -> "18k" "gold" "ring"*). Earlier words are
+    whole words: exact terms are cheaper to rank than prefix expansions, and
+    the porter stemmer already matches plurals.
+
+    Returns: MATCH expression, or None if the text has no words
+    """
+    terms = TERM_PATTERN.findall(user_query.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def encode_cursor(score, product_id):
+    """Opaque cursor for the row after which the next page starts"""
+    return base64.urlsafe_b64encode(f'{score!r}:{product_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, product_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(score), int(product_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def search_products(db, user_query, filters=None, min_price=None, max_price=None,
+                    limit=SEARCH_PAGE_SIZE, cursor=None):
+    """
+    Full-text product search, best matches first
+
+    Matches name, description, category, metal type and style (BM25, weighted
+    by SEARCH_COLUMN_WEIGHTS), then applies exact filters and a price range.
+    Pages are keyset paginated on (score, id), so deep pages cost the same as
+    the first one.
+
+    Args:
+        user_query: free text
+        filters: {field: value} for FILTER_FIELDS
+        min_price / max_price: optional price range
+        limit: max products
+        cursor: next_cursor of the previous page
+
+    Returns:
+        {'products': [...], 'next_cursor': str or None}
+
+    Raises:
+        InvalidCursor: the cursor could not be decoded
+    """
+    match_query = build_match_query(user_query)
+    if match_query is None:
+        return {'products': [], 'next_cursor': None}
+
+    params = {'query': match_query, 'limit': limit + 1}
+    conditions = []
+
+    for field in FILTER_FIELDS:
+        value = (filters or {}).get(field)
+        if value:
+            conditions.append(f'p.{field} = :{field}')
+            params[field] = value
+    if min_price is not None:
+        conditions.append('p.price >= :min_price')
+        params['min_price'] = min_price
+    if max_price is not None:
+        conditions.append('p.price <= :max_price')
+        params['max_price'] = max_price
+
+    # Without column filters the page is cut inside the full-text query, so
+    # only its rows are joined to products; with filters every match is
+    # joined first. Ranking itself always scores all matches.
+    inner, page = '', ''
+    if cursor:
+        params['after_score'], params['after_id'] = decode_cursor(cursor)
+        if conditions:
+            conditions.append('(s.score > :after_score OR (s.score = :after_score AND p.id > :after_id))')
+        else:
+            inner = 'AND (score > :after_score OR (score = :after_score AND rowid > :after_id))'
+    if not conditions:
+        page = 'ORDER BY score, rowid LIMIT :limit'
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    statement = text(f"""
+        SELECT {', '.join('p.' + column for column in RESULT_COLUMNS)}, s.score
+        FROM (
+            SELECT rowid, bm25({SEARCH_TABLE}, {BM25_WEIGHTS}) AS score
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH :query {inner}
+            {page}
+        ) AS s
+        JOIN products AS p ON p.id = s.rowid
+        {where}
+        ORDER BY s.score, p.id
+        LIMIT :limit
+    """)
+
+    rows = db.execute(statement, params).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['score'], rows[-1]['id'])
+
+    # BM25 scores are negative, lower is better: report a positive relevance
+    products = [
+        {**{column: row[column] for column in RESULT_COLUMNS}, 'relevance': round(-row['score'], 4)}
+        for row in rows
+    ]
+    return {'products': products, 'next_cursor': next_cursor}
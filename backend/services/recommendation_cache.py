@@ -0,0 +1,164 @@
+import itertools
+import threading
+from collections import OrderedDict
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import get_db
+from backend.services.product_index import get_product_index
+from config.settings import (
+    MAX_RECOMMENDATIONS,
+    RECOMMENDATION_CACHE_SIZE,
+    BUDGET_RANGES,
+    METAL_TYPES,
+    OCCASIONS,
+    STYLES,
+    CATEGORIES
+)
+
+
+class RecommendationCache:
+    """
+    LRU cache of rule-based recommendation results
+    Maps a preference tuple to the recommended product IDs. Entries are tied to
+    the ranking they were computed from (ProductIndex.cache_token) and dropped
+    as soon as it changes: a new snapshot, or merged popularity.
+    """
+
+    def __init__(self, max_size=RECOMMENDATION_CACHE_SIZE):
+        self.max_size = max_size
+        self.token = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, token):
+        """
+        Get cached product IDs for a preference key
+        Returns None on a miss or when the cache belongs to another ranking
+        """
+        with self.lock:
+            if token != self.token:
+                # A request still on an older ranking must not empty the cache
+                if self.token is not None and token < self.token:
+                    self.misses += 1
+                    return None
+                self._reset(token)
+
+            product_ids = self.entries.get(key)
+            if product_ids is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return product_ids
+
+    def set(self, key, token, product_ids):
+        """Store product IDs computed from the given ranking (cache_token)"""
+        with self.lock:
+            if token != self.token:
+                # Result from a newer ranking resets the cache; an older one is dropped
+                if self.token is not None and token < self.token:
+                    return
+                self._reset(token)
+
+            self.entries[key] = tuple(product_ids)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self._reset(None)
+
+    def _reset(self, token):
+        self.entries.clear()
+        self.token = token
+
+    def stats(self):
+        """Cache size and hit/miss counters"""
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def cache_key(preferences):
+    """
+    Normalize user preferences into a hashable cache key
+    """
+    def as_float(value):
+        return None if value is None else float(value)
+
+    return (
+        as_float(preferences.get('budget_min')),
+        as_float(preferences.get('budget_max')),
+        preferences.get('metal_type') or None,
+        preferences.get('occasion') or None,
+        preferences.get('style') or None,
+        preferences.get('category') or None
+    )
+
+
+def iter_preference_space():
+    """
+    Yield every preference combination the chatbot can produce
+    """
+    for metal, (budget_min, budget_max), occasion, style, category in itertools.product(
+        METAL_TYPES, BUDGET_RANGES.values(), OCCASIONS, STYLES, CATEGORIES
+    ):
+        yield {
+            'budget_min': budget_min,
+            'budget_max': budget_max,
+            'metal_type': metal,
+            'occasion': occasion,
+            'style': style,
+            'category': category
+        }
+
+
+# Process-wide cache
+_cache = RecommendationCache()
+
+
+def get_recommendation_cache():
+    """Get the process-wide recommendation cache"""
+    return _cache
+
+
+def warm_up(db=None):
+    """
+    Precompute recommendations for the whole preference space
+    Stops early if the product index is rebuilt while warming up
+
+    Returns:
+        number of preference tuples cached
+    """
+    owns_db = db is None
+    db = db or get_db()
+    try:
+        index = get_product_index(db)
+        count = 0
+        for preferences in iter_preference_space():
+            if get_product_index(db) is not index:
+                break
+            product_ids = index.top_n(preferences, MAX_RECOMMENDATIONS)
+            _cache.set(cache_key(preferences), index.cache_token, product_ids)
+            count += 1
+        return count
+    finally:
+        if owns_db:
+            db.close()
+
+
+def start_warm_up():
+    """Warm up the cache in a background thread"""
+    thread = threading.Thread(target=warm_up, name='recommendation-cache-warmup', daemon=True)
+    thread.start()
+    return thread
@@ -1,13 +1,14 @@
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
 import sys
 import os
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from backend.models import Product, Interaction, get_db
-from config.settings import MAX_RECOMMENDATIONS, MIN_SCORE_THRESHOLD
+from backend.services.product_index import get_product_index
+from backend.services.recommendation_cache import get_recommendation_cache, cache_key
+from backend.services.popularity_counter import get_popularity_counter
+from backend.services.trending import get_trending_tracker
+from config.settings import MAX_RECOMMENDATIONS, TRENDING_TOP_K
 
 
 class HybridRecommendationEngine:
@@ -18,9 +19,14 @@ class HybridRecommendationEngine:
     3. Content-Based Filtering (Phase 2 - ML)
     """
     
-    def __init__(self):
-        self.db = get_db()
-        self.scaler = MinMaxScaler()
+    def __init__(self, db=None):
+        """
+        Args:
+            db: optional shared session (e.g. the request session); a private
+                session is opened and owned when omitted
+        """
+        self.owns_db = db is None
+        self.db = db if db is not None else get_db()
     
     def get_recommendations(self, user_preferences, use_ml=False):
         """
@@ -36,7 +42,7 @@ class HybridRecommendationEngine:
         if use_ml and self._has_sufficient_data():
             # Phase 2: Hybrid approach (Rule-based + ML)
             rule_based_products = self._rule_based_filter(user_preferences)
-            ml_products = self._ml_based_recommendations(user_preferences)
+            ml_products = self._ml_based_recommendations(user_preferences, rule_based_products)
             return self._merge_recommendations(rule_based_products, ml_products)
         else:
             # Phase 1: Pure rule-based
@@ -45,36 +51,80 @@ class HybridRecommendationEngine:
     def _rule_based_filter(self, preferences):
         """
         Rule-based recommendation using exact matching and scoring
+        Scores the in-memory product index and only loads the winning products
+        """
+        index = get_product_index(self.db)
+        cache = get_recommendation_cache()
+        key = cache_key(preferences)
+        
+        product_ids = cache.get(key, index.cache_token)
+        if product_ids is None:
+            product_ids = index.top_n(preferences, MAX_RECOMMENDATIONS)
+            cache.set(key, index.cache_token, product_ids)
+        
+        return self._load_products(product_ids)
+    
+    def get_recommendations_batch(self, preferences_list, limit=MAX_RECOMMENDATIONS):
         """
-        query = self.db.query(Product)
+        Rule-based recommendations for many preference sets in one call
         
-        # Filter by budget
-        if preferences.get('budget_min') and preferences.get('budget_max'):
-            query = query.filter(
-                Product.price >= preferences['budget_min'],
-                Product.price <= preferences['budget_max']
-            )
+        Cached results are reused; the remaining preference sets are scored
+        together against the product index (see ProductIndex.top_n_batch) and
+        every recommended product is loaded with a single query.
         
-        # Get all matching products
-        products = query.all()
+        Args:
+            preferences_list: list of preference dicts (as for get_recommendations)
+            limit: products per preference set (at most MAX_RECOMMENDATIONS)
         
-        # Score each product
-        scored_products = []
-        for product in products:
-            score = self._calculate_rule_score(product, preferences)
-            if score >= MIN_SCORE_THRESHOLD:
-                scored_products.append({
-                    'product': product,
-                    'score': score
-                })
+        Returns:
+            list of product lists, in the order of preferences_list
+        """
+        index = get_product_index(self.db)
+        cache = get_recommendation_cache()
+        keys = [cache_key(preferences) for preferences in preferences_list]
+        
+        # Score each distinct preference set once
+        results = {}
+        missing = {}
+        for key, preferences in zip(keys, preferences_list):
+            if key in results or key in missing:
+                continue
+            product_ids = cache.get(key, index.cache_token)
+            if product_ids is None:
+                missing[key] = preferences
+            else:
+                results[key] = product_ids
+        
+        if missing:
+            scored = index.top_n_batch(list(missing.values()), MAX_RECOMMENDATIONS)
+            for key, product_ids in zip(missing, scored):
+                cache.set(key, index.cache_token, product_ids)
+                results[key] = product_ids
+        
+        limit = max(0, min(limit, MAX_RECOMMENDATIONS))
+        wanted_ids = {product_id for product_ids in results.values() for product_id in product_ids[:limit]}
+        by_id = {product.id: product for product in self._load_products(list(wanted_ids))}
+        
+        return [
+            [by_id[product_id] for product_id in results[key][:limit] if product_id in by_id]
+            for key in keys
+        ]
+    
+    def _load_products(self, product_ids):
+        """
+        Load products by ID, preserving the given order
+        """
+        if not product_ids:
+            return []
         
-        # Sort by score and return top N
-        scored_products.sort(key=lambda x: x['score'], reverse=True)
-        return [item['product'] for item in scored_products[:MAX_RECOMMENDATIONS]]
+        products = self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        by_id = {product.id: product for product in products}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
     
     def _calculate_rule_score(self, product, preferences):
         """
         Calculate score for a product based on user preferences
+        (ProductIndex.score is the vectorized equivalent used for ranking)
         
         Scoring logic:
         - Exact metal match: +30 points
@@ -109,46 +159,51 @@ class HybridRecommendationEngine:
         # Normalize to 0-1 range
         return score / 100.0
     
-    def _ml_based_recommendations(self, preferences):
+    def _ml_based_recommendations(self, preferences, seed_products):
         """
-        ML-based recommendations using collaborative filtering
+        ML-based recommendations using item-item collaborative filtering
         (Phase 2 - requires interaction data)
+        
+        Products frequently interacted with alongside the rule-based matches
+        (seed_products) are recommended, restricted to the user's budget.
         """
-        # Get user-item interaction matrix
-        interaction_matrix = self._build_interaction_matrix()
+        # Get item-item neighbour model built from the interaction matrix
+        model = self._build_interaction_matrix()
         
-        if interaction_matrix is None:
+        if model is None:
             return []
         
-        # Calculate product similarities using cosine similarity
-        product_similarities = cosine_similarity(interaction_matrix)
-        
-        # Get products based on similar user interactions
-        # This is a simplified version - full implementation would use matrix factorization
-        recommended_products = self._get_similar_products(product_similarities, preferences)
-        
-        return recommended_products
+        return self._get_similar_products(model, preferences, seed_products)
     
     def _build_interaction_matrix(self):
         """
-        Build user-item interaction matrix from interaction logs
-        Returns None if insufficient data
+        Get the item-item model trained offline from the sparse session x product
+        interaction matrix (see backend/utils/train_model.py)
+        Returns None if no model has been trained yet
         """
-        interactions = self.db.query(Interaction).all()
-        
-        if len(interactions) < 50:  # Need minimum interactions for ML
-            return None
-        
-        # Build matrix (simplified - in production use sparse matrix)
-        # This would be implemented with pandas pivot table or scipy sparse matrix
-        return None  # Placeholder for Phase 2
+        # Imported lazily so workers only load scipy when the ML path is used
+        from backend.services.model_store import get_item_model
+        return get_item_model()
     
-    def _get_similar_products(self, similarity_matrix, preferences):
+    def _get_similar_products(self, model, preferences, seed_products):
         """
-        Get products similar to user preferences using similarity matrix
+        Get products similar to the seed products using the neighbour model
         """
-        # Placeholder for Phase 2 ML implementation
-        return []
+        seed_ids = [product.id for product in seed_products]
+        similar_ids = model.similar_products(seed_ids, MAX_RECOMMENDATIONS * 3)
+        
+        budget_min = preferences.get('budget_min')
+        budget_max = preferences.get('budget_max')
+        
+        products = []
+        for product in self._load_products(similar_ids):
+            if budget_min is not None and (product.price is None or product.price < budget_min):
+                continue
+            if budget_max is not None and (product.price is None or product.price > budget_max):
+                continue
+            products.append(product)
+        
+        return products[:MAX_RECOMMENDATIONS]
     
     def _merge_recommendations(self, rule_based, ml_based):
         """
@@ -178,9 +233,9 @@ class HybridRecommendationEngine:
     def _has_sufficient_data(self):
         """
         Check if we have enough interaction data for ML recommendations
+        (the training job only publishes a model when there is)
         """
-        interaction_count = self.db.query(Interaction).count()
-        return interaction_count >= 100  # Minimum threshold for ML
+        return self._build_interaction_matrix() is not None
     
     def track_interaction(self, session_id, product_id, action_type):
         """
@@ -194,22 +249,42 @@ class HybridRecommendationEngine:
         self.db.add(interaction)
         self.db.commit()
         
-        # Update product popularity
-        product = self.db.query(Product).filter(Product.id == product_id).first()
-        if product:
-            product.popularity = min(100, product.popularity + 1)
-            self.db.commit()
+        # Update product popularity (merged into products in batches)
+        get_popularity_counter().increment(int(product_id))
     
-    def get_trending_products(self, limit=10):
+    def get_trending_products(self, limit=10, category=None, metal_type=None):
         """
-        Get trending products based on popularity
+        Get trending products based on time-decayed interaction scores
+        Falls back to popularity when there isn't enough recent activity
+        
+        Args:
+            limit: number of products, capped at TRENDING_TOP_K (the products
+                ranked per filter)
+            category / metal_type: optional filters, combined when both are given
         """
-        products = self.db.query(Product).order_by(Product.popularity.desc()).limit(limit).all()
+        limit = max(0, min(limit, TRENDING_TOP_K))
+        tracker = get_trending_tracker(self.db)
+        products = self._load_products(tracker.top(limit, category, metal_type))
+        
+        if len(products) < limit:
+            query = self.db.query(Product)
+            if category:
+                query = query.filter(Product.category == category)
+            if metal_type:
+                query = query.filter(Product.metal_type == metal_type)
+            
+            seen_ids = [product.id for product in products]
+            if seen_ids:
+                query = query.filter(Product.id.notin_(seen_ids))
+            
+            products += query.order_by(Product.popularity.desc()).limit(limit - len(products)).all()
+        
         return products
     
     def close(self):
-        """Close database session"""
-        self.db.close()
+        """Close database session (only if this service opened it)"""
+        if self.owns_db:
+            self.db.close()
 
 
 # Convenience function
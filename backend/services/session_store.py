@@ -0,0 +1,518 @@
+import atexit
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import select, insert, update
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import UserSession, ConversationHistory, engine
+from config.settings import (
+    SESSION_STORE_BACKEND,
+    SESSION_STORE_MAX_SESSIONS,
+    SESSION_STORE_TTL_SECONDS,
+    SESSION_STORE_SWEEP_SECONDS,
+    SESSION_STORE_LOCK_SECONDS,
+    SESSION_STORE_SWEEP_BATCH,
+    REDIS_URL
+)
+
+# Conversation is over: the session is written to the database right away
+COMPLETED_STATE = 'showing_recommendations'
+
+SESSION_FIELDS = (
+    'budget_min',
+    'budget_max',
+    'metal_type',
+    'occasion',
+    'style',
+    'category',
+    'conversation_state'
+)
+
+
+class SessionState:
+    """
+    Chat session held by a session store
+
+    Mirrors the user_sessions columns (so the conversation handlers can treat
+    it like a UserSession row) plus the messages not yet written to
+    conversation_history.
+    """
+
+    __slots__ = (
+        'session_id', 'created_at', 'updated_at', 'persisted', 'history', 'written', 'revision', 'lock'
+    ) + SESSION_FIELDS
+
+    def __init__(self, session_id, conversation_state='started', persisted=False):
+        self.session_id = session_id
+        self.conversation_state = conversation_state
+        self.budget_min = None
+        self.budget_max = None
+        self.metal_type = None
+        self.occasion = None
+        self.style = None
+        self.category = None
+        self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
+        self.persisted = persisted    # Row exists in user_sessions
+        self.history = []             # Pending (message, sender, timestamp)
+        self.written = 0              # Messages written since the session was loaded
+        self.revision = 0             # Revision of the shared copy this was read from
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_row(cls, row):
+        """State of a session already stored in user_sessions"""
+        state = cls(row.session_id, row.conversation_state, persisted=True)
+        for field in SESSION_FIELDS:
+            setattr(state, field, getattr(row, field))
+        state.created_at = row.created_at or state.created_at
+        state.updated_at = row.updated_at or state.updated_at
+        return state
+
+    @property
+    def dirty(self):
+        return bool(self.history) or not self.persisted
+
+    def to_json(self):
+        data = {field: getattr(self, field) for field in SESSION_FIELDS}
+        data.update({
+            'session_id': self.session_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'persisted': self.persisted,
+            'written': self.written,
+            'revision': self.revision,
+            'history': [(message, sender, timestamp.isoformat()) for message, sender, timestamp in self.history]
+        })
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw):
+        data = json.loads(raw)
+        state = cls(data['session_id'], data['conversation_state'], data['persisted'])
+        for field in SESSION_FIELDS:
+            setattr(state, field, data[field])
+        state.created_at = datetime.fromisoformat(data['created_at'])
+        state.updated_at = datetime.fromisoformat(data['updated_at'])
+        state.history = [
+            (message, sender, datetime.fromisoformat(timestamp))
+            for message, sender, timestamp in data['history']
+        ]
+        state.written = data['written']
+        state.revision = data['revision']
+        return state
+
+    def rebase(self, stored):
+        """
+        Combine this copy with one stored since it was read
+
+        Pending messages are numbered by their position after the written
+        ones, so messages either copy has written are dropped and none is
+        written twice. Answers come from the copy updated last.
+        """
+        written = max(self.written, stored.written)
+        messages = {}
+        for copy in (stored, self):
+            for position, message in enumerate(copy.history, copy.written):
+                messages[position] = message
+        self.history = [messages[position] for position in sorted(messages) if position >= written]
+        self.written = written
+
+        if stored.updated_at > self.updated_at:
+            for field in SESSION_FIELDS:
+                setattr(self, field, getattr(stored, field))
+            self.updated_at = stored.updated_at
+        self.persisted = self.persisted or stored.persisted
+        self.revision = stored.revision
+
+
+def load_session_state(session_id):
+    """Read a session from user_sessions (None if it doesn't exist)"""
+    sessions = UserSession.__table__
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(sessions).where(sessions.c.session_id == session_id)
+        ).first()
+    return SessionState.from_row(row) if row is not None else None
+
+
+def persist_session_state(state):
+    """
+    Write a session and its pending messages in one transaction
+    Returns True if anything was written
+
+    A turn may add messages to the state while this runs (e.g. a sweep or
+    an eviction overlapping it), so only the messages written are removed.
+    """
+    with state.lock:
+        if not state.dirty:
+            return False
+        history = list(state.history)
+
+        sessions = UserSession.__table__
+        values = {field: getattr(state, field) for field in SESSION_FIELDS}
+        values['updated_at'] = state.updated_at
+
+        with engine.begin() as conn:
+            if state.persisted:
+                conn.execute(
+                    update(sessions).where(sessions.c.session_id == state.session_id).values(**values)
+                )
+            else:
+                conn.execute(insert(sessions).values(
+                    session_id=state.session_id,
+                    created_at=state.created_at,
+                    **values
+                ))
+
+            if history:
+                conn.execute(insert(ConversationHistory.__table__), [
+                    {
+                        'session_id': state.session_id,
+                        'message': message,
+                        'sender': sender,
+                        'timestamp': timestamp
+                    }
+                    for message, sender, timestamp in history
+                ])
+
+        state.persisted = True
+        state.written += len(history)
+        del state.history[:len(history)]
+        return True
+
+
+class MemorySessionStore:
+    """
+    Process-local session store: an LRU of recently active sessions
+
+    Sessions are written to the database when the conversation completes,
+    when they are evicted (LRU size or idle TTL, swept in the background)
+    and at shutdown, so an in-progress turn never touches the database.
+    Sessions live in one worker, so gunicorn.conf.py runs a single worker
+    with this backend; use the Redis backend to scale out.
+    """
+
+    def __init__(self, max_sessions=SESSION_STORE_MAX_SESSIONS, ttl=SESSION_STORE_TTL_SECONDS,
+                 sweep_interval=SESSION_STORE_SWEEP_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()   # session_id -> (state, last_used)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'writes': 0}
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def get(self, session_id):
+        """Get a session, loading it from the database on a miss (None if unknown)"""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is not None:
+                self.sessions[session_id] = (entry[0], time.monotonic())
+                self.sessions.move_to_end(session_id)
+                self.counters['hits'] += 1
+                return entry[0]
+            self.counters['misses'] += 1
+
+        state = load_session_state(session_id)
+        if state is not None:
+            self.save(state)
+        return state
+
+    def save(self, state):
+        """Store a session after a turn (written through once it completes)"""
+        evicted = []
+        with self.lock:
+            self.sessions[state.session_id] = (state, time.monotonic())
+            self.sessions.move_to_end(state.session_id)
+            while len(self.sessions) > self.max_sessions:
+                _, (old_state, _) = self.sessions.popitem(last=False)
+                evicted.append(old_state)
+                self.counters['evictions'] += 1
+
+        if state.conversation_state == COMPLETED_STATE:
+            self._write(state)
+        for old_state in evicted:
+            self._write(old_state)
+
+    def flush(self, session_id):
+        """Write a session's pending changes now (e.g. before reading its history)"""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+        if entry is not None:
+            self._write(entry[0])
+
+    def flush_all(self):
+        with self.lock:
+            states = [state for state, _ in self.sessions.values()]
+        for state in states:
+            self._write(state)
+
+    def _write(self, state):
+        if persist_session_state(state):
+            with self.lock:
+                self.counters['writes'] += 1
+
+    def sweep(self):
+        """Write and drop sessions idle for longer than the TTL"""
+        cutoff = time.monotonic() - self.ttl
+        with self.lock:
+            expired = [sid for sid, (_, last_used) in self.sessions.items() if last_used < cutoff]
+            states = [self.sessions.pop(sid)[0] for sid in expired]
+            self.counters['evictions'] += len(states)
+
+        for state in states:
+            self._write(state)
+        return len(states)
+
+    def start(self):
+        """Sweep idle sessions periodically in a background thread"""
+        self.thread = threading.Thread(target=self._run, name='session-sweep', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️  Could not write expired sessions: {e}")
+
+    def stop(self):
+        """Stop sweeping and write every session still held"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.sweep_interval)
+        self.flush_all()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self.sessions),
+                **self.counters
+            }
+
+
+class RedisSessionStore:
+    """
+    Session store shared by every worker, kept in Redis
+
+    State (including pending messages) is stored as JSON with a sliding TTL
+    and written to the database when the conversation completes, when its
+    history is read, or once it has been idle for write_after seconds (every
+    worker sweeps a sorted set of the last-touch times of sessions with
+    unwritten changes, so abandoned conversations are written before Redis
+    expires them). A turn and a history read of the same session can
+    overlap, so:
+    - every store is a compare-and-set on the revision the copy was read
+      at; on a conflict the copy is rebased on the stored one (see
+      SessionState.rebase) and stored again
+    - database writes hold a per-session lock in Redis and start from the
+      latest stored copy, so pending messages are written exactly once
+    """
+
+    # Store ARGV[2] in KEYS[1] unless the stored copy's revision differs from
+    # ARGV[1]; returns the stored copy on a conflict, nil once written. The
+    # session ARGV[6] stays in the idle set KEYS[2] (touched at ARGV[4]) while
+    # it has unwritten changes (ARGV[5] == '1')
+    COMPARE_AND_SET = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['revision'] ~= tonumber(ARGV[1]) then
+    return current
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+if ARGV[5] == '1' then
+    redis.call('ZADD', KEYS[2], ARGV[4], ARGV[6])
+else
+    redis.call('ZREM', KEYS[2], ARGV[6])
+end
+return false
+"""
+
+    # Delete the lock KEYS[1] only if it is still held with token ARGV[1]
+    RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, client=None, ttl=SESSION_STORE_TTL_SECONDS, prefix='chat-session:',
+                 lock_timeout=SESSION_STORE_LOCK_SECONDS, sweep_interval=SESSION_STORE_SWEEP_SECONDS,
+                 sweep_batch=SESSION_STORE_SWEEP_BATCH):
+        if client is None:
+            import redis  # Optional dependency, only needed for this backend
+            client = redis.Redis.from_url(REDIS_URL)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.idle_key = prefix + 'idle'
+        self.lock_timeout = lock_timeout
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        # Leave two sweeps before the key expires
+        self.write_after = max(ttl - 2 * sweep_interval, ttl / 2)
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'writes': 0, 'conflicts': 0, 'swept': 0}
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _read(self, session_id):
+        raw = self.client.get(self.prefix + session_id)
+        return SessionState.from_json(raw) if raw is not None else None
+
+    def get(self, session_id):
+        """Get a session, loading it from the database on a miss (None if unknown)"""
+        state = self._read(session_id)
+        if state is not None:
+            self._count('hits')
+            return state
+
+        self._count('misses')
+        state = load_session_state(session_id)
+        if state is not None:
+            self._put(state)
+        return state
+
+    def _put(self, state):
+        """Store a session, rebasing it on any copy stored since it was read"""
+        key = self.prefix + state.session_id
+        while True:
+            read_revision = state.revision
+            state.revision = read_revision + 1
+            current = self.client.eval(
+                self.COMPARE_AND_SET, 2, key, self.idle_key,
+                read_revision, state.to_json(), self.ttl, time.time(), '1' if state.dirty else '0', state.session_id
+            )
+            if current is None:
+                return
+            state.rebase(SessionState.from_json(current))
+            self._count('conflicts')
+
+    @contextmanager
+    def _writing(self, session_id):
+        """Hold the session's database write lock (expires after lock_timeout)"""
+        key = self.prefix + session_id + ':writing'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + 2 * self.lock_timeout
+        while not self.client.set(key, token, nx=True, ex=self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Session {session_id} is locked by another writer")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self.client.eval(self.RELEASE, 1, key, token)
+
+    def save(self, state):
+        """Store a session after a turn (written through once it completes)"""
+        if state.conversation_state != COMPLETED_STATE:
+            self._put(state)
+            return
+
+        with self._writing(state.session_id):
+            stored = self._read(state.session_id)
+            if stored is not None and stored.revision != state.revision:
+                state.rebase(stored)
+            if persist_session_state(state):
+                self._count('writes')
+            self._put(state)
+
+    def flush(self, session_id):
+        """Write a session's pending changes now (e.g. before reading its history)"""
+        with self._writing(session_id):
+            state = self._read(session_id)
+            if state is not None and persist_session_state(state):
+                self._count('writes')
+                self._put(state)
+
+    def sweep(self):
+        """
+        Write sessions idle for write_after seconds to the database
+        They stay in Redis (now without unwritten changes) until they expire
+
+        Returns:
+            number of sessions written
+        """
+        cutoff = time.time() - self.write_after
+        session_ids = self.client.zrangebyscore(self.idle_key, '-inf', cutoff, start=0, num=self.sweep_batch)
+        written = 0
+        for session_id in session_ids:
+            if isinstance(session_id, bytes):
+                session_id = session_id.decode()
+            with self._writing(session_id):
+                state = self._read(session_id)
+                if state is not None and persist_session_state(state):
+                    self._put(state)
+                    written += 1
+                else:
+                    # Expired, or already written by another worker
+                    self.client.zrem(self.idle_key, session_id)
+        with self.lock:
+            self.counters['writes'] += written
+            self.counters['swept'] += written
+        return written
+
+    def start(self):
+        """Sweep idle sessions periodically in a background thread"""
+        self.thread = threading.Thread(target=self._run, name='session-sweep', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️  Could not write idle sessions: {e}")
+
+    def stop(self):
+        """Stop sweeping (sessions stay in Redis for the other workers)"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.sweep_interval)
+
+    def stats(self):
+        with self.lock:
+            return {'backend': 'redis', **self.counters}
+
+
+SESSION_STORE_BACKENDS = {
+    'memory': MemorySessionStore,
+    'redis': RedisSessionStore
+}
+
+# Process-wide store, started on first use in each worker
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Get the process-wide session store (backend from SESSION_STORE_BACKEND)"""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = SESSION_STORE_BACKENDS[SESSION_STORE_BACKEND]()
+                store.start()
+                atexit.register(store.stop)
+                _store = store
+    return _store
+
+
+def session_store_stats():
+    """Counters of this worker's session store (None if it hasn't started)"""
+    return _store.stats() if _store is not None else None
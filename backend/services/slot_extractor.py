@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.services.budget_parser import parse_budget
+from backend.services.conversation_flow import FLOW_STEPS
+from backend.services.option_matcher import OptionMatcher
+
+
+class SlotExtractor:
+    """
+    Fills every question a single message answers
+
+    "gold wedding necklace under 50k, traditional" answers five questions at
+    once. The question being asked is parsed exactly as before (its own
+    parser, including prefix matching); unanswered later or earlier
+    questions are filled from whole option phrases found anywhere in the
+    message, and the budget from what remains once those phrases are masked
+    out (so "22k gold" is a metal, not ₹22,000) and only from amounts with a
+    currency, a unit or a bound word ("916 gold" is hallmarked gold, not
+    ₹916). Answers already given are
+    never overwritten. Every matcher is compiled once with the flow.
+    """
+
+    def __init__(self, steps=FLOW_STEPS):
+        self.steps = steps
+        self.option_steps = tuple(step for step in steps if isinstance(step.parse, OptionMatcher))
+        self.budget_steps = tuple(step for step in steps if step.parse is parse_budget)
+
+    def extract(self, session, current_step, user_message):
+        """
+        Answers found in a message
+
+        Args:
+            session: SessionState (answered questions are skipped)
+            current_step: ConversationStep being asked
+            user_message: str
+
+        Returns:
+            [(step, value)] in flow order; empty if nothing was understood
+        """
+        answers = {}
+        value = current_step.parse(user_message)
+        if value is not None:
+            answers[current_step.state] = value
+
+        text = user_message.lower()
+        for step in self.option_steps:
+            if step is current_step or is_answered(session, step):
+                continue
+            option = step.parse.find(text)
+            if option is not None:
+                answers[step.state] = option
+
+        pending_budget = [
+            step for step in self.budget_steps
+            if step is not current_step and not is_answered(session, step)
+        ]
+        if pending_budget:
+            # Karat synonyms ("18k" is Gold) are options, not amounts
+            for step in self.option_steps:
+                text = step.parse.pattern.sub(' ', text)
+            budget = parse_budget(text, asked=False)
+            if budget is not None:
+                for step in pending_budget:
+                    answers[step.state] = budget
+
+        return [(step, answers[step.state]) for step in self.steps if step.state in answers]
+
+
+def is_answered(session, step):
+    """Whether every slot of a step is filled"""
+    return all(getattr(session, slot) is not None for slot in step.slots)
+
+
+def first_unanswered(session, steps=FLOW_STEPS):
+    """The first step still to be answered, or None once all are"""
+    for step in steps:
+        if not is_answered(session, step):
+            return step
+    return None
+
+
+def describe_answer(step, value):
+    """Short text for an answer, for the confirmation message"""
+    if len(step.slots) > 1:
+        budget_min, budget_max = value
+        return f"₹{int(budget_min):,} - ₹{int(budget_max):,}"
+    return value
+
+
+# Compiled with the conversation flow
+SLOT_EXTRACTOR = SlotExtractor()
@@ -0,0 +1,250 @@
+import heapq
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from backend.models import Product, Interaction
+from config.settings import (
+    ACTION_WEIGHTS,
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_TOP_K,
+    TRENDING_REFRESH_SECONDS,
+    TRENDING_FETCH_SIZE
+)
+
+# Rebase scores before exp() gets anywhere near float overflow
+MAX_EXPONENT = 50.0
+
+
+class TopK:
+    """
+    The k highest-scoring products of one bucket (all / a category / a metal)
+
+    Scores only ever increase (see TrendingTracker), so a product can only move
+    up: members are kept in a dict with a lazy min-heap to find the weakest.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.members = {}
+        self.heap = []
+
+    def update(self, product_id, score):
+        if product_id in self.members:
+            self.members[product_id] = score
+            heapq.heappush(self.heap, (score, product_id))
+        elif len(self.members) < self.k:
+            self.members[product_id] = score
+            heapq.heappush(self.heap, (score, product_id))
+        else:
+            weakest_score, weakest_id = self._weakest()
+            if score <= weakest_score:
+                return
+            heapq.heappop(self.heap)
+            del self.members[weakest_id]
+            self.members[product_id] = score
+            heapq.heappush(self.heap, (score, product_id))
+
+        # Drop stale heap entries once they pile up
+        if len(self.heap) > 4 * self.k:
+            self.rebuild()
+
+    def _weakest(self):
+        while True:
+            score, product_id = self.heap[0]
+            if self.members.get(product_id) == score:
+                return score, product_id
+            heapq.heappop(self.heap)
+
+    def rebuild(self, scale=1.0):
+        """Rebuild the heap, optionally rescaling every score"""
+        if scale != 1.0:
+            self.members = {pid: score * scale for pid, score in self.members.items()}
+        self.heap = [(score, pid) for pid, score in self.members.items()]
+        heapq.heapify(self.heap)
+
+    def top(self, limit):
+        """Up to limit (product_id, score) pairs, best first"""
+        return sorted(self.members.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class TrendingTracker:
+    """
+    Exponentially time-decayed trending scores, maintained incrementally
+
+    An interaction of weight w at time t adds w * exp(decay * (t - t_ref)) to
+    its product's score. Dividing every score by exp(decay * (now - t_ref))
+    gives the decayed value, and since that factor is shared, decay never
+    changes the ranking: nothing needs rescanning as time passes.
+
+    New rows are read from the interactions table by ID (id > last seen),
+    so every worker sees interactions written by any worker.
+    """
+
+    def __init__(self, half_life_hours=TRENDING_HALF_LIFE_HOURS, k=TRENDING_TOP_K):
+        self.decay = math.log(2) / (half_life_hours * 3600)
+        self.half_life = timedelta(hours=half_life_hours)
+        self.k = k
+        self.reference = None
+        self.scores = {}
+        self.buckets = {}
+        self.last_id = None
+        self.refreshed_at = None
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TopK(self.k)
+        return bucket
+
+    def add(self, product_id, action_type, timestamp, category=None, metal_type=None):
+        """Record one interaction"""
+        weight = ACTION_WEIGHTS.get(action_type, 0.0)
+        if weight <= 0:
+            return
+
+        seconds = timestamp.timestamp()
+        if self.reference is None:
+            self.reference = seconds
+
+        exponent = self.decay * (seconds - self.reference)
+        if exponent > MAX_EXPONENT:
+            self._rebase(seconds)
+            exponent = 0.0
+
+        score = self.scores.get(product_id, 0.0) + weight * math.exp(exponent)
+        self.scores[product_id] = score
+
+        self._bucket(None).update(product_id, score)
+        if category:
+            self._bucket(('category', category)).update(product_id, score)
+        if metal_type:
+            self._bucket(('metal_type', metal_type)).update(product_id, score)
+        if category and metal_type:
+            self._bucket(('category_metal_type', category, metal_type)).update(product_id, score)
+
+    def _rebase(self, seconds):
+        """Move the reference time forward, rescaling all scores"""
+        scale = math.exp(-self.decay * (seconds - self.reference))
+        self.reference = seconds
+        self.scores = {pid: score * scale for pid, score in self.scores.items()}
+        for bucket in self.buckets.values():
+            bucket.rebuild(scale)
+
+    def refresh(self, db, force=False):
+        """
+        Read interactions added since the last refresh
+        Throttled to once every TRENDING_REFRESH_SECONDS
+        """
+        now = time.monotonic()
+        if not force and self.refreshed_at is not None and now - self.refreshed_at < TRENDING_REFRESH_SECONDS:
+            return
+
+        with self.lock:
+            if not force and self.refreshed_at is not None and time.monotonic() - self.refreshed_at < TRENDING_REFRESH_SECONDS:
+                return
+
+            if self.last_id is None:
+                added = self._load_recent(db)
+            else:
+                added = self._load_since(db, self.last_id)
+
+            if added:
+                self.version += 1
+            self.refreshed_at = time.monotonic()
+
+    def _query(self):
+        return select(
+            Interaction.id,
+            Interaction.product_id,
+            Interaction.action_type,
+            Interaction.timestamp,
+            Product.category,
+            Product.metal_type
+        ).join(Product, Product.id == Interaction.product_id)
+
+    def _load_recent(self, db):
+        """
+        Initial load: walk interactions newest-first by primary key and stop
+        once they are too old to matter (10 half-lives, < 0.1% weight)
+        """
+        cutoff = datetime.utcnow() - 10 * self.half_life
+        query = self._query().order_by(Interaction.id.desc())
+        result = db.execute(query.execution_options(yield_per=TRENDING_FETCH_SIZE))
+
+        rows = []
+        self.last_id = 0
+        for partition in result.partitions():
+            for row in partition:
+                self.last_id = max(self.last_id, row.id)
+                if row.timestamp is not None and row.timestamp < cutoff:
+                    break
+                rows.append(row)
+            else:
+                continue
+            break
+        result.close()
+
+        # Oldest first so the reference time starts at the oldest event
+        for row in reversed(rows):
+            self._add_row(row)
+        return len(rows)
+
+    def _load_since(self, db, last_id):
+        query = self._query().where(Interaction.id > last_id).order_by(Interaction.id)
+        result = db.execute(query.execution_options(yield_per=TRENDING_FETCH_SIZE))
+
+        count = 0
+        for partition in result.partitions():
+            for row in partition:
+                self._add_row(row)
+                self.last_id = row.id
+                count += 1
+        return count
+
+    def _add_row(self, row):
+        self.add(
+            row.product_id,
+            row.action_type,
+            row.timestamp or datetime.utcnow(),
+            row.category,
+            row.metal_type
+        )
+
+    def top(self, limit, category=None, metal_type=None):
+        """
+        Trending product IDs, best first (at most k)
+        Filter by category, metal type or both
+        """
+        if category and metal_type:
+            key = ('category_metal_type', category, metal_type)
+        elif category:
+            key = ('category', category)
+        elif metal_type:
+            key = ('metal_type', metal_type)
+        else:
+            key = None
+
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                return []
+            return [product_id for product_id, _ in bucket.top(limit)]
+
+
+# Process-wide tracker
+_tracker = TrendingTracker()
+
+
+def get_trending_tracker(db):
+    """Get the process-wide trending tracker, caught up with new interactions"""
+    _tracker.refresh(db)
+    return _tracker
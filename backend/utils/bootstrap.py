@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.models import init_db, get_db, Product
+from backend.utils.catalog_import import import_catalog
+from config.settings import BOOTSTRAP_LOCK_PATH
+
+SAMPLE_PRODUCTS_FILE = os.path.join(project_root, 'data', 'sample_products.json')
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive inter-process lock on a lock file
+    Blocks until the lock is available
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a+') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            # LK_LOCK retries for ~10s before failing; keep trying
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def bootstrap(products_file=SAMPLE_PRODUCTS_FILE):
+    """
+    Create the database schema and seed the catalog if it is empty
+
+    Safe to run from several processes at once: the work happens under an
+    exclusive file lock, and later callers find the catalog already seeded.
+
+    Returns:
+        number of products loaded (0 if the catalog was already populated)
+    """
+    with file_lock(BOOTSTRAP_LOCK_PATH):
+        init_db()
+
+        db = get_db()
+        try:
+            existing_count = db.query(Product).count()
+        finally:
+            db.close()
+
+        if existing_count > 0:
+            print(f"📦 Database has {existing_count} products already!")
+            return 0
+
+        print("📦 Loading sample products...")
+        stats = import_catalog(products_file)
+        print(f"✅ Loaded {stats['rows']} sample products!")
+        return stats['rows']
+
+
+if __name__ == '__main__':
+    print("🔄 Bootstrapping database...")
+    bootstrap()
+    print("✨ Bootstrap complete!")
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import json
+import time
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.models import Product, engine, init_db
+from backend.services.product_index import bump_catalog_version
+from config.settings import CATALOG_IMPORT_CHUNK_SIZE
+
+# Columns accepted from a supplier feed
+PRODUCT_FIELDS = (
+    'sku', 'name', 'category', 'metal_type', 'price', 'occasion',
+    'style', 'image_url', 'description', 'popularity'
+)
+
+READ_SIZE = 1 << 16
+
+
+def iter_json_array(f):
+    """
+    Incrementally decode the objects of a top-level JSON array
+    Only one object (plus a read buffer) is held in memory at a time
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    started = False
+
+    while True:
+        # Skip whitespace and separators between objects
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("JSON catalog must be an array of products")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass  # Object continues in the next read
+            else:
+                yield obj
+                continue
+
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            if pos < len(buffer):
+                # Re-raise the decode error for the truncated object
+                decoder.raw_decode(buffer, pos)
+            if started:
+                raise ValueError("Unexpected end of JSON catalog")
+            return
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_ndjson(f):
+    """Decode one JSON object per line, skipping blank lines"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_records(path, fmt=None):
+    """
+    Stream product records from a JSON array, NDJSON or CSV file
+
+    Args:
+        path: file path
+        fmt: 'json', 'ndjson' or 'csv' (guessed from the extension if None)
+    """
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}.get(ext, 'json')
+
+    with open(path, 'r', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        elif fmt == 'ndjson':
+            yield from iter_ndjson(f)
+        else:
+            yield from iter_json_array(f)
+
+
+def normalize_record(record, default_popularity=0):
+    """
+    Map a raw feed record to products table values
+    Empty strings (common in CSV feeds) are treated as missing
+    """
+    row = {}
+    for field in PRODUCT_FIELDS:
+        value = record.get(field)
+        row[field] = None if value == '' else value
+
+    if not row['name']:
+        raise ValueError(f"Product without a name: {record!r}")
+
+    if row['price'] is not None:
+        row['price'] = float(row['price'])
+    row['popularity'] = default_popularity if row['popularity'] is None else int(row['popularity'])
+    if row['sku'] is not None:
+        row['sku'] = str(row['sku'])
+    return row
+
+
+def _insert_statement(upsert):
+    table = Product.__table__
+    if not upsert or engine.dialect.name != 'sqlite':
+        return insert(table)
+
+    # Rows with a known SKU update the existing product; rows without one insert.
+    # Popularity is tracked by the store, so a feed never overwrites it.
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.sku],
+        set_={
+            field: stmt.excluded[field]
+            for field in PRODUCT_FIELDS if field not in ('sku', 'popularity')
+        }
+    )
+
+
+def import_catalog(path, fmt=None, chunk_size=CATALOG_IMPORT_CHUNK_SIZE, upsert=True,
+                   default_popularity=0, progress=None):
+    """
+    Bulk import a product catalog file
+
+    Records are streamed from disk and written with executemany in chunks of
+    chunk_size rows, one transaction per chunk, so memory stays flat
+    regardless of file size.
+
+    Args:
+        path: catalog file (JSON array, NDJSON or CSV)
+        fmt: file format (guessed from the extension if None)
+        chunk_size: rows per insert batch / transaction
+        upsert: update existing products with the same SKU instead of failing
+        default_popularity: popularity for records that don't specify one
+        progress: optional callback(rows_so_far, elapsed_seconds) after each chunk
+
+    Returns:
+        dict with rows, seconds and rows_per_sec
+    """
+    stmt = _insert_statement(upsert)
+    started = time.perf_counter()
+    total = 0
+    batch = []
+
+    def flush(batch):
+        with engine.begin() as conn:
+            conn.execute(stmt, batch)
+
+    try:
+        for record in iter_records(path, fmt):
+            batch.append(normalize_record(record, default_popularity))
+            if len(batch) >= chunk_size:
+                flush(batch)
+                total += len(batch)
+                batch = []
+                if progress:
+                    progress(total, time.perf_counter() - started)
+
+        if batch:
+            flush(batch)
+            total += len(batch)
+    finally:
+        if total:
+            bump_catalog_version()
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': total,
+        'seconds': seconds,
+        'rows_per_sec': total / seconds if seconds > 0 else 0.0
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import a product catalog')
+    parser.add_argument('path', help='JSON array, NDJSON (.ndjson/.jsonl) or CSV file')
+    parser.add_argument('--format', choices=['json', 'ndjson', 'csv'], default=None)
+    parser.add_argument('--chunk-size', type=int, default=CATALOG_IMPORT_CHUNK_SIZE)
+    parser.add_argument('--no-upsert', action='store_true',
+                        help='plain inserts; fail on duplicate SKUs')
+    parser.add_argument('--default-popularity', type=int, default=0)
+    args = parser.parse_args()
+
+    init_db()
+
+    def report(rows, elapsed):
+        print(f"  {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+
+    print(f"📦 Importing {args.path}...")
+    stats = import_catalog(
+        args.path,
+        fmt=args.format,
+        chunk_size=args.chunk_size,
+        upsert=not args.no_upsert,
+        default_popularity=args.default_popularity,
+        progress=report
+    )
+    print(f"✅ Imported {stats['rows']:,} products in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
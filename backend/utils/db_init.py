@@ -1,4 +1,3 @@
-import json
 import sys
 import os
 
@@ -7,6 +6,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from backend.models import Product, init_db, get_db
+from backend.utils.catalog_import import import_catalog
 
 def load_sample_products():
     """Load sample products from JSON file into database"""
@@ -24,31 +24,13 @@ def load_sample_products():
         db.close()
         return
     
-    # Load JSON file
-    json_path = os.path.join(project_root, 'data', 'sample_products.json')
-    
-    with open(json_path, 'r', encoding='utf-8') as f:
-        products_data = json.load(f)
-    
-    # Insert products
-    for product_data in products_data:
-        product = Product(
-            name=product_data['name'],
-            category=product_data['category'],
-            metal_type=product_data['metal_type'],
-            price=product_data['price'],
-            occasion=product_data['occasion'],
-            style=product_data['style'],
-            image_url=product_data['image_url'],
-            description=product_data['description'],
-            popularity=product_data.get('popularity', 50)
-        )
-        db.add(product)
+    db.close()
     
-    db.commit()
-    print(f"✅ Successfully loaded {len(products_data)} products into database!")
+    # Stream JSON file into the database in batches
+    json_path = os.path.join(project_root, 'data', 'sample_products.json')
+    stats = import_catalog(json_path, default_popularity=50)
     
-    db.close()
+    print(f"✅ Successfully loaded {stats['rows']} products into database!")
 
 if __name__ == '__main__':
     print("🔄 Loading sample products into database...")
@@ -0,0 +1,123 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response, jsonify, Response
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config.settings import HTTP_CACHE_SIZE
+
+# Mixed into versions that only exist inside this worker (e.g. in-memory
+# counters), so two workers never produce the same ETag for different data
+PROCESS_TAG = uuid.uuid4().hex
+
+
+class ResponseCache:
+    """
+    Serialized responses of read endpoints, keyed by ETag, plus hit counters
+    """
+
+    def __init__(self, max_size=HTTP_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'not_modified': 0, 'hits': 0, 'misses': 0}
+
+    def get(self, etag):
+        with self.lock:
+            entry = self.entries.get(etag)
+            if entry is not None:
+                self.entries.move_to_end(etag)
+            return entry
+
+    def set(self, etag, body, mimetype):
+        with self.lock:
+            self.entries[etag] = (body, mimetype)
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.lock:
+            requests = sum(self.counters.values())
+            served = self.counters['not_modified'] + self.counters['hits']
+            return {
+                **self.counters,
+                'size': len(self.entries),
+                'hit_rate': round(served / requests, 4) if requests else None
+            }
+
+
+_cache = ResponseCache()
+
+
+def http_cache_stats():
+    """Response cache counters (304s, body cache hits, misses, hit rate)"""
+    return _cache.stats()
+
+
+def compute_etag(version):
+    """Strong ETag for the current request path + query string at a data version"""
+    query = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    raw = f'{request.path}?{query}|{version}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_response(version_fn, cache_control):
+    """
+    Conditional GET support for a read endpoint
+
+    version_fn(**view_args) returns a value that changes whenever the
+    response would change. It is turned into a strong ETag: a matching
+    If-None-Match gets 304 Not Modified, and a known ETag is served from the
+    serialized response cache without calling the view. Only non-streamed
+    200 responses are cached. If version_fn fails, the error is returned as
+    the views return theirs (JSON, status 500).
+
+    Args:
+        version_fn: callable taking the view's URL arguments
+        cache_control: Cache-Control header value
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**view_args):
+            try:
+                etag = compute_etag(version_fn(**view_args))
+            except Exception as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 500
+
+            if etag in request.if_none_match:
+                _cache.count('not_modified')
+                response = Response(status=304)
+            else:
+                entry = _cache.get(etag)
+                if entry is not None:
+                    _cache.count('hits')
+                    body, mimetype = entry
+                    response = Response(body, status=200, mimetype=mimetype)
+                else:
+                    _cache.count('misses')
+                    response = make_response(view(**view_args))
+                    if response.status_code != 200:
+                        return response
+                    # Streamed bodies are never buffered into the cache
+                    if not response.is_streamed:
+                        _cache.set(etag, response.get_data(), response.mimetype)
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
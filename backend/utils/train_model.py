@@ -0,0 +1,120 @@
+import argparse
+import shutil
+import time
+from datetime import datetime
+import numpy as np
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from backend.models import init_db, get_db
+from backend.services.collaborative_filter import train_item_model
+from backend.services.content_similarity import train_content_model
+from backend.services.model_store import CURRENT_FILE, ITEM_MODEL_ARRAYS, read_current_version
+from config.settings import MODEL_ARTIFACTS_DIR, MODEL_KEEP_VERSIONS, CONTENT_MODEL_ARTIFACTS_DIR
+
+
+def write_artifacts(model, version, artifacts_dir=MODEL_ARTIFACTS_DIR):
+    """
+    Write model arrays as .npy files into a new version directory and make it
+    the CURRENT version
+
+    The version directory is fully written under a temporary name and renamed
+    into place before CURRENT is replaced, so readers never see a partial model.
+    """
+    os.makedirs(artifacts_dir, exist_ok=True)
+
+    version_dir = os.path.join(artifacts_dir, version)
+    tmp_dir = os.path.join(artifacts_dir, f'.{version}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    for name in ITEM_MODEL_ARRAYS:
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(getattr(model, name)))
+
+    os.rename(tmp_dir, version_dir)
+
+    # Atomically point CURRENT at the new version
+    current_tmp = os.path.join(artifacts_dir, f'.{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(current_tmp, os.path.join(artifacts_dir, CURRENT_FILE))
+
+
+def prune_versions(keep=MODEL_KEEP_VERSIONS, artifacts_dir=MODEL_ARTIFACTS_DIR):
+    """
+    Delete all but the newest `keep` versions (never the CURRENT one)
+    Workers still mapping a deleted version keep their pages until they swap
+    """
+    current = read_current_version(artifacts_dir)
+    versions = sorted(
+        name for name in os.listdir(artifacts_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(artifacts_dir, name))
+    )
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(artifacts_dir, name), ignore_errors=True)
+
+
+def train(artifacts_dir=MODEL_ARTIFACTS_DIR, keep=MODEL_KEEP_VERSIONS, trainer=train_item_model):
+    """
+    Train a neighbour model and publish it
+
+    Args:
+        trainer: train_item_model (from interactions) or train_content_model
+            (from product text and attributes)
+
+    Returns:
+        new version name, or None if there was not enough data
+    """
+    init_db()
+    db = get_db()
+    version = datetime.utcnow().strftime('v%Y%m%d-%H%M%S-%f')
+
+    try:
+        model = trainer(db, version)
+    finally:
+        db.close()
+
+    if model is None:
+        return None
+
+    write_artifacts(model, version, artifacts_dir)
+    prune_versions(keep, artifacts_dir)
+    return version
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the recommendation models')
+    parser.add_argument('--model', choices=('item', 'content', 'all'), default='all',
+                        help='collaborative filtering (item), content similarity, or both')
+    parser.add_argument('--artifacts-dir', default=MODEL_ARTIFACTS_DIR)
+    parser.add_argument('--content-artifacts-dir', default=CONTENT_MODEL_ARTIFACTS_DIR)
+    parser.add_argument('--keep', type=int, default=MODEL_KEEP_VERSIONS,
+                        help='number of model versions to keep on disk')
+    args = parser.parse_args()
+
+    if args.model in ('item', 'all'):
+        print("🧠 Training collaborative filtering model...")
+        started = time.time()
+        version = train(args.artifacts_dir, args.keep)
+
+        if version is None:
+            print("⚠️  Not enough interaction data to train a model.")
+        else:
+            print(f"✅ Published model {version} in {time.time() - started:.1f}s")
+
+    if args.model in ('content', 'all'):
+        print("🧠 Training content similarity model...")
+        started = time.time()
+        version = train(args.content_artifacts_dir, args.keep, train_content_model)
+
+        if version is None:
+            print("⚠️  No products to train on.")
+        else:
+            print(f"✅ Published content model {version} in {time.time() - started:.1f}s")
@@ -0,0 +1,98 @@
+"""
+Write load on /api/chatbot/message from several worker processes, per
+SQLite profile
+
+Each process runs its own app (as a gunicorn worker does) and holds
+conversations to completion for a fixed time; every completed conversation
+is written to the shared database in one transaction. Reports turns and
+conversations written per second, turn latency and failed requests.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from common import describe, seed_products, use_scratch_database
+
+from config.settings import SQLITE_PROFILES
+
+
+def seed(count):
+    seed_products(count)
+
+
+def worker(seconds, start, results):
+    """Hold conversations until the deadline; puts (turns, written, errors, latencies)"""
+    from backend.app import create_app
+
+    client = create_app(run_bootstrap=False).test_client()
+    turns = written = errors = 0
+    latencies = []
+    response = session_id = None
+
+    start.wait()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if response is None:
+            reply = client.post('/api/chatbot/start')
+        else:
+            answer = response['options'][0] if response.get('options') else 'any'
+            reply = client.post('/api/chatbot/message', json={'session_id': session_id, 'message': answer})
+        latencies.append((time.perf_counter() - started) * 1000)
+        turns += 1
+
+        if reply.status_code != 200:
+            errors += 1
+            response = None
+            continue
+        response = reply.get_json()['data']
+        session_id = response.get('session_id', session_id)
+        if 'products' in response:
+            written += 1
+            response = None
+
+    results.put((turns, written, errors, latencies))
+
+
+def run(profile, workers, seconds, products):
+    """Load a fresh database with the given profile; returns the merged results"""
+    use_scratch_database()
+    os.environ['SQLITE_PROFILE'] = profile
+    context = multiprocessing.get_context('spawn')
+
+    seeder = context.Process(target=seed, args=(products,))
+    seeder.start()
+    seeder.join()
+
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(seconds, start, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    # Let every worker import and build its app before the clock starts
+    time.sleep(3)
+    start.set()
+
+    totals = [0, 0, 0, []]
+    for _ in processes:
+        for i, value in enumerate(results.get()):
+            totals[i] += value
+    for process in processes:
+        process.join()
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-worker write load on /api/chatbot/message')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--profiles', nargs='+', default=sorted(SQLITE_PROFILES), choices=sorted(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"🏋️  {args.workers} workers x {args.seconds:g}s, first option answered each time")
+    for profile in args.profiles:
+        turns, written, errors, latencies = run(profile, args.workers, args.seconds, args.products)
+        print(f"  {profile:<11} {turns / args.seconds:8,.0f} turns/sec  {written / args.seconds:7,.1f} writes/sec  "
+              f"{errors} errors  {describe(latencies)}")
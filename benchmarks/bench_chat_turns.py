@@ -0,0 +1,67 @@
+"""
+Database commits per chat turn and turn latency, before and after the
+session store
+
+"before" replays the old write pattern: a commit for each message and for
+each state change, with the session re-read before the state is updated.
+"after" is the service as shipped: turns stay in the session store and the
+session is written in one transaction when the conversation completes.
+"""
+import argparse
+
+from sqlalchemy import event
+
+from common import conversation, describe, seed_products, timed, use_scratch_database
+
+use_scratch_database()
+
+from backend.models import engine
+from backend.services.chatbot_service import ChatbotService
+from backend.services.session_store import MemorySessionStore, load_session_state, persist_session_state
+
+commits = [0]
+
+
+@event.listens_for(engine, 'commit')
+def _count_commit(conn):
+    commits[0] += 1
+
+
+class WriteEachChange(ChatbotService):
+    """The per-message write pattern the session store replaced"""
+
+    def _add_to_history(self, session, message, sender):
+        super()._add_to_history(session, message, sender)
+        persist_session_state(session)
+
+    def _update_session_state(self, session, new_state):
+        load_session_state(session.session_id)
+        super()._update_session_state(session, new_state)
+        persist_session_state(session)
+
+
+def run(service_class, turns):
+    service = service_class(store=MemorySessionStore())
+    try:
+        turn = conversation(service)
+        turn()
+        before = commits[0]
+        latencies = timed(turn, turns)
+        return (commits[0] - before) / turns, latencies
+    finally:
+        service.store.flush_all()
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Commits per chat turn and turn latency')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--turns', type=int, default=2000)
+    args = parser.parse_args()
+
+    seed_products(args.products)
+
+    print(f"💬 {args.turns:,} turns, first option answered each time ({args.products:,} products)")
+    for label, service_class in (('before (write each change)', WriteEachChange), ('after (session store)', ChatbotService)):
+        per_turn, latencies = run(service_class, args.turns)
+        print(f"  {label:<28} {per_turn:5.2f} commits/turn  {describe(latencies)}")
@@ -0,0 +1,69 @@
+"""
+Chat turns per second through the conversation graph
+
+Sessions stay in a store that never writes, so this measures dispatch,
+answer parsing and option counting without the database writes.
+"""
+import argparse
+import time
+
+from common import conversation, seed_products, use_scratch_database
+
+use_scratch_database()
+
+from backend.services.chatbot_service import ChatbotService
+
+SENTENCE = 'a modern gold ring for a wedding, under 50k'
+
+
+class NoWriteStore:
+    """Sessions in a dict, never written to the database"""
+
+    def __init__(self):
+        self.sessions = {}
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def save(self, state):
+        self.sessions[state.session_id] = state
+
+
+def typed(service):
+    """One sentence answering every question, after the welcome"""
+    state = {'session_id': None}
+
+    def turn():
+        if state['session_id'] is None:
+            state['session_id'] = service.start_session()['session_id']
+        else:
+            service.process_message(state['session_id'], SENTENCE)
+            state['session_id'] = None
+
+    return turn
+
+
+def turns_per_second(make_turn, turns):
+    service = ChatbotService(store=NoWriteStore())
+    try:
+        turn = make_turn(service)
+        turn()
+        started = time.perf_counter()
+        for _ in range(turns):
+            turn()
+        return turns / (time.perf_counter() - started)
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chat turns per second')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--turns', type=int, default=20000)
+    args = parser.parse_args()
+
+    seed_products(args.products)
+
+    print(f"🔁 {args.turns:,} turns, no database writes ({args.products:,} products)")
+    print(f"  options tapped       {turns_per_second(conversation, args.turns):>10,.0f} turns/sec")
+    print(f"  one typed sentence   {turns_per_second(typed, args.turns):>10,.0f} turns/sec")
@@ -0,0 +1,65 @@
+import argparse
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.services.option_matcher import OptionMatcher
+from config.settings import METAL_TYPES, OCCASIONS, STYLES, CATEGORIES
+
+# Answers as users type them: tapped buttons, short words, whole sentences
+CORPUS = [
+    'Gold', 'Silver', 'Rose Gold', 'Platinum', 'Diamond',
+    'gold', 'rose gold', 'golden', 'plat', '22k gold', 'sterling silver',
+    'i want something in rose gold', 'maybe platinum?', 'white gold',
+    'Wedding', 'Anniversary', 'Birthday', 'Daily Wear', 'Gift',
+    'its for my sisters wedding', 'a birthday gift for mom', 'everyday office wear',
+    'diwali', 'engagement', 'gifting it to my wife on our anniversary',
+    'Traditional', 'Modern', 'Minimalist', 'Vintage', 'Contemporary',
+    'something simple and dainty', 'temple jewellery', 'retro look', 'trendy',
+    'Rings', 'Necklaces', 'Earrings', 'Bracelets', 'Bangles', 'Pendants', 'Chains',
+    'engagement ring', 'gold earrings', 'a pair of jhumkas', 'neck', 'kada',
+    'i am looking for a nice necklace set for the wedding', 'no idea, you choose',
+    'show me rings under 20k', 'hmm', 'earring',
+]
+
+
+def substring_match(user_input, valid_options):
+    """The matcher it replaced: two substring checks per option"""
+    user_input = user_input.lower().strip()
+    for option in valid_options:
+        if option.lower() in user_input or user_input in option.lower():
+            return option
+    return None
+
+
+def run(match, option_lists, rounds):
+    """Messages matched per second against every option list"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for options, matcher in option_lists:
+            for message in CORPUS:
+                match(matcher, options, message)
+    elapsed = time.perf_counter() - started
+    return rounds * len(option_lists) * len(CORPUS) / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Option matcher throughput')
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    option_lists = [(options, OptionMatcher(options)) for options in (METAL_TYPES, OCCASIONS, STYLES, CATEGORIES)]
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    compiled = run(lambda matcher, options, message: matcher.match(message), option_lists, args.rounds)
+    free_text = run(lambda matcher, options, message: matcher.find(message.lower()), option_lists, args.rounds)
+    baseline = run(lambda matcher, options, message: substring_match(message, options), option_lists, args.rounds)
+
+    print(f"🧩 {len(CORPUS)} messages x {len(option_lists)} questions x {args.rounds} rounds "
+          f"(matchers compiled in {compile_ms:.1f}ms)")
+    print(f"  OptionMatcher.match  {compiled:>12,.0f} messages/sec")
+    print(f"  OptionMatcher.find   {free_text:>12,.0f} messages/sec")
+    print(f"  substring scan       {baseline:>12,.0f} messages/sec")
@@ -0,0 +1,67 @@
+"""
+Full-text product search latency as the catalog grows
+
+Times search_products (FTS5, BM25 ranked) for common queries, a prefix
+still being typed, a filtered search and a deep page, against a LIKE scan
+over name and description, at each catalog size.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from common import describe, seed_products, timed, use_scratch_database
+
+use_scratch_database()
+
+from backend.models import get_db
+from backend.services.product_search import search_products
+
+QUERIES = ['gold', 'floral ring', 'handcrafted silver bangle', 'kund', 'emerald neckl']
+
+
+def like_scan(db, query):
+    """Every word in name or description, by substring, most popular first (unranked)"""
+    conditions, params = [], {}
+    for i, word in enumerate(query.split()):
+        conditions.append(f'(name LIKE :w{i} OR description LIKE :w{i})')
+        params[f'w{i}'] = f'%{word}%'
+    return db.execute(
+        text(f"SELECT id FROM products WHERE {' AND '.join(conditions)} ORDER BY popularity DESC LIMIT 20"),
+        params
+    ).all()
+
+
+def deep_page(db, query, pages):
+    """Follow next_cursor pages deep; returns the last page"""
+    results = search_products(db, query)
+    for _ in range(pages - 1):
+        if results['next_cursor'] is None:
+            break
+        results = search_products(db, query, cursor=results['next_cursor'])
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Product search latency by catalog size')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    seeded = 0
+    for size in sorted(args.sizes):
+        # Grow the one catalog to each size
+        seed_products(size - seeded, start=seeded + 1)
+        seeded = size
+
+        db = get_db()
+        try:
+            print(f"🔍 {size:,} products ({args.repeat} runs each)")
+            for query in QUERIES:
+                print(f"  {query!r:<28} fts  {describe(timed(lambda: search_products(db, query), args.repeat))}")
+                print(f"  {'':<28} like {describe(timed(lambda: like_scan(db, query), args.repeat))}")
+            filtered = timed(lambda: search_products(db, 'gold', filters={'category': 'Rings'},
+                                                     min_price=10000, max_price=50000), args.repeat)
+            print(f"  {'gold, Rings, 10k-50k':<28} fts  {describe(filtered)}")
+            print(f"  {'gold, page 10':<28} fts  {describe(timed(lambda: deep_page(db, 'gold', 10), args.repeat))}")
+        finally:
+            db.close()
@@ -0,0 +1,113 @@
+"""
+Item-item collaborative filtering against the rule-based path
+
+Trains the neighbour model from synthetic interactions (time and peak
+memory at each size) and times recommendations with and without it.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from common import describe, seed_products, timed, use_scratch_database
+
+use_scratch_database()
+
+from backend.models import Interaction, engine, get_db
+from backend.services.collaborative_filter import build_interaction_matrix, top_k_neighbours, train_item_model
+from backend.services.recommendation_cache import get_recommendation_cache
+from backend.services.recommendation_engine import HybridRecommendationEngine
+from config.settings import ACTION_WEIGHTS, CF_FETCH_SIZE, METAL_TYPES, OCCASIONS, STYLES, CATEGORIES
+
+
+def synthetic_interactions(count, sessions, products, seed=7, chunk_size=CF_FETCH_SIZE):
+    """
+    Yield chunks of (session_id, product_id, action_type) rows
+    Sessions browse a few neighbouring products, so items have real neighbours
+    """
+    rng = random.Random(seed)
+    actions = list(ACTION_WEIGHTS)
+    chunk = []
+    for _ in range(count):
+        session = rng.randrange(sessions)
+        product = (session * 7 + rng.randrange(25)) % products + 1
+        chunk.append((f's{session}', product, rng.choice(actions)))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bench_training(interactions, products):
+    """Matrix build + top-k neighbours: seconds and peak traced memory"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    matrix, _ = build_interaction_matrix(synthetic_interactions(interactions, interactions // 10, products))
+    top_k_neighbours(matrix)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, matrix
+
+
+def random_preferences(rng):
+    budget_min = rng.choice([0, 10000, 25000, 50000])
+    return {
+        'budget_min': budget_min,
+        'budget_max': budget_min * 2 + 10000,
+        'metal_type': rng.choice(METAL_TYPES),
+        'occasion': rng.choice(OCCASIONS),
+        'style': rng.choice(STYLES),
+        'category': rng.choice(CATEGORIES)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Collaborative filtering vs rule-based recommendations')
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--interactions', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"🧠 Training on synthetic interactions ({args.products:,} products)")
+    for count in args.interactions:
+        seconds, peak, matrix = bench_training(count, args.products)
+        print(f"  {count:>10,} interactions: {seconds:6.2f}s, peak {peak / 2**20:7.1f} MiB, "
+              f"{matrix.shape[0]:,} sessions x {matrix.shape[1]:,} products, {matrix.nnz:,} pairs")
+
+    seed_products(args.products)
+    # The served model is trained by train_model.py's path, from the interactions table
+    interactions = args.interactions[0]
+    with engine.begin() as conn:
+        for chunk in synthetic_interactions(interactions, interactions // 10, args.products):
+            conn.execute(Interaction.__table__.insert(), [
+                {'session_id': session_id, 'product_id': product_id, 'action_type': action_type}
+                for session_id, product_id, action_type in chunk
+            ])
+
+    db = get_db()
+    try:
+        model = train_item_model(db)
+
+        recommender = HybridRecommendationEngine(db)
+        rng = random.Random(1)
+        preferences = [random_preferences(rng) for _ in range(args.requests)]
+        cache = get_recommendation_cache()
+
+        def rule_based():
+            cache.clear()
+            recommender._rule_based_filter(preferences[rng.randrange(len(preferences))])
+
+        def hybrid():
+            cache.clear()
+            chosen = preferences[rng.randrange(len(preferences))]
+            rule = recommender._rule_based_filter(chosen)
+            recommender._merge_recommendations(rule, recommender._get_similar_products(model, chosen, rule))
+
+        rule_based()
+        print(f"⚡ Recommendations ({args.requests} requests, uncached)")
+        print(f"  rule-based          {describe(timed(rule_based, args.requests))}")
+        print(f"  rule-based + CF     {describe(timed(hybrid, args.requests))}")
+    finally:
+        db.close()
@@ -0,0 +1,113 @@
+"""
+Helpers shared by the benchmark scripts: a scratch database, a synthetic
+catalog and latency percentiles
+"""
+import random
+import tempfile
+import time
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ['elegant', 'classic', 'handcrafted', 'floral', 'twisted', 'polished', 'heritage', 'royal',
+         'delicate', 'bold', 'kundan', 'filigree', 'solitaire', 'pearl', 'emerald', 'ruby']
+
+
+def use_scratch_database():
+    """
+    Point the app at an empty scratch database
+    Call before anything imports backend.models
+
+    Returns:
+        the scratch directory
+    """
+    directory = tempfile.mkdtemp(prefix='jewelry-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ['AUTO_BOOTSTRAP'] = '0'
+    return directory
+
+
+def synthetic_products(count, seed=42, start=1):
+    """Yield product rows with the chatbot's option values and random prices"""
+    from config.settings import METAL_TYPES, OCCASIONS, STYLES, CATEGORIES
+
+    rng = random.Random(seed + start)
+    for i in range(start, start + count):
+        category = rng.choice(CATEGORIES)
+        metal = rng.choice(METAL_TYPES)
+        words = rng.sample(WORDS, 3)
+        yield {
+            'sku': f'BENCH-{i}',
+            'name': f"{words[0].title()} {metal} {category[:-1]}",
+            'description': f"{words[1].title()} {words[2]} {category.lower()} in {metal.lower()}",
+            'category': category,
+            'metal_type': metal,
+            'occasion': rng.choice(OCCASIONS),
+            'style': rng.choice(STYLES),
+            'price': float(rng.randrange(1000, 200000, 500)),
+            'popularity': rng.randrange(0, 100)
+        }
+
+
+def seed_products(count, chunk_size=10000, start=1):
+    """Create the schema and insert count synthetic products (SKUs from start)"""
+    from backend.models import Product, engine, init_db
+    from backend.services.product_index import bump_catalog_version
+
+    init_db()
+    batch = []
+    with engine.begin() as conn:
+        for row in synthetic_products(count, start=start):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                conn.execute(Product.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Product.__table__.insert(), batch)
+    bump_catalog_version()
+
+
+def conversation(service):
+    """Answer every question with the first option offered; returns a turn function"""
+    from backend.services.conversation_flow import FINAL_STATE
+
+    state = {'session_id': None, 'response': None}
+
+    def turn():
+        response = state['response']
+        if response is None or response.get('conversation_state') == FINAL_STATE:
+            response = service.start_session()
+            state['session_id'] = response['session_id']
+        else:
+            answer = response['options'][0] if response.get('options') else 'any'
+            response = service.process_message(state['session_id'], answer)
+        state['response'] = response
+
+    return turn
+
+
+def timed(fn, repeat):
+    """Run fn repeat times; returns the latencies in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def percentile(samples, p):
+    """p-th percentile (0-100) of a list of numbers"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def describe(latencies):
+    """p50 / p99 / max of millisecond latencies, for printing"""
+    return (f"p50 {percentile(latencies, 50):7.2f}ms  p99 {percentile(latencies, 99):7.2f}ms  "
+            f"max {max(latencies):7.2f}ms")
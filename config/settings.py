@@ -5,13 +5,55 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Database configuration
 DATABASE_PATH = os.path.join(BASE_DIR, 'database', 'ecommerce.db')
-SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
+# DATABASE_URL points the app at another database (e.g. a scratch one for tests)
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f'sqlite:///{DATABASE_PATH}')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Connection pool
+DB_POOL_SIZE = 5                          # Persistent connections per worker
+DB_MAX_OVERFLOW = 10                      # Extra connections allowed under bursts
+DB_POOL_TIMEOUT = 30                      # Seconds to wait for a free connection
+DB_POOL_RECYCLE = 1800                    # Replace connections older than this (seconds)
+DB_POOL_PRE_PING = True                   # Validate connections on checkout
+SQLITE_BUSY_TIMEOUT = 30                  # Seconds to wait on a locked database
+
+# SQLite PRAGMAs applied to every new connection, by profile
+# (select with the SQLITE_PROFILE environment variable)
+SQLITE_PROFILES = {
+    # Concurrent gunicorn workers: readers don't block the writer, and commits
+    # only fsync at WAL checkpoints
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,   # Bytes of the file memory-mapped
+        'cache_size': -64 * 1024,         # Negative = KiB (64 MB page cache)
+        'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000,
+        'temp_store': 'MEMORY'
+    },
+    # SQLite defaults (rollback journal, full fsync on every commit)
+    'default': {
+        'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000
+    }
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+if SQLITE_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(
+        f"Unknown SQLITE_PROFILE {SQLITE_PROFILE!r} (valid profiles: {', '.join(sorted(SQLITE_PROFILES))})"
+    )
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]
+
 # Flask configuration
 SECRET_KEY = 'your-secret-key-change-in-production'
 DEBUG = True
 
+# Startup
+# Under gunicorn the master bootstraps once (gunicorn.conf.py) and defaults
+# AUTO_BOOTSTRAP to 0 for the workers. Elsewhere set it to 0 only when the
+# bootstrap command already ran on the same filesystem.
+AUTO_BOOTSTRAP = os.environ.get('AUTO_BOOTSTRAP', '1') == '1'
+BOOTSTRAP_LOCK_PATH = os.path.join(BASE_DIR, 'database', '.bootstrap.lock')
+COLD_START_TARGET_SECONDS = 1.5           # Warn when a worker takes longer to boot
+
 # CORS configuration
 CORS_ORIGINS = [
     # Frontend servers
@@ -31,10 +73,103 @@ CORS_ORIGINS = [
     '*'
 ]
 
+# Catalog import
+CATALOG_IMPORT_CHUNK_SIZE = 5000          # Rows inserted per transaction
+
+# Interaction ingestion (/api/chatbot/track)
+INTERACTION_QUEUE_SIZE = 10000            # Bounded queue; full queue = backpressure (503)
+INTERACTION_BATCH_SIZE = 500              # Events written per transaction
+INTERACTION_FLUSH_SECONDS = 1.0           # Max time an event waits before being written
+INTERACTION_ENQUEUE_TIMEOUT = 0.05        # Seconds a request waits on a full queue
+INTERACTION_LOG_ENABLED = False           # Append accepted events to disk before queueing
+INTERACTION_LOG_DIR = os.path.join(BASE_DIR, 'database', 'interaction_log')
+INTERACTION_LOG_FSYNC = False             # fsync every append (slower, survives power loss)
+INTERACTION_LOG_SEGMENT_EVENTS = 10000    # Events per log segment (deleted once written)
+
+# Popularity counter (per-worker, merged into products periodically)
+POPULARITY_COUNTER_SHARDS = 16            # Lock stripes for concurrent increments
+POPULARITY_MERGE_SECONDS = 5.0            # How often increments are written
+
+# Trending products (time-decayed interaction scores)
+TRENDING_HALF_LIFE_HOURS = 24             # An interaction's weight halves every day
+TRENDING_TOP_K = 50                       # Products kept per bucket (all / category / metal)
+TRENDING_REFRESH_SECONDS = 5              # How often new interactions are read
+TRENDING_FETCH_SIZE = 10000               # Interaction rows read per round trip
+
+# Chat session state store
+# 'memory' keeps in-progress sessions in the worker (gunicorn.conf.py runs a
+# single worker with it); 'redis' shares them between workers (needs redis)
+SESSION_STORE_BACKEND = os.environ.get('SESSION_STORE_BACKEND', 'memory')
+SESSION_STORE_MAX_SESSIONS = 10000        # Sessions held per worker (memory backend)
+SESSION_STORE_TTL_SECONDS = 1800          # Idle sessions are written out and dropped
+SESSION_STORE_SWEEP_SECONDS = 60          # How often idle sessions are swept
+SESSION_STORE_SWEEP_BATCH = 500           # Idle sessions written per sweep (redis)
+SESSION_STORE_LOCK_SECONDS = 10           # Longest a session's database write may hold its lock (redis)
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+# Conversation history paging
+HISTORY_PAGE_SIZE = 50                    # Messages per page by default
+HISTORY_MAX_PAGE_SIZE = 500               # Upper bound for ?limit=
+HISTORY_EXPORT_FETCH_SIZE = 500           # Rows per fetch when streaming an export
+
+# HTTP response caching (ETag / 304) for read endpoints
+HTTP_CACHE_SIZE = 512                     # Serialized responses kept per worker
+TRENDING_CACHE_MAX_AGE = 30               # Seconds browsers/CDNs may reuse /trending
+
+# Product search (/api/products/search, SQLite FTS5)
+SEARCH_PAGE_SIZE = 20                     # Results per page by default
+SEARCH_MAX_PAGE_SIZE = 100                # Upper bound for ?limit=
+SEARCH_MAX_TERMS = 10                     # Query words used (the rest are ignored)
+SEARCH_COLUMN_WEIGHTS = {                 # BM25 weight of a match in each column
+    'name': 10.0,
+    'description': 1.0,
+    'category': 5.0,
+    'metal_type': 5.0,
+    'style': 3.0
+}
+
 # Recommendation engine settings
 MAX_RECOMMENDATIONS = 10
 MIN_SCORE_THRESHOLD = 0.3
 
+# In-memory product index (columnar snapshot used for rule-based scoring)
+PRODUCT_INDEX_MIN_REBUILD_SECONDS = 1     # Coalesce rebuilds after catalog writes
+PRODUCT_INDEX_MAX_AGE_SECONDS = 60        # Pick up writes made by other workers
+PRODUCT_INDEX_FETCH_SIZE = 10000          # Rows fetched per round trip when rebuilding
+
+# Recommendation result cache (keyed by preference tuple)
+RECOMMENDATION_CACHE_SIZE = 10000         # ~4,900 tuples cover every chatbot answer
+RECOMMENDATION_CACHE_WARMUP = False       # Precompute every preference tuple at boot
+
+# Batch recommendations (/api/recommendations/batch)
+RECOMMENDATION_BATCH_MAX_SIZE = 100       # Preference sets per request
+RECOMMENDATION_BATCH_MAX_CELLS = 4000000  # Preference sets x attribute combinations scored per block (~32 MB)
+
+# Collaborative filtering (item-item, Phase 2)
+ACTION_WEIGHTS = {
+    'view': 1.0,
+    'click': 2.0,
+    'like': 3.0,
+    'add_to_cart': 5.0
+}
+CF_NEIGHBOURS = 20                        # Top-k similar items kept per product
+CF_BLOCK_SIZE = 1024                      # Items per similarity block (bounds peak memory)
+CF_FETCH_SIZE = 50000                     # Interaction rows read per chunk
+CF_MIN_INTERACTIONS = 50                  # Distinct session/product pairs needed to train
+
+# Trained model artifacts (written by backend/utils/train_model.py)
+MODEL_ARTIFACTS_DIR = os.path.join(BASE_DIR, 'models')
+MODEL_KEEP_VERSIONS = 3                   # Older versions are pruned after training
+MODEL_RELOAD_CHECK_SECONDS = 30           # How often workers look for a new version
+
+# Content-based similarity (text + attributes), published like the CF model
+CONTENT_MODEL_ARTIFACTS_DIR = os.path.join(BASE_DIR, 'content_models')
+CONTENT_NEIGHBOURS = 20                   # Similar products kept per product
+CONTENT_HASH_FEATURES = 2 ** 18           # Hashed feature space for text and attributes
+CONTENT_ATTRIBUTE_WEIGHT = 0.5            # Share of similarity from category/metal/occasion/style
+CONTENT_BLOCK_SIZE = 256                  # Products scored per dense block (bounds peak memory)
+CONTENT_FETCH_SIZE = 5000                 # Product rows read per chunk
+
 # Chatbot configuration
 CONVERSATION_STATES = [
     'started',
@@ -55,8 +190,39 @@ BUDGET_RANGES = {
     '50k_plus': (50000, 1000000)
 }
 
+# Budget choices offered in the chat (one per BUDGET_RANGES bucket)
+BUDGET_OPTIONS = ['Under ₹10,000', '₹10,000 - ₹25,000', '₹25,000 - ₹50,000', '₹50,000+']
+
 # Valid options
 METAL_TYPES = ['Gold', 'Silver', 'Platinum', 'Diamond', 'Rose Gold']
 OCCASIONS = ['Wedding', 'Anniversary', 'Birthday', 'Daily Wear', 'Gift', 'Engagement', 'Festival']
 STYLES = ['Traditional', 'Modern', 'Minimalist', 'Vintage', 'Contemporary']
 CATEGORIES = ['Rings', 'Necklaces', 'Earrings', 'Bracelets', 'Bangles', 'Pendants', 'Chains']
+
+# Other ways users name an option (matched as whole phrases, longest first)
+OPTION_SYNONYMS = {
+    'Gold': ['yellow gold', '22k', '22 carat', '18k', '24k'],
+    'Silver': ['sterling', 'sterling silver', 'chandi'],
+    'Platinum': ['pt950'],
+    'Diamond': ['solitaire'],
+    'Rose Gold': ['pink gold', 'rosegold'],
+    'Wedding': ['marriage', 'shaadi', 'bridal'],
+    'Anniversary': ['anniversaries'],
+    'Birthday': ['bday', 'birth day'],
+    'Daily Wear': ['daily', 'everyday', 'every day', 'office', 'casual', 'regular'],
+    'Gift': ['present', 'gifting'],
+    'Engagement': ['proposal', 'roka'],
+    'Festival': ['festive', 'diwali', 'eid', 'puja'],
+    'Traditional': ['ethnic', 'classic', 'temple'],
+    'Modern': ['trendy', 'stylish'],
+    'Minimalist': ['minimal', 'simple', 'subtle', 'dainty'],
+    'Vintage': ['antique', 'retro'],
+    'Contemporary': ['fusion'],
+    'Rings': ['engagement ring', 'wedding ring', 'wedding band', 'band', 'solitaire ring'],
+    'Necklaces': ['necklace set', 'choker', 'mangalsutra', 'haar'],
+    'Earrings': ['ear rings', 'studs', 'jhumka', 'hoops', 'drops'],
+    'Bracelets': ['wristband'],
+    'Bangles': ['kada', 'kangan', 'churi'],
+    'Pendants': ['locket', 'pendant set'],
+    'Chains': ['neck chain']
+}
@@ -1,6 +1,7 @@
 -- Products table
 CREATE TABLE IF NOT EXISTS products (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sku TEXT,
     name TEXT NOT NULL,
     category TEXT,
     metal_type TEXT,
@@ -45,14 +46,64 @@ CREATE TABLE IF NOT EXISTS interactions (
     product_id INTEGER,
     action_type TEXT, -- 'view', 'click', 'like', 'add_to_cart'
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    event_id TEXT, -- assigned at ingestion, unique
     FOREIGN KEY (session_id) REFERENCES user_sessions(session_id),
     FOREIGN KEY (product_id) REFERENCES products(id)
 );
 
 -- Create indexes for better query performance
+-- (mirrors the indexes declared on the SQLAlchemy models)
+CREATE UNIQUE INDEX IF NOT EXISTS ix_products_sku ON products(sku);
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
 CREATE INDEX IF NOT EXISTS idx_products_metal_type ON products(metal_type);
 CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
-CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON user_sessions(session_id);
-CREATE INDEX IF NOT EXISTS idx_interactions_session_id ON interactions(session_id);
-CREATE INDEX IF NOT EXISTS idx_interactions_product_id ON interactions(product_id);
+CREATE INDEX IF NOT EXISTS idx_products_popularity ON products(popularity);
+CREATE INDEX IF NOT EXISTS idx_history_session_id ON conversation_history(session_id, id);
+CREATE INDEX IF NOT EXISTS idx_interactions_session_timestamp ON interactions(session_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_interactions_product_timestamp ON interactions(product_id, timestamp);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_event_id ON interactions(event_id);
+
+-- Full-text product search (SQLite FTS5, kept in sync with products by triggers)
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, description, category, metal_type, style,
+    content='products', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, description, category, metal_type, style)
+    VALUES (new.id, new.name, new.description, new.category, new.metal_type, new.style);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category, metal_type, style)
+    VALUES ('delete', old.id, old.name, old.description, old.category, old.metal_type, old.style);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_update
+AFTER UPDATE OF name, description, category, metal_type, style ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category, metal_type, style)
+    VALUES ('delete', old.id, old.name, old.description, old.category, old.metal_type, old.style);
+    INSERT INTO products_fts(rowid, name, description, category, metal_type, style)
+    VALUES (new.id, new.name, new.description, new.category, new.metal_type, new.style);
+END;
+
+-- Version of the products table shared by every worker (HTTP cache ETags)
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_versions (name, version) VALUES ('products', 0);
+
+CREATE TRIGGER IF NOT EXISTS products_version_insert AFTER INSERT ON products BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_version_delete AFTER DELETE ON products BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_version_update AFTER UPDATE ON products BEGIN
+    UPDATE data_versions SET version = version + 1 WHERE name = 'products';
+END;
@@ -0,0 +1,38 @@
+import sys
+import os
+
+# The master bootstraps the database once (on_starting); workers skip it
+os.environ.setdefault('AUTO_BOOTSTRAP', '0')
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config.settings import SESSION_STORE_BACKEND
+
+
+def on_starting(server):
+    """
+    Bootstrap the database, then size the worker pool
+
+    The schema, migrations and seeding run once here, before any worker
+    forks, instead of in every worker at import time.
+
+    With the memory session store a single worker is run: each worker would
+    keep its own copy of a chat session, so a turn served by another worker
+    than the previous one restarts or forks the conversation. Set
+    SESSION_STORE_BACKEND=redis to run more workers.
+    """
+    from backend.models import engine
+    from backend.utils.bootstrap import bootstrap
+
+    bootstrap()
+    # Workers must not inherit the master's pooled connections
+    engine.dispose()
+
+    workers = server.cfg.workers
+    if SESSION_STORE_BACKEND == 'memory' and workers > 1:
+        server.log.warning(
+            "SESSION_STORE_BACKEND=memory keeps chat sessions in one worker: "
+            "starting 1 worker instead of %d (set SESSION_STORE_BACKEND=redis to run more)", workers
+        )
+        server.cfg.set('workers', 1)
+        server.num_workers = 1
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# Point the app at a scratch database before anything imports backend.models
+TEST_DIR = tempfile.mkdtemp(prefix='jewelry-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ['AUTO_BOOTSTRAP'] = '0'
+
+import pytest
+
+from backend.models import engine, init_db
+
+
+@pytest.fixture
+def empty_database():
+    """The scratch database, emptied (no tables)"""
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        path = engine.url.database + suffix
+        if os.path.exists(path):
+            os.remove(path)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def database(empty_database):
+    """The scratch database with the current schema"""
+    init_db()
+    return empty_database
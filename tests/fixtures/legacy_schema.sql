@@ -0,0 +1,58 @@
+-- Products table
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    category TEXT,
+    metal_type TEXT,
+    price REAL,
+    occasion TEXT,
+    style TEXT,
+    image_url TEXT,
+    description TEXT,
+    popularity INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- User sessions table (stores chatbot conversations and preferences)
+CREATE TABLE IF NOT EXISTS user_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT UNIQUE NOT NULL,
+    budget_min REAL,
+    budget_max REAL,
+    metal_type TEXT,
+    occasion TEXT,
+    style TEXT,
+    category TEXT,
+    conversation_state TEXT DEFAULT 'started',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Conversation history
+CREATE TABLE IF NOT EXISTS conversation_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT,
+    sender TEXT, -- 'user' or 'bot'
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES user_sessions(session_id)
+);
+
+-- Interaction tracking (for ML model training)
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT,
+    product_id INTEGER,
+    action_type TEXT, -- 'view', 'click', 'like', 'add_to_cart'
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES user_sessions(session_id),
+    FOREIGN KEY (product_id) REFERENCES products(id)
+);
+
+-- Create indexes for better query performance
+CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+CREATE INDEX IF NOT EXISTS idx_products_metal_type ON products(metal_type);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON user_sessions(session_id);
+CREATE INDEX IF NOT EXISTS idx_interactions_session_id ON interactions(session_id);
+CREATE INDEX IF NOT EXISTS idx_interactions_product_id ON interactions(product_id);
@@ -0,0 +1,165 @@
+"""
+Property-based corpus for the budget parser
+
+Amounts are generated with every notation the parser accepts (currency
+before or after, Western and Indian comma grouping, k / lakh / crore units)
+and embedded in messages; the parsed range must always contain them.
+"""
+from hypothesis import given, strategies as st
+
+from backend.services.budget_parser import (
+    BARE_AMOUNT_UNIT,
+    BUDGET_BUCKETS,
+    MIN_BARE_AMOUNT,
+    OPEN_BUDGET_MAX,
+    PRESET_BUDGETS,
+    parse_budget
+)
+from config.settings import BUDGET_OPTIONS, BUDGET_RANGES
+
+PREFIXES = ['₹', '₹ ', 'Rs.', 'Rs. ', 'Rs ', 'rs', 'INR', 'INR ', 'inr ']
+SUFFIXES = ['rs', ' rs', ' Rs.', ' rupees', ' INR']
+UNITS = {
+    1_000: ['k', 'K', ' k', ' thousand'],
+    100_000: ['l', ' lakh', ' lakhs', ' lac', ' lacs', 'L'],
+    10_000_000: [' cr', ' crore', ' crores']
+}
+
+
+def indian_grouping(n):
+    """1,50,000 style"""
+    text = str(n)
+    if len(text) <= 3:
+        return text
+    head, tail = text[:-3], text[-3:]
+    groups = []
+    while len(head) > 2:
+        head, group = head[:-2], head[-2:]
+        groups.insert(0, group)
+    return ','.join([head] + groups + [tail]) if head else ','.join(groups + [tail])
+
+
+@st.composite
+def plain_amounts(draw):
+    """(text, value, None) of a whole number of rupees, with currency if it is small"""
+    value = draw(st.integers(min_value=1, max_value=50_000_000))
+    number = draw(st.sampled_from([str(value), f'{value:,}', indian_grouping(value)]))
+    placement = draw(st.sampled_from(['none', 'prefix', 'suffix']))
+    if placement == 'none' and value < MIN_BARE_AMOUNT:
+        placement = 'prefix'
+    if placement == 'prefix':
+        number = draw(st.sampled_from(PREFIXES)) + number
+    elif placement == 'suffix':
+        number += draw(st.sampled_from(SUFFIXES))
+    return number, value, None
+
+
+@st.composite
+def unit_amounts(draw):
+    """(text, value, multiplier) written with a unit: 25k, 1.5 lakh, Rs 2 crore"""
+    multiplier = draw(st.sampled_from(sorted(UNITS)))
+    tenths = draw(st.integers(min_value=1, max_value=9999))
+    mantissa = str(tenths // 10) if tenths % 10 == 0 else f'{tenths // 10}.{tenths % 10}'
+    text = mantissa + draw(st.sampled_from(UNITS[multiplier]))
+    if draw(st.booleans()):
+        text = draw(st.sampled_from(PREFIXES)) + text
+    return text, tenths * multiplier / 10, multiplier
+
+
+amounts = st.one_of(plain_amounts(), unit_amounts())
+
+# Words around an amount that are not amounts themselves
+FILLERS = st.sampled_from(['', 'my budget is ', 'around ', 'something for ', 'i can spend '])
+ENDINGS = st.sampled_from(['', ' only', ' for a gift', '!', ' please'])
+
+
+def approx_equal(a, b):
+    return abs(a - b) <= 1e-6 * max(1, abs(b))
+
+
+@given(FILLERS, amounts, ENDINGS)
+def test_single_amount_lies_in_its_range(filler, amount, ending):
+    text, value, _ = amount
+    budget_min, budget_max = parse_budget(filler + text + ending)
+    assert budget_min <= value + 1e-6 and value - 1e-6 <= budget_max
+
+
+@given(amounts)
+def test_single_amount_picks_a_bucket(amount):
+    text, value, _ = amount
+    budget_min, budget_max = parse_budget(text)
+    bucket_low, bucket_high = BUDGET_BUCKETS[-1]
+    if value < bucket_high:
+        assert (budget_min, budget_max) in BUDGET_BUCKETS
+    else:
+        # Beyond every bucket: the top one, stretched to include the amount
+        assert budget_min == bucket_low and approx_equal(budget_max, value)
+
+
+@given(st.sampled_from([
+    'under ', 'below ', 'less than ', 'up to ', 'within ', 'max ', 'at most ',
+    'no more than ', 'not more than ', 'not over ', 'not above ', 'not exceeding '
+]), amounts)
+def test_upper_bound(word, amount):
+    text, value, _ = amount
+    budget_min, budget_max = parse_budget(word + text)
+    assert budget_min == 0 and approx_equal(budget_max, value)
+
+
+@given(st.sampled_from(['above ', 'over ', 'more than ', 'at least ', 'starting ']), amounts)
+def test_lower_bound(word, amount):
+    text, value, _ = amount
+    budget_min, budget_max = parse_budget(word + text)
+    assert approx_equal(budget_min, value) and approx_equal(budget_max, max(OPEN_BUDGET_MAX, value))
+
+
+@given(amounts, st.sampled_from([' - ', '-', ' to ', ' and ']), amounts)
+def test_range_of_two_amounts(low, separator, high):
+    (low_text, low_value, low_unit), (high_text, high_value, high_unit) = low, high
+    if low_unit is None and high_unit and low_value * high_unit < high_value:
+        # "₹10 - 25k" reads as 10k - 25k
+        low_value *= high_unit
+    budget_min, budget_max = parse_budget(low_text + separator + high_text)
+    assert approx_equal(budget_min, min(low_value, high_value))
+    assert approx_equal(budget_max, max(low_value, high_value))
+
+
+@given(st.integers(min_value=1, max_value=99), st.sampled_from(sorted(UNITS)), st.sampled_from(['-', ' - ', ' to ']))
+def test_range_shares_the_unit_of_its_upper_end(low, multiplier, separator):
+    # "10-25k" is 10,000 to 25,000
+    unit = UNITS[multiplier][0]
+    high = low + 1
+    assert parse_budget(f'{low}{separator}{high}{unit}') == (low * multiplier, high * multiplier)
+
+
+@given(
+    st.integers(min_value=1, max_value=MIN_BARE_AMOUNT - 1),
+    st.sampled_from(['rings', 'kids', 'pieces', 'gifts']),
+    amounts
+)
+def test_small_counts_are_not_amounts(count, noun, amount):
+    # "I have 2 rings and 30k": the count neither becomes an amount nor borrows the unit
+    text, _, _ = amount
+    assert parse_budget(f'i have {count} {noun} and {text}') == parse_budget(text)
+
+
+@given(st.integers(min_value=1, max_value=MIN_BARE_AMOUNT - 1))
+def test_small_bare_answers_are_thousands(number):
+    # Answering the budget question with "50" means ₹50,000, unless it is only mentioned
+    assert parse_budget(str(number)) == parse_budget(f'{number}k')
+    assert parse_budget(f'under {number}') == (0, number * BARE_AMOUNT_UNIT)
+    assert parse_budget(str(number), asked=False) is None
+
+
+def test_small_bare_range_is_thousands():
+    assert parse_budget('10 to 25') == (10_000, 25_000)
+
+
+@given(st.text())
+def test_any_text_gives_none_or_an_ordered_range(text):
+    budget = parse_budget(text)
+    assert budget is None or budget[0] <= budget[1]
+
+
+def test_preset_options_map_to_their_buckets():
+    assert [PRESET_BUDGETS[option.lower()] for option in BUDGET_OPTIONS] == list(BUDGET_RANGES.values())
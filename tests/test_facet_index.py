@@ -0,0 +1,103 @@
+"""
+Option counts, and answers that would leave nothing to recommend
+"""
+import pytest
+
+from backend.models import Product, get_db
+from backend.services import facet_index, product_index
+from backend.services.budget_parser import PRESET_BUDGETS
+from backend.services.chatbot_service import ChatbotService
+from backend.services.session_store import MemorySessionStore
+from config.settings import BUDGET_OPTIONS, METAL_TYPES
+
+# (metal, category, price): rose gold only from ₹25,000, one unpriced product.
+# All are modern gifts.
+PRODUCTS = [
+    ('Gold', 'Rings', 5000.0),
+    ('Gold', 'Rings', 10000.0),
+    ('Gold', 'Necklaces', 30000.0),
+    ('Silver', 'Rings', 2000.0),
+    ('Rose Gold', 'Earrings', 25000.0),
+    ('Rose Gold', 'Rings', 60000.0),
+    ('Gold', 'Chains', None),
+]
+
+BUDGETS = {option: PRESET_BUDGETS[option.lower()] for option in BUDGET_OPTIONS}
+
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    monkeypatch.setattr(product_index, '_index', None)
+    monkeypatch.setattr(facet_index, '_facets', None)
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'metal_type': metal,
+             'category': category, 'price': price, 'occasion': 'Gift', 'style': 'Modern',
+             'popularity': 0}
+            for i, (metal, category, price) in enumerate(PRODUCTS)
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def test_option_counts(catalog):
+    facets = facet_index.get_facet_index(catalog)
+    assert facets.option_counts('metal_type', {}, METAL_TYPES) == {
+        'Gold': 4, 'Silver': 1, 'Platinum': 0, 'Diamond': 0, 'Rose Gold': 2
+    }
+    # Other answers narrow the count, the field's own answer does not
+    assert facets.option_counts('metal_type', {'metal_type': 'Gold', 'category': 'Rings'}, METAL_TYPES) == {
+        'Gold': 2, 'Silver': 1, 'Platinum': 0, 'Diamond': 0, 'Rose Gold': 1
+    }
+    # Unpriced products never match a budget
+    assert facets.option_counts('category', {'budget_min': 0, 'budget_max': 10000}, ['Rings', 'Chains']) == {
+        'Rings': 3, 'Chains': 0
+    }
+
+
+def test_budget_counts(catalog):
+    facets = facet_index.get_facet_index(catalog)
+    # Bounds are inclusive: ₹10,000 and ₹25,000 count in both ranges they end
+    assert facets.budget_counts({}, BUDGETS) == {
+        'Under ₹10,000': 3, '₹10,000 - ₹25,000': 2, '₹25,000 - ₹50,000': 2, '₹50,000+': 1
+    }
+    # A budget already answered is replaced, not combined
+    assert facets.budget_counts({'metal_type': 'Rose Gold', 'budget_max': 1}, BUDGETS) == {
+        'Under ₹10,000': 0, '₹10,000 - ₹25,000': 1, '₹25,000 - ₹50,000': 1, '₹50,000+': 1
+    }
+
+
+@pytest.fixture
+def chatbot(catalog):
+    return ChatbotService(catalog, store=MemorySessionStore())
+
+
+def test_typed_answer_without_matches_is_asked_again(chatbot):
+    session_id = chatbot.start_session()['session_id']
+
+    response = chatbot.process_message(session_id, 'rose gold')
+    assert response['conversation_state'] == 'asking_budget'
+    assert response['options'] == ('₹10,000 - ₹25,000', '₹25,000 - ₹50,000', '₹50,000+')
+
+    # Not an option offered, and no rose gold piece costs that little
+    response = chatbot.process_message(session_id, 'under 10k')
+    assert response['conversation_state'] == 'asking_budget'
+    assert response['message'].startswith('Sorry, nothing matches ₹0 - ₹10,000')
+    assert response['options'] == ('₹10,000 - ₹25,000', '₹25,000 - ₹50,000', '₹50,000+')
+
+
+def test_unmatched_answer_in_a_longer_message_is_left_unanswered(chatbot):
+    session_id = chatbot.start_session()['session_id']
+
+    response = chatbot.process_message(session_id, 'rose gold necklace')
+    # No rose gold necklace: the metal is kept, the category asked later
+    assert response['conversation_state'] == 'asking_budget'
+    state = chatbot.store.get(session_id)
+    assert state.metal_type == 'Rose Gold' and state.category is None
+
+    for answer in ('₹25,000 - ₹50,000', 'gift', 'modern'):
+        response = chatbot.process_message(session_id, answer)
+    assert response['conversation_state'] == 'asking_category'
+    assert response['options'] == ('Earrings',)
+    assert response['option_counts'] == {'Earrings': 1}
@@ -0,0 +1,96 @@
+"""
+Conversation history pages: walking next_after_id, pending messages, the
+route's limits and the streamed export
+"""
+from datetime import datetime
+
+import pytest
+
+from backend.app import create_app
+from backend.models import ConversationHistory, UserSession, get_db
+from backend.services.chatbot_service import ChatbotService
+from backend.services.session_store import MemorySessionStore
+from config.settings import HISTORY_MAX_PAGE_SIZE
+
+MESSAGES = 30
+
+
+@pytest.fixture
+def history(database):
+    """Two sessions with interleaved messages"""
+    now = datetime.utcnow()
+    with database.begin() as conn:
+        conn.execute(UserSession.__table__.insert(), [
+            {'session_id': session_id, 'conversation_state': 'asking_style'} for session_id in ('s1', 's2')
+        ])
+        conn.execute(ConversationHistory.__table__.insert(), [
+            {'session_id': session_id, 'message': f'{session_id} message {i}', 'sender': 'user', 'timestamp': now}
+            for i in range(MESSAGES) for session_id in ('s1', 's2')
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def walk(chatbot, session_id, limit):
+    """Every page from the first one; returns the pages"""
+    pages = [chatbot.get_conversation_history(session_id, limit=limit)]
+    while pages[-1]['next_after_id'] is not None:
+        pages.append(chatbot.get_conversation_history(session_id, pages[-1]['next_after_id'], limit))
+    return pages
+
+
+@pytest.mark.parametrize('limit, sizes', [
+    (7, [7, 7, 7, 7, 2]),
+    # A last page that is exactly full has no next page
+    (10, [10, 10, 10]),
+    (MESSAGES, [MESSAGES]),
+    (100, [MESSAGES]),
+])
+def test_pages_cover_the_history_once(history, limit, sizes):
+    chatbot = ChatbotService(history, store=MemorySessionStore())
+    pages = walk(chatbot, 's1', limit)
+
+    assert [len(page['history']) for page in pages] == sizes
+    messages = [message for page in pages for message in page['history']]
+    assert [message['message'] for message in messages] == [f's1 message {i}' for i in range(MESSAGES)]
+    # next_after_id is the last ID of its page
+    for page in pages[:-1]:
+        assert page['next_after_id'] == page['history'][-1]['id']
+
+
+def test_pending_messages_are_paged(history):
+    store = MemorySessionStore()
+    chatbot = ChatbotService(history, store=store)
+    session = store.get('s1')
+    session.history.append(('not written yet', 'user', datetime.utcnow()))
+
+    last = walk(chatbot, 's1', 10)[-1]
+    assert last['history'][-1]['message'] == 'not written yet'
+    assert last['next_after_id'] is None
+
+
+def test_unknown_session_has_one_empty_page(history):
+    chatbot = ChatbotService(history, store=MemorySessionStore())
+    assert chatbot.get_conversation_history('nobody') == {'history': [], 'next_after_id': None}
+
+
+@pytest.mark.parametrize('limit, size', [(0, 1), (-5, 1), (HISTORY_MAX_PAGE_SIZE + 1, MESSAGES)])
+def test_route_clamps_limit(history, limit, size):
+    client = create_app(run_bootstrap=False).test_client()
+    page = client.get(f'/api/chatbot/history/s1?limit={limit}').get_json()['data']
+    assert len(page['history']) == size
+
+
+def test_route_pages_match_the_export(history):
+    client = create_app(run_bootstrap=False).test_client()
+    paged = []
+    page = client.get('/api/chatbot/history/s2?limit=8').get_json()['data']
+    paged.extend(page['history'])
+    while page['next_after_id'] is not None:
+        page = client.get(f"/api/chatbot/history/s2?limit=8&after_id={page['next_after_id']}").get_json()['data']
+        paged.extend(page['history'])
+
+    exported = client.get('/api/chatbot/history/s2?format=stream').get_json()['data']['history']
+    assert paged == exported
+    assert len(exported) == MESSAGES
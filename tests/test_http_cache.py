@@ -0,0 +1,72 @@
+"""
+Conditional GETs: versions shared by workers, polls that write nothing, errors as JSON
+"""
+import pytest
+from sqlalchemy import event, update
+
+from backend.app import create_app
+from backend.models import Product
+from backend.routes import chatbot_routes
+from backend.services import product_index
+
+
+@pytest.fixture
+def client(database, monkeypatch):
+    monkeypatch.setattr(product_index, '_index', None)
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'category': 'Rings',
+             'metal_type': 'Gold', 'price': 1000.0 * i, 'popularity': i}
+            for i in range(1, 6)
+        ])
+    return create_app(run_bootstrap=False).test_client()
+
+
+def test_trending_etag_is_the_same_in_every_worker(client, database, monkeypatch):
+    etag = client.get('/api/chatbot/trending?limit=3').headers['ETag']
+
+    # Another worker: its own process tag and in-memory counters
+    monkeypatch.setattr(chatbot_routes, 'PROCESS_TAG', 'another-worker')
+    product_index.bump_catalog_version()
+    assert client.get('/api/chatbot/trending?limit=3', headers={'If-None-Match': etag}).status_code == 304
+
+    # A write from any worker changes it
+    with database.begin() as conn:
+        conn.execute(update(Product).where(Product.id == 1).values(popularity=99))
+    assert client.get('/api/chatbot/trending?limit=3', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_history_poll_writes_nothing(client, database):
+    session_id = client.post('/api/chatbot/start').get_json()['data']['session_id']
+    first = client.get(f'/api/chatbot/history/{session_id}')
+    assert len(first.get_json()['data']['history']) == 1
+
+    writes = []
+
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    client.post('/api/chatbot/message', json={'session_id': session_id, 'message': 'gold'})
+    event.listen(database, 'before_cursor_execute', count_writes)
+    try:
+        # The new messages are still pending, yet the version moved on
+        polled = client.get(f'/api/chatbot/history/{session_id}', headers={'If-None-Match': first.headers['ETag']})
+        assert polled.status_code == 200
+        writes.clear()
+        again = client.get(f'/api/chatbot/history/{session_id}', headers={'If-None-Match': polled.headers['ETag']})
+    finally:
+        event.remove(database, 'before_cursor_execute', count_writes)
+
+    assert again.status_code == 304
+    assert writes == []
+
+
+def test_version_error_is_a_json_500(client, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(chatbot_routes, 'get_trending_tracker', broken)
+    response = client.get('/api/chatbot/trending')
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'error': 'database is locked'}
@@ -0,0 +1,185 @@
+"""
+Query plans of the lookups the app depends on
+
+Every SELECT issued by these code paths must be answered from an index
+(EXPLAIN QUERY PLAN shows no bare table SCAN), both on a database created
+by init_db() and on one created from the original schema.sql and migrated.
+"""
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, inspect, select
+
+from backend.models import (
+    Base,
+    ConversationHistory,
+    Interaction,
+    Product,
+    UserSession,
+    SUPERSEDED_INDEXES,
+    get_db,
+    init_db
+)
+from backend.services.chatbot_service import ChatbotService
+from backend.services.recommendation_engine import HybridRecommendationEngine
+from backend.services.session_store import load_session_state
+
+SESSIONS = 50
+LEGACY_SCHEMA = os.path.join(os.path.dirname(__file__), 'fixtures', 'legacy_schema.sql')
+
+
+@pytest.fixture
+def legacy_database(empty_database):
+    """A database created from the original schema.sql, then migrated"""
+    with open(LEGACY_SCHEMA) as f:
+        script = f.read()
+    raw = empty_database.raw_connection()
+    try:
+        raw.executescript(script)
+    finally:
+        raw.close()
+    init_db()
+    return empty_database
+
+
+@pytest.fixture(params=['database', 'legacy_database'])
+def seeded(request):
+    engine = request.getfixturevalue(request.param)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'category': ('Rings', 'Chains')[i % 2],
+             'metal_type': 'Gold', 'price': 1000.0 * i, 'popularity': i}
+            for i in range(1, 41)
+        ] + [
+            # Never interacted with, so trending falls back to popularity
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'category': 'Pendants',
+             'metal_type': 'Silver', 'price': 1000.0 * i, 'popularity': i}
+            for i in range(41, 46)
+        ])
+        # Many sessions, interleaved, so a session's rows are a small fraction
+        conn.execute(UserSession.__table__.insert(), [
+            {'session_id': f's{n}', 'conversation_state': 'completed'} for n in range(SESSIONS)
+        ])
+        conn.execute(ConversationHistory.__table__.insert(), [
+            {'session_id': f's{n}', 'message': f'message {i}', 'sender': 'user', 'timestamp': now}
+            for i in range(30) for n in range(SESSIONS)
+        ])
+        conn.execute(Interaction.__table__.insert(), [
+            {'session_id': f's{n}', 'product_id': (i + n) % 40 + 1, 'action_type': 'view', 'timestamp': now}
+            for i in range(10) for n in range(SESSIONS)
+        ])
+    # SQLite only uses an index over a scan when statistics favour it
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ANALYZE')
+    return engine
+
+
+@contextmanager
+def captured_selects(engine):
+    """Collect the SELECT statements (with parameters) sent to the database"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def query_plans(engine, statements):
+    with engine.connect() as conn:
+        return [
+            [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            for statement, parameters in statements
+        ]
+
+
+def assert_uses_index(engine, statements, index_names):
+    """No statement scans a table without an index, and one uses index_names"""
+    assert statements, 'no SELECT was issued'
+    plans = query_plans(engine, statements)
+    for (statement, _), plan in zip(statements, plans):
+        for detail in plan:
+            assert not (detail.startswith('SCAN') and 'USING' not in detail), (
+                f'full scan ({detail}) for: {statement}'
+            )
+    details = ' | '.join(detail for plan in plans for detail in plan)
+    assert any(name in details for name in index_names), details
+
+
+def test_migration_replaces_superseded_indexes(legacy_database):
+    inspector = inspect(legacy_database)
+    existing = {
+        index['name']
+        for table in inspector.get_table_names()
+        for index in inspector.get_indexes(table)
+    }
+    declared = {index.name for table in Base.metadata.sorted_tables for index in table.indexes}
+    assert declared <= existing
+    assert not existing & set(SUPERSEDED_INDEXES)
+
+
+def test_session_lookup(seeded):
+    with captured_selects(seeded) as statements:
+        assert load_session_state('s1') is not None
+    assert_uses_index(seeded, statements, ['sqlite_autoindex_user_sessions'])
+
+
+def test_history_page(seeded):
+    db = get_db()
+    try:
+        chatbot = ChatbotService(db)
+        with captured_selects(seeded) as statements:
+            page = chatbot.get_conversation_history('s1', after_id=5, limit=10)
+        assert len(page['history']) == 10
+    finally:
+        db.close()
+    assert_uses_index(seeded, statements, ['idx_history_session_id'])
+
+
+def test_history_version_and_export(seeded):
+    db = get_db()
+    try:
+        chatbot = ChatbotService(db)
+        with captured_selects(seeded) as statements:
+            assert chatbot.get_last_message_id('s1') is not None
+            assert chatbot.get_history_version('s1') == 30
+            assert len(list(chatbot.iter_conversation_history('s1'))) == 30
+    finally:
+        db.close()
+    assert_uses_index(seeded, statements, ['idx_history_session_id'])
+
+
+def test_trending_fallback(seeded):
+    db = get_db()
+    try:
+        engine = HybridRecommendationEngine(db)
+        with captured_selects(seeded) as statements:
+            engine.get_trending_products(limit=5, category='Pendants')
+    finally:
+        db.close()
+    fallback = [(statement, parameters) for statement, parameters in statements if 'popularity DESC' in statement]
+    assert_uses_index(seeded, fallback, ['idx_products_category', 'idx_products_popularity'])
+
+
+@pytest.mark.parametrize('query, index_name', [
+    (select(Product.id).where(Product.sku == 'SKU-7'), 'ix_products_sku'),
+    (select(Product.id).order_by(Product.popularity.desc()).limit(10), 'idx_products_popularity'),
+    (
+        select(Interaction.product_id).where(Interaction.session_id == 's1').order_by(Interaction.timestamp),
+        'idx_interactions_session_timestamp'
+    ),
+    (select(Interaction.session_id).where(Interaction.product_id == 3), 'idx_interactions_product_timestamp'),
+])
+def test_declared_access_paths(seeded, query, index_name):
+    with captured_selects(seeded) as statements:
+        with seeded.connect() as conn:
+            conn.execute(query).all()
+    assert_uses_index(seeded, statements, [index_name])
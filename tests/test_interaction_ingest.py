@@ -0,0 +1,98 @@
+"""
+Interaction log: written segments are deleted, and a replay never duplicates
+"""
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.models import Interaction
+from backend.services.interaction_ingest import InteractionIngestor, InteractionLog
+from backend.services.popularity_counter import PopularityCounter
+
+
+def make_ingestor(log_dir):
+    ingestor = InteractionIngestor(log_dir=str(log_dir))
+    # A counter of its own, never merged, instead of the process-wide one
+    ingestor.popularity = PopularityCounter(shards=1)
+    return ingestor
+
+
+def close(ingestor):
+    """Release the log slot, as a worker that exits (or crashes) does"""
+    if ingestor.log.file is not None:
+        ingestor.log.file.close()
+    ingestor.log.lock_file.close()
+
+
+def segment_files(log_dir):
+    return sorted(name for name in os.listdir(log_dir) if name.endswith('.log'))
+
+
+def event(session_id='s1', product_id=1):
+    return (uuid.uuid4().hex, session_id, product_id, 'view', datetime.utcnow())
+
+
+def stored_interactions(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(Interaction.id), func.count(func.distinct(Interaction.event_id)))).one()
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return tmp_path / 'interaction_log'
+
+
+def test_written_segments_are_deleted(database, log_dir):
+    ingestor = make_ingestor(log_dir)
+    ingestor.log.segment_size = 3
+    try:
+        # Traffic never pauses: the queue is never empty when a batch is written
+        for round_number in range(4):
+            for product_id in range(1, 6):
+                ingestor.submit(f's{round_number}', product_id, 'view')
+            ingestor.flush()
+            ingestor.submit('busy', 1, 'view')
+    finally:
+        close(ingestor)
+
+    # Only the segment holding the one unwritten event is left
+    assert segment_files(log_dir) == [f'interactions.{ingestor.log.slot}.{ingestor.log.segment}.log']
+    assert ingestor.log.unwritten == {ingestor.log.segment: 1}
+    assert stored_interactions(database) == (23, 23)
+
+
+def test_replay_skips_events_already_written(database, log_dir):
+    crashed = make_ingestor(log_dir)
+    crashed.log.segment_size = 2
+    events = [event(product_id=n) for n in range(1, 6)]
+    segments = [crashed.log.append(e) for e in events]
+    # Written, but the worker died before recording it in the log
+    crashed._write(events[:3])
+    # Rejected when the queue was full: never replayed
+    crashed.log.reject(segments[4], events[4][0])
+    close(crashed)
+
+    restarted = make_ingestor(log_dir)
+    try:
+        assert restarted.log.slot == crashed.log.slot
+        restarted.start()
+        restarted.stop()
+    finally:
+        close(restarted)
+
+    assert restarted.stats()['replayed'] == 1
+    assert stored_interactions(database) == (4, 4)
+    assert segment_files(log_dir) == []
+
+
+def test_each_slot_is_claimed_by_one_log(log_dir):
+    first = InteractionLog(str(log_dir))
+    second = InteractionLog(str(log_dir))
+    try:
+        assert first.slot != second.slot
+    finally:
+        first.lock_file.close()
+        second.lock_file.close()
@@ -0,0 +1,72 @@
+"""
+Option matching: longest phrase wins, synonyms, plurals and inflections
+"""
+import pytest
+
+from backend.services.option_matcher import OptionMatcher
+from config.settings import CATEGORIES, METAL_TYPES, OCCASIONS, STYLES
+
+METALS = OptionMatcher(METAL_TYPES)
+OCCASION_MATCHER = OptionMatcher(OCCASIONS)
+STYLE_MATCHER = OptionMatcher(STYLES)
+CATEGORY_MATCHER = OptionMatcher(CATEGORIES)
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('Gold', 'Gold'),
+    ('gold', 'Gold'),
+    ('rose gold', 'Rose Gold'),
+    ('I want rose gold please', 'Rose Gold'),
+    ('rosegold', 'Rose Gold'),
+    ('golden', 'Gold'),
+    ('something golden and shiny', 'Gold'),
+    ('22k', 'Gold'),
+    ('silvery', 'Silver'),
+    ('sterling silver', 'Silver'),
+    ('plat', 'Platinum'),
+    ('go', None),
+    ('goldfish', None),
+    ('bronze', None),
+])
+def test_metals(message, expected):
+    assert METALS(message) == expected
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('earrings', 'Earrings'),
+    ('earring', 'Earrings'),
+    ('ear rings', 'Earrings'),
+    ('a pair of jhumkas', 'Earrings'),
+    # "rings" inside "earrings" is not a whole word
+    ('gold earrings', 'Earrings'),
+    ('ring', 'Rings'),
+    ('engagement ring', 'Rings'),
+    ('wedding bands', 'Rings'),
+    ('neck', 'Necklaces'),
+    ('neck chain', 'Chains'),
+])
+def test_categories(message, expected):
+    assert CATEGORY_MATCHER(message) == expected
+
+
+def test_engagement_ring_answers_the_question_asked():
+    # The same words are a category on the category step, an occasion on the occasion step
+    assert CATEGORY_MATCHER('engagement ring') == 'Rings'
+    assert OCCASION_MATCHER('engagement ring') == 'Engagement'
+    assert OCCASION_MATCHER('engagement') == 'Engagement'
+
+
+@pytest.mark.parametrize('matcher, message, expected', [
+    (OCCASION_MATCHER, 'gifting it to my sister', 'Gift'),
+    (OCCASION_MATCHER, 'for everyday use', 'Daily Wear'),
+    (STYLE_MATCHER, 'simple and dainty', 'Minimalist'),
+    (STYLE_MATCHER, 'something modern', 'Modern'),
+])
+def test_synonyms_in_sentences(matcher, message, expected):
+    assert matcher(message) == expected
+
+
+def test_find_ignores_prefixes():
+    # Free text is only searched for whole phrases
+    assert METALS.find('plat') is None
+    assert METALS.match('plat') == 'Platinum'
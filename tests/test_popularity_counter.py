@@ -0,0 +1,108 @@
+"""
+Popularity counter under concurrent increments and merges
+"""
+import threading
+
+import numpy as np
+import pytest
+from sqlalchemy import select, update
+
+from backend.models import Product, get_db
+from backend.services import product_index
+from backend.services.popularity_counter import MAX_POPULARITY, PopularityCounter
+
+PRODUCTS = 20
+THREADS = 8
+INCREMENTS = 400
+
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    # Start from no snapshot so the one under test is built from this database
+    monkeypatch.setattr(product_index, '_index', None)
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'category': 'Rings',
+             'metal_type': 'Gold', 'price': 1000.0 * i, 'popularity': 0}
+            for i in range(1, PRODUCTS + 1)
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def popularity_in_database(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(Product.id, Product.popularity)).all())
+
+
+def test_parallel_increments_are_all_merged(catalog, database):
+    index = product_index.get_product_index(catalog)
+    catalog_version = product_index.get_catalog_version()
+    counter = PopularityCounter(shards=4)
+
+    def increment(thread_number):
+        for i in range(INCREMENTS):
+            # Product 1 saturates; the others stay below the cap
+            counter.increment(1 if i % 4 == 0 else (i + thread_number) % (PRODUCTS - 1) + 2)
+
+    stop_merging = threading.Event()
+
+    def merge():
+        while not stop_merging.is_set():
+            counter.merge()
+
+    threads = [threading.Thread(target=increment, args=(n,)) for n in range(THREADS)]
+    merger = threading.Thread(target=merge)
+    merger.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop_merging.set()
+    merger.join()
+    counter.merge()
+
+    expected = dict.fromkeys(range(1, PRODUCTS + 1), 0)
+    for n in range(THREADS):
+        for i in range(INCREMENTS):
+            expected[1 if i % 4 == 0 else (i + n) % (PRODUCTS - 1) + 2] += 1
+    expected = {product_id: min(total, MAX_POPULARITY) for product_id, total in expected.items()}
+
+    assert counter.pending() == 0
+    assert popularity_in_database(database) == expected
+
+    # Applied to the live snapshot without invalidating it
+    assert product_index.get_catalog_version() == catalog_version
+    assert product_index.get_product_index(catalog) is index
+    rebuilt = product_index.ProductIndex(product_index._load_rows(catalog), catalog_version)
+    assert np.array_equal(index.ids, rebuilt.ids)
+    assert np.array_equal(index.popularity_bonus, rebuilt.popularity_bonus)
+    assert index.top_n({}, 5) == rebuilt.top_n({}, 5)
+
+
+def test_merge_during_rebuild_is_kept(catalog, database, monkeypatch):
+    index = product_index.get_product_index(catalog)
+    counter = PopularityCounter(shards=1)
+
+    # A catalog write makes the next rebuild replace the snapshot
+    with database.begin() as conn:
+        conn.execute(update(Product).where(Product.id == 2).values(price=50000.0))
+    product_index.bump_catalog_version()
+
+    def merge_before_swap(new_index):
+        # Committed after the rebuild read its rows, applied to the old snapshot
+        counter.increment(1, 7)
+        counter.merge()
+
+    monkeypatch.setattr(product_index, '_rebuild_listeners', [merge_before_swap])
+    product_index._rebuild()
+
+    rebuilt = product_index.get_product_index(catalog)
+    assert rebuilt is not index
+    assert popularity_in_database(database)[1] == 7
+    assert rebuilt.popularity[rebuilt.ids == 1].tolist() == [7]
+
+    # Nothing is counted twice: a fresh read agrees with the replayed snapshot
+    fresh = product_index.ProductIndex(product_index._load_rows(catalog), 0)
+    assert np.array_equal(rebuilt.popularity, fresh.popularity)
@@ -0,0 +1,150 @@
+"""
+ProductIndex ranking against the per-product scoring it replaced, budget
+slices (0 is a bound, products without a price are outside every range) and
+batches scored together against one-at-a-time results
+"""
+import random
+
+import pytest
+
+from backend.models import Product, get_db
+from backend.services import product_index
+from backend.services.recommendation_cache import get_recommendation_cache
+from backend.services.recommendation_engine import HybridRecommendationEngine
+from config.settings import CATEGORIES, METAL_TYPES, MIN_SCORE_THRESHOLD, OCCASIONS, STYLES
+
+PREFERENCES = [
+    {},
+    {'metal_type': 'Gold'},
+    {'metal_type': 'Gold', 'occasion': 'Wedding', 'style': 'Traditional', 'category': 'Rings'},
+    {'metal_type': 'Silver', 'category': 'Earrings', 'budget_min': 10000, 'budget_max': 50000},
+    {'occasion': 'Gift', 'style': 'Modern', 'budget_min': 1000, 'budget_max': 5000},
+    # Unknown values score nothing, like a value no product has
+    {'metal_type': 'Titanium', 'occasion': 'Birthday', 'style': 'Vintage'},
+]
+
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    """Products with missing fields and few popularity values, so scores tie"""
+    monkeypatch.setattr(product_index, '_index', None)
+    rng = random.Random(3)
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}',
+             'metal_type': rng.choice(METAL_TYPES + [None]),
+             'occasion': rng.choice(OCCASIONS + [None]),
+             'style': rng.choice(STYLES + [None]),
+             'category': rng.choice(CATEGORIES),
+             'price': rng.choice([None, 500.0, 2500.0, 10000.0, 25000.0, 50000.0, 120000.0]),
+             'popularity': rng.choice([None, 0, 10, 55, 100])}
+            for i in range(400)
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def reference_top_n(db, preferences, n):
+    """Score every product in the budget with _calculate_rule_score, best first, ties by ID"""
+    engine = HybridRecommendationEngine(db)
+    budget_min, budget_max = preferences.get('budget_min'), preferences.get('budget_max')
+    scored = []
+    for product in db.query(Product).all():
+        if budget_min is not None or budget_max is not None:
+            if product.price is None:
+                continue
+            if budget_min is not None and product.price < budget_min:
+                continue
+            if budget_max is not None and product.price > budget_max:
+                continue
+        score = engine._calculate_rule_score(product, preferences)
+        if score >= MIN_SCORE_THRESHOLD:
+            scored.append((-score, product.id))
+    return [product_id for _, product_id in sorted(scored)[:n]]
+
+
+@pytest.mark.parametrize('preferences', PREFERENCES)
+@pytest.mark.parametrize('n', [1, 10, 500])
+def test_top_n_matches_rule_score(catalog, preferences, n):
+    index = product_index.get_product_index(catalog)
+    assert index.top_n(preferences, n) == reference_top_n(catalog, preferences, n)
+
+
+# (id, price): a free product, ties at 10,000 and two without a price
+PRICES = [(1, 10000.0), (2, None), (3, 0.0), (4, 500.0), (5, None), (6, 10000.0), (7, 25000.0)]
+
+
+def sliced_ids(index, budget_min, budget_max):
+    start, stop = index.budget_slice(budget_min, budget_max)
+    return sorted(index.ids[start:stop].tolist())
+
+
+@pytest.mark.parametrize('budget_min, budget_max, expected', [
+    (None, None, [1, 2, 3, 4, 5, 6, 7]),
+    # 0 is a bound: it keeps free products and drops unpriced ones
+    (0, 10000, [1, 3, 4, 6]),
+    (0, None, [1, 3, 4, 6, 7]),
+    (0, 0, [3]),
+    (None, 500, [3, 4]),
+    (10000, None, [1, 6, 7]),
+    (10000, 10000, [1, 6]),
+    (20000, 10000, []),
+    (30000, None, []),
+])
+def test_budget_slice(budget_min, budget_max, expected):
+    index = product_index.ProductIndex(
+        [(product_id, price, 'Gold', 'Gift', 'Modern', 'Rings', 0) for product_id, price in PRICES], 0
+    )
+    assert sliced_ids(index, budget_min, budget_max) == expected
+    # Unpriced products sort last
+    assert index.priced_count == 5
+    assert sorted(index.ids[index.priced_count:].tolist()) == [2, 5]
+
+
+@pytest.mark.parametrize('preferences', [
+    {'metal_type': 'Gold', 'budget_min': 0, 'budget_max': 10000},
+    {'metal_type': 'Gold', 'occasion': 'Wedding', 'budget_min': 0},
+])
+def test_top_n_with_zero_budget_min(catalog, preferences):
+    index = product_index.get_product_index(catalog)
+    top = index.top_n(preferences, 500)
+    assert top == reference_top_n(catalog, preferences, 500)
+    prices = {product.id: product.price for product in catalog.query(Product).filter(Product.id.in_(top))}
+    assert all(prices[product_id] is not None for product_id in top)
+
+
+def random_preference_sets(count, seed=11):
+    """Partial and full answers, open and zero budgets, unknown values, repeats"""
+    rng = random.Random(seed)
+    budgets = [(None, None), (0, 10000), (0, None), (10000, 50000), (25000, 25000), (60000, 10000)]
+    sets = []
+    for _ in range(count):
+        preferences = {
+            field: rng.choice(values + [None, 'Unknown'])
+            for field, values in (('metal_type', METAL_TYPES), ('occasion', OCCASIONS),
+                                  ('style', STYLES), ('category', CATEGORIES))
+        }
+        preferences['budget_min'], preferences['budget_max'] = rng.choice(budgets)
+        sets.append(preferences)
+    return sets + sets[:5]
+
+
+@pytest.mark.parametrize('n', [1, 10, 500])
+@pytest.mark.parametrize('max_cells', [1, 64, 1_000_000])
+def test_top_n_batch_matches_top_n(catalog, n, max_cells):
+    index = product_index.get_product_index(catalog)
+    preferences_list = random_preference_sets(60)
+    expected = [index.top_n(preferences, n) for preferences in preferences_list]
+    assert index.top_n_batch(preferences_list, n, max_cells=max_cells) == expected
+
+
+def test_recommendations_batch_matches_single_requests(catalog):
+    engine = HybridRecommendationEngine(catalog)
+    preferences_list = random_preference_sets(20, seed=5)
+    batch = engine.get_recommendations_batch(preferences_list, limit=4)
+    # Score the single requests afresh rather than from the batch's cache entries
+    get_recommendation_cache().clear()
+    singles = [engine._rule_based_filter(preferences)[:4] for preferences in preferences_list]
+    assert [[product.id for product in products] for products in batch] == \
+        [[product.id for product in products] for products in singles]
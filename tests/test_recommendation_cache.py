@@ -0,0 +1,59 @@
+"""
+Cached recommendations follow the ranking, and survive refreshes that change nothing
+"""
+import pytest
+from sqlalchemy import update
+
+from backend.models import Product, get_db
+from backend.services import product_index
+from backend.services.popularity_counter import MAX_POPULARITY
+from backend.services.recommendation_cache import get_recommendation_cache
+from backend.services.recommendation_engine import HybridRecommendationEngine
+
+PREFERENCES = {'metal_type': 'Gold', 'category': 'Rings'}
+
+
+@pytest.fixture
+def catalog(database, monkeypatch):
+    monkeypatch.setattr(product_index, '_index', None)
+    get_recommendation_cache().clear()
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'sku': f'SKU-{i}', 'name': f'Product {i}', 'category': 'Rings',
+             'metal_type': 'Gold', 'price': 1000.0 * i, 'popularity': i}
+            for i in range(1, 21)
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def recommended_ids(db):
+    return [product.id for product in HybridRecommendationEngine(db).get_recommendations(PREFERENCES)]
+
+
+def test_merged_popularity_invalidates_cached_rankings(catalog):
+    before = recommended_ids(catalog)
+    assert before[0] == 20
+    assert get_recommendation_cache().stats()['size'] == 1
+
+    product_index.apply_popularity({1: MAX_POPULARITY}, MAX_POPULARITY)
+    assert recommended_ids(catalog)[0] == 1
+
+
+def test_refresh_without_changes_keeps_the_snapshot(catalog, database):
+    index = product_index.get_product_index(catalog)
+    recommended_ids(catalog)
+
+    # The periodic refresh finds the same rows: cached results are still served
+    product_index._rebuild()
+    assert product_index.get_product_index(catalog) is index
+    hits = get_recommendation_cache().stats()['hits']
+    recommended_ids(catalog)
+    assert get_recommendation_cache().stats()['hits'] == hits + 1
+
+    with database.begin() as conn:
+        conn.execute(update(Product).where(Product.id == 3).values(price=99000.0))
+    product_index._rebuild()
+    rebuilt = product_index.get_product_index(catalog)
+    assert rebuilt is not index and rebuilt.generation > index.generation
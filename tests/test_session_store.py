@@ -0,0 +1,165 @@
+"""
+Session stores: messages are written exactly once, and none is lost
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from backend.models import ConversationHistory, UserSession
+from backend.services.session_store import (
+    COMPLETED_STATE,
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionState,
+    persist_session_state
+)
+
+
+class FakeRedis:
+    """In-process stand-in for the Redis commands and scripts the store uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.sorted_sets = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        with self.lock:
+            if nx and key in self.values:
+                return None
+            self.values[key] = value.encode() if isinstance(value, str) else value
+            return True
+
+    def zrangebyscore(self, key, low, high, start=None, num=None):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: item[1])
+        return [member.encode() for member, score in members if score <= high][:num]
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+    def eval(self, script, numkeys, *args):
+        keys, argv = args[:numkeys], [str(arg) for arg in args[numkeys:]]
+        with self.lock:
+            if script == RedisSessionStore.COMPARE_AND_SET:
+                current = self.values.get(keys[0])
+                if current and json.loads(current)['revision'] != int(argv[0]):
+                    return current
+                self.values[keys[0]] = argv[1].encode()
+                idle = self.sorted_sets.setdefault(keys[1], {})
+                if argv[4] == '1':
+                    idle[argv[5]] = float(argv[3])
+                else:
+                    idle.pop(argv[5], None)
+                return None
+            if script == RedisSessionStore.RELEASE:
+                if self.values.get(keys[0]) == argv[0].encode():
+                    del self.values[keys[0]]
+                    return 1
+                return 0
+        raise NotImplementedError(script)
+
+
+def messages_in_database(engine, session_id):
+    with engine.connect() as conn:
+        return [
+            message for (message,) in conn.execute(
+                select(ConversationHistory.message)
+                .where(ConversationHistory.session_id == session_id)
+                .order_by(ConversationHistory.id)
+            )
+        ]
+
+
+def add_message(state, message, later=0):
+    state.history.append((message, 'user', datetime.utcnow()))
+    state.updated_at = datetime.utcnow() + timedelta(seconds=later)
+
+
+def test_message_added_while_persisting_is_kept(database):
+    state = SessionState('s1')
+    add_message(state, 'first')
+
+    def turn_adds_a_message(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO conversation_history'):
+            add_message(state, 'during the write')
+
+    event.listen(database, 'before_cursor_execute', turn_adds_a_message)
+    try:
+        assert persist_session_state(state)
+    finally:
+        event.remove(database, 'before_cursor_execute', turn_adds_a_message)
+
+    assert [message for message, _, _ in state.history] == ['during the write']
+    assert persist_session_state(state)
+    assert messages_in_database(database, 's1') == ['first', 'during the write']
+
+
+def test_memory_store_writes_evicted_sessions(database):
+    store = MemorySessionStore(max_sessions=1)
+    for session_id in ('s1', 's2'):
+        state = SessionState(session_id)
+        add_message(state, f'hello {session_id}')
+        store.save(state)
+
+    assert messages_in_database(database, 's1') == ['hello s1']
+    assert messages_in_database(database, 's2') == []
+    store.flush_all()
+    assert messages_in_database(database, 's2') == ['hello s2']
+
+
+@pytest.fixture
+def redis_store():
+    return RedisSessionStore(client=FakeRedis(), ttl=60, sweep_interval=1)
+
+
+def test_stale_turn_does_not_rewrite_flushed_messages(database, redis_store):
+    state = SessionState('s1')
+    add_message(state, 'welcome')
+    redis_store.save(state)
+
+    # A turn reads the session, then a history read flushes it meanwhile
+    turn = redis_store.get('s1')
+    add_message(turn, 'answer', later=1)
+    redis_store.flush('s1')
+    add_message(turn, 'next question', later=1)
+    redis_store.save(turn)
+
+    # The conversation completes from another stale copy
+    stale = redis_store.get('s1')
+    done = redis_store.get('s1')
+    done.conversation_state = COMPLETED_STATE
+    redis_store.save(done)
+    add_message(stale, 'late message', later=5)
+    redis_store.save(stale)
+    redis_store.flush('s1')
+
+    assert messages_in_database(database, 's1') == ['welcome', 'answer', 'next question', 'late message']
+    with database.connect() as conn:
+        assert len(conn.execute(select(UserSession.id)).all()) == 1
+    assert redis_store.stats()['conflicts'] >= 1
+
+
+def test_sweep_writes_abandoned_sessions(database, redis_store):
+    state = SessionState('abandoned')
+    add_message(state, 'hi')
+    redis_store.save(state)
+    active = SessionState('active')
+    add_message(active, 'still typing')
+    redis_store.save(active)
+
+    # Only sessions idle for write_after seconds are written
+    assert redis_store.sweep() == 0
+    redis_store.client.sorted_sets[redis_store.idle_key]['abandoned'] -= redis_store.write_after + 1
+
+    assert redis_store.sweep() == 1
+    assert messages_in_database(database, 'abandoned') == ['hi']
+    assert messages_in_database(database, 'active') == []
+    assert 'abandoned' not in redis_store.client.sorted_sets[redis_store.idle_key]
+    # Nothing left to write: swept again, it is just dropped from the idle set
+    assert redis_store.sweep() == 0
@@ -0,0 +1,18 @@
+"""
+Settings validation
+"""
+import os
+import subprocess
+import sys
+
+from config.settings import BASE_DIR
+
+
+def test_unknown_sqlite_profile_lists_the_valid_ones():
+    result = subprocess.run(
+        [sys.executable, '-c', 'import config.settings'],
+        cwd=BASE_DIR, env={**os.environ, 'SQLITE_PROFILE': 'fast'},
+        capture_output=True, text=True
+    )
+    assert result.returncode != 0
+    assert "ValueError: Unknown SQLITE_PROFILE 'fast' (valid profiles: default, production)" in result.stderr
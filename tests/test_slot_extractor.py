@@ -0,0 +1,52 @@
+"""
+Several answers in one message, and numbers that are not budgets
+"""
+import pytest
+
+from backend.services.conversation_flow import CONVERSATION_FLOW
+from backend.services.session_store import SessionState
+from backend.services.slot_extractor import SLOT_EXTRACTOR
+
+
+def extract(state, message, **answered):
+    session = SessionState('s1', conversation_state=state)
+    for slot, value in answered.items():
+        setattr(session, slot, value)
+    return {
+        step.state: value
+        for step, value in SLOT_EXTRACTOR.extract(session, CONVERSATION_FLOW[state], message)
+    }
+
+
+def test_every_question_answered_at_once():
+    assert extract('asking_metal', 'gold wedding necklace under 50k, traditional') == {
+        'asking_metal': 'Gold',
+        'asking_budget': (0, 50000),
+        'asking_occasion': 'Wedding',
+        'asking_style': 'Traditional',
+        'asking_category': 'Necklaces'
+    }
+
+
+@pytest.mark.parametrize('message, expected', [
+    # Hallmark and karat numbers are not amounts
+    ('916 gold chain', {'asking_metal': 'Gold', 'asking_category': 'Chains'}),
+    ('22k gold ring', {'asking_metal': 'Gold', 'asking_category': 'Rings'}),
+    ('gold, 2 rings for my sisters', {'asking_metal': 'Gold', 'asking_category': 'Rings'}),
+    # A currency, a unit or a bound word makes it a budget
+    ('gold ring for 15000 rs', {'asking_metal': 'Gold', 'asking_budget': (10000, 25000), 'asking_category': 'Rings'}),
+    ('silver ring around 30k', {'asking_metal': 'Silver', 'asking_budget': (25000, 50000), 'asking_category': 'Rings'}),
+    ('silver, under 5000', {'asking_metal': 'Silver', 'asking_budget': (0, 5000)}),
+])
+def test_budget_only_from_stated_amounts(message, expected):
+    assert extract('asking_metal', message) == expected
+
+
+def test_budget_step_reads_bare_numbers():
+    assert extract('asking_budget', '916', metal_type='Gold') == {'asking_budget': (0, 10000)}
+    assert extract('asking_budget', '10 to 25', metal_type='Gold') == {'asking_budget': (10000, 25000)}
+
+
+def test_answers_already_given_are_kept():
+    answers = extract('asking_occasion', 'wedding, rose gold under 20k', metal_type='Gold', budget_min=0, budget_max=10000)
+    assert answers == {'asking_occasion': 'Wedding'}
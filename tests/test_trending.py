@@ -0,0 +1,59 @@
+"""
+Trending filters and limits
+"""
+from datetime import datetime
+
+import pytest
+
+from backend.app import create_app
+from backend.models import Product, get_db
+from backend.services.recommendation_engine import HybridRecommendationEngine
+from backend.services.trending import TrendingTracker
+from config.settings import TRENDING_TOP_K
+
+# (id, category, metal)
+PRODUCTS = [
+    (1, 'Rings', 'Gold'),
+    (2, 'Rings', 'Silver'),
+    (3, 'Chains', 'Gold'),
+    (4, 'Rings', 'Gold'),
+]
+
+
+def test_category_and_metal_filters_combine():
+    tracker = TrendingTracker()
+    now = datetime.utcnow()
+    for product_id, category, metal in PRODUCTS:
+        for _ in range(product_id):
+            tracker.add(product_id, 'click', now, category, metal)
+
+    assert tracker.top(10) == [4, 3, 2, 1]
+    assert tracker.top(10, category='Rings') == [4, 2, 1]
+    assert tracker.top(10, metal_type='Gold') == [4, 3, 1]
+    assert tracker.top(10, category='Rings', metal_type='Gold') == [4, 1]
+
+
+@pytest.fixture
+def catalog(database):
+    with database.begin() as conn:
+        conn.execute(Product.__table__.insert(), [
+            {'id': product_id, 'sku': f'SKU-{product_id}', 'name': f'Product {product_id}',
+             'category': category, 'metal_type': metal, 'price': 1000.0, 'popularity': product_id}
+            for product_id, category, metal in PRODUCTS
+        ])
+    db = get_db()
+    yield db
+    db.close()
+
+
+def test_popularity_fallback_applies_both_filters(catalog):
+    products = HybridRecommendationEngine(catalog).get_trending_products(10, category='Rings', metal_type='Gold')
+    assert [product.id for product in products] == [4, 1]
+
+
+@pytest.mark.parametrize('limit', [0, TRENDING_TOP_K + 1])
+def test_limit_out_of_range_is_rejected(catalog, limit):
+    client = create_app(run_bootstrap=False).test_client()
+    response = client.get(f'/api/chatbot/trending?limit={limit}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'limit must be between 1 and {TRENDING_TOP_K}'